@@ -1,16 +1,150 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, g
 import sqlite3
 import os
 from datetime import datetime
 from functools import wraps
 
+import assets
+import comments
+import compression
+import conditional
+import db
+import derived_fields
+import images
+import likes
+import metrics
+import migrations
+import page_cache
+import passwords
+import related
+import search_index
+import streaming
+import suggest
+import trending
+import uploads
+import writer
+from pagination import keyset_page
+from view_models import BlogCard, BlogPost, as_timestamp
+
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-change-this-in-production'
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['BLOGS_PER_PAGE'] = int(os.environ.get('BLOGS_PER_PAGE', 12))
+app.config['COMMENTS_PER_PAGE'] = int(os.environ.get('COMMENTS_PER_PAGE', 20))
+
+
+# SQLite connection pool and pragma tuning
+app.config['DATABASE'] = os.environ.get('DATABASE', 'instance/blog_database.db')
+app.config['SQLITE_POOL_SIZE'] = int(os.environ.get('SQLITE_POOL_SIZE', 8))
+app.config['SQLITE_POOL_TIMEOUT'] = float(os.environ.get('SQLITE_POOL_TIMEOUT', 10))
+app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_CACHE_SIZE'] = int(os.environ.get('SQLITE_CACHE_SIZE', -16000))  # negative = KiB
+app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 128 * 1024 * 1024))
+app.config['SQLITE_BUSY_TIMEOUT'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))  # ms
+db.init_app(app)
+
+
+# Group commit: one writer thread per process batches writes into shared transactions
+app.config['WRITE_QUEUE_ENABLED'] = os.environ.get('WRITE_QUEUE_ENABLED', '1') == '1'  # 0 commits inline
+app.config['WRITE_QUEUE_WINDOW_MS'] = float(os.environ.get('WRITE_QUEUE_WINDOW_MS', 2))
+app.config['WRITE_QUEUE_MAX_BATCH'] = int(os.environ.get('WRITE_QUEUE_MAX_BATCH', 64))
+app.config['WRITE_QUEUE_TIMEOUT'] = float(os.environ.get('WRITE_QUEUE_TIMEOUT', 10))  # seconds
+writer.init_app(app)
+
+
+# Rendered page cache for the homepage and post pages
+app.config['PAGE_CACHE_ENABLED'] = os.environ.get('PAGE_CACHE_ENABLED', '1') == '1'
+app.config['PAGE_CACHE_MAX_BYTES'] = int(os.environ.get('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+app.config['PAGE_CACHE_TTL'] = int(os.environ.get('PAGE_CACHE_TTL', 300))  # seconds, bounds cross-worker staleness
+page_cache.init_app(app)
+
+
+# ETag/Last-Modified on post and listing pages, checked before rendering (304 Not Modified)
+app.config['CONDITIONAL_GET_ENABLED'] = os.environ.get('CONDITIONAL_GET_ENABLED', '1') == '1'
+app.config['CONDITIONAL_GET_VERSION'] = os.environ.get('CONDITIONAL_GET_VERSION', '')  # default: digest of code and templates
+conditional.init_app(app)
+
+
+# gzip/brotli for HTML and JSON; cached pages keep their compressed bytes
+app.config['COMPRESS_ENABLED'] = os.environ.get('COMPRESS_ENABLED', '1') == '1'
+app.config['COMPRESS_MIN_BYTES'] = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))  # smaller bodies go as-is
+app.config['COMPRESS_GZIP_LEVEL'] = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+app.config['COMPRESS_BROTLI_QUALITY'] = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+compression.init_app(app)
+
+
+# Buffered like counter: likes are flushed in batches every interval or size threshold
+app.config['LIKES_FLUSH_INTERVAL'] = float(os.environ.get('LIKES_FLUSH_INTERVAL', 1.0))  # seconds
+app.config['LIKES_FLUSH_SIZE'] = int(os.environ.get('LIKES_FLUSH_SIZE', 500))
+likes.init_app(app)
+
+
+# Trending feed: views/likes/comments folded into time-decayed scores
+app.config['TRENDING_HALF_LIFE_HOURS'] = float(os.environ.get('TRENDING_HALF_LIFE_HOURS', 24))
+app.config['TRENDING_VIEW_WEIGHT'] = float(os.environ.get('TRENDING_VIEW_WEIGHT', 1))
+app.config['TRENDING_LIKE_WEIGHT'] = float(os.environ.get('TRENDING_LIKE_WEIGHT', 5))
+app.config['TRENDING_COMMENT_WEIGHT'] = float(os.environ.get('TRENDING_COMMENT_WEIGHT', 10))
+app.config['TRENDING_FLUSH_INTERVAL'] = float(os.environ.get('TRENDING_FLUSH_INTERVAL', 5))  # seconds
+app.config['TRENDING_REFRESH_INTERVAL'] = float(os.environ.get('TRENDING_REFRESH_INTERVAL', 60))  # seconds
+trending.init_app(app)
+
+
+# Background image pipeline (resized JPEG/WebP variants + placeholder)
+app.config['IMAGE_WORKERS'] = int(os.environ.get('IMAGE_WORKERS', 2))
+app.config['IMAGE_QUALITY'] = int(os.environ.get('IMAGE_QUALITY', 82))
+images.init_app(app)
+
+
+# Fingerprinted, precompressed CSS/JS from `python assets.py` (served with immutable caching)
+app.config['ASSETS_FINGERPRINT'] = os.environ.get('ASSETS_FINGERPRINT', '1') == '1'
+assets.init_app(app)
+
+
+# TF-IDF related posts: rebuilt with `python related.py`, refreshed per post on write
+app.config['RELATED_K'] = int(os.environ.get('RELATED_K', 5))
+app.config['RELATED_TERMS_PER_POST'] = int(os.environ.get('RELATED_TERMS_PER_POST', 24))
+app.config['RELATED_MAX_POSTINGS'] = int(os.environ.get('RELATED_MAX_POSTINGS', 500))  # per term, best first
+app.config['RELATED_MIN_SCORE'] = float(os.environ.get('RELATED_MIN_SCORE', 0.05))
+related.init_app(app)
+
+
+# Listing routes that stream their template while rows are read (compare TTFB)
+app.config['STREAM_ROUTES'] = {name for name in os.environ.get('STREAM_ROUTES', '').split(',') if name}
+app.config['STREAM_BUFFER_BYTES'] = int(os.environ.get('STREAM_BUFFER_BYTES', 8192))
+streaming.init_app(app)
+
+
+# Search-as-you-type suggestions from an in-memory prefix index per worker
+app.config['SUGGEST_MAX_ENTRIES'] = int(os.environ.get('SUGGEST_MAX_ENTRIES', 200000))  # bounds memory
+app.config['SUGGEST_WORDS'] = int(os.environ.get('SUGGEST_WORDS', 6))  # title words indexed as starts
+app.config['SUGGEST_SYNC_INTERVAL'] = float(os.environ.get('SUGGEST_SYNC_INTERVAL', 1))  # seconds
+app.config['SUGGEST_LIMIT'] = int(os.environ.get('SUGGEST_LIMIT', 8))
+suggest.init_app(app)
+
+
+# Password hashing runs on a bounded process pool; 0 workers hashes inline
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+app.config['PASSWORD_HASH_QUEUE'] = int(os.environ.get('PASSWORD_HASH_QUEUE', 32))  # in flight before 503
+app.config['PASSWORD_HASH_TIMEOUT'] = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))  # seconds
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+app.config['PASSWORD_SALT_LENGTH'] = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+passwords.init_app(app)
+
+
+# Request/SQL/template instrumentation exposed on /metrics
+app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', 100))
+app.config['PROFILING_ENABLED'] = os.environ.get('FLASK_ENV', 'production') != 'production'  # X-Profile header
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', 'instance/profiles')
+metrics.init_app(app)
+metrics.add_gauges(lambda: [(f'sqlite_pool_{key}', {}, value) for key, value in db.pool_stats().items()])
+metrics.add_gauges(lambda: [(f'page_cache_{key}', {}, value) for key, value in page_cache.cache.stats().items()])
+metrics.add_gauges(lambda: [(f'likes_buffer_{key}', {}, value) for key, value in likes.get_buffer(app).stats().items()])
+metrics.add_gauges(lambda: [(f'trending_{key}', {}, value) for key, value in trending.get_buffer(app).stats().items()])
+metrics.add_gauges(lambda: [(f'suggest_{key}', {}, value) for key, value in suggest.get_suggester(app).stats().items()])
+metrics.add_gauges(lambda: [(f'sqlite_write_queue_{key}', {}, value) for key, value in writer.get_writer(app).stats().items()])
+metrics.add_gauges(lambda: [(f'password_hash_{key}', {}, value) for key, value in passwords.get_hasher(app).stats().items()])
 
 
 # Ensure upload folder exists
@@ -25,65 +159,42 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def save_image_upload(file):
+    """Save an uploaded image by content hash; returns (path, sha256, size) or None
+
+    The uploads row is written with the post by :func:`uploads.record`.
+    """
+    if file and file.filename != '' and allowed_file(file.filename):
+        return uploads.save(file, app.config['UPLOAD_FOLDER'])
+    return None
+
+
 def init_db():
-    """Initialize the database with required tables"""
-    os.makedirs('instance', exist_ok=True)
-    conn = sqlite3.connect('instance/blog_database.db')
-    cursor = conn.cursor()
-
-
-    # Create users table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-
-
-    # Create blogs table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS blogs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            content TEXT NOT NULL,
-            image_path TEXT,
-            author_id INTEGER NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            likes INTEGER DEFAULT 0,
-            FOREIGN KEY (author_id) REFERENCES users (id)
-        )
-    """)
-
-
-    # Create comments table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS comments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            blog_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            content TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (blog_id) REFERENCES blogs (id),
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    """)
-
-
-    conn.commit()
+    """Initialize the database by applying any pending schema migrations"""
+    os.makedirs(os.path.dirname(app.config['DATABASE']) or '.', exist_ok=True)
+    conn = sqlite3.connect(app.config['DATABASE'])
+    conn.execute('PRAGMA journal_mode = WAL')
+    before = migrations.schema_version(conn)
+    migrations.migrate(conn)
     conn.close()
     print("✅ Database initialized successfully!")
+    if before:
+        # Left to a CLI step so a long rebuild never holds the write lock while workers boot
+        for fill in migrations.backfills_after(before):
+            print(f"⚠️  Still empty: {fill.__doc__} - run python migrations.py {app.config['DATABASE']} --backfill")
 
 
 def get_db_connection():
-    """Get database connection"""
-    conn = sqlite3.connect('instance/blog_database.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Get the pooled database connection for this request, timed for /metrics"""
+    if 'db_instrumented' not in g:
+        g.db_instrumented = metrics.instrument(db.get_db())
+    return g.db_instrumented
+
+
+def release_db_connection():
+    """Hand the request's connection back early, e.g. before slow non-SQL work"""
+    g.pop('db_instrumented', None)
+    db.release_db()
 
 
 def login_required(f):
@@ -97,60 +208,77 @@ def login_required(f):
     return decorated_function
 
 
-# Custom Jinja2 filters for date formatting
+def hashing_busy(template):
+    """503 page for when the password hashing pool is saturated"""
+    flash('We are handling a lot of sign-ins right now. Please try again in a moment.', 'error')
+    response = app.make_response((render_template(template), 503))
+    response.headers['Retry-After'] = '2'
+    return response
+
+
+# Custom Jinja2 filters for date formatting; view models expose the same
+# strings as attributes (blog.created.short), these remain for raw values
 @app.template_filter('format_date')
 def format_date(date_str):
     """Format date string to readable format"""
-    try:
-        if isinstance(date_str, str):
-            # Handle SQLite datetime format
-            dt = datetime.fromisoformat(date_str.replace('Z', ''))
-        else:
-            dt = date_str
-        return dt.strftime('%B %d, %Y')
-    except:
-        return str(date_str)
+    return as_timestamp(date_str).long
 
 
 @app.template_filter('format_date_short')
 def format_date_short(date_str):
     """Format date string to short readable format"""
-    try:
-        if isinstance(date_str, str):
-            dt = datetime.fromisoformat(date_str.replace('Z', ''))
-        else:
-            dt = date_str
-        return dt.strftime('%b %d, %Y')
-    except:
-        return str(date_str)
+    return as_timestamp(date_str).short
 
 
 @app.template_filter('time_ago')
 def time_ago(date_str):
     """Show time ago format"""
-    try:
-        if isinstance(date_str, str):
-            dt = datetime.fromisoformat(date_str.replace('Z', ''))
-        else:
-            dt = date_str
+    return as_timestamp(date_str).ago()
 
 
-        now = datetime.now()
-        diff = now - dt
+# Columns a blog card needs. The derived columns are filled when a post is
+# written; the fallbacks only read content for rows not yet backfilled
+BLOG_CARD_COLUMNS = """
+    b.id, b.title, b.image_path, b.author_id, b.created_at, b.likes,
+    b.image_card, b.image_full, b.image_webp_card, b.image_webp_full, b.image_placeholder,
+    b.word_count, b.reading_minutes,
+    COALESCE(b.excerpt, substr(b.content, 1, 150)) AS excerpt,
+    COALESCE(b.content_length, length(b.content)) AS content_length
+"""
 
 
-        if diff.days > 0:
-            return f"{diff.days} days ago"
-        elif diff.seconds > 3600:
-            hours = diff.seconds // 3600
-            return f"{hours} hours ago"
-        elif diff.seconds > 60:
-            minutes = diff.seconds // 60
-            return f"{minutes} minutes ago"
-        else:
-            return "Just now"
-    except:
-        return str(date_str)
+def blog_page(where='', params=()):
+    """Keyset page of blog cards for the cursor in the current request"""
+    return keyset_page(
+        get_db_connection(),
+        f"""
+            SELECT {BLOG_CARD_COLUMNS}, u.name AS author_name
+            FROM blogs b
+            JOIN users u ON b.author_id = u.id
+        """,
+        where, params,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        per_page=app.config['BLOGS_PER_PAGE'],
+        factory=BlogCard,
+        lazy=streaming.is_streaming(),
+    )
+
+
+def feed_version(**kwargs):
+    """Validators shared by every listing page"""
+    return conditional.page_versions(get_db_connection(), 'feed')
+
+
+def trending_version(**kwargs):
+    return conditional.page_versions(get_db_connection(), 'feed', 'trending')
+
+
+def post_version(id):
+    return conditional.post_version(get_db_connection(), id)
+
+
+app.add_template_filter(search_index.highlight_filter, 'highlight')
 
 
 # Template context processor
@@ -160,17 +288,41 @@ def inject_current_year():
 
 
 @app.route('/')
+@conditional.validated(feed_version)
+@page_cache.cached_page
 def index():
-    """Homepage - Display all blogs"""
-    conn = get_db_connection()
-    blogs = conn.execute("""
-        SELECT b.*, u.name as author_name 
-        FROM blogs b 
-        JOIN users u ON b.author_id = u.id 
-        ORDER BY b.created_at DESC
-    """).fetchall()
-    conn.close()
-    return render_template('index.html', blogs=blogs)
+    """Homepage - Display one page of blogs"""
+    page = blog_page()
+    if not streaming.is_streaming():
+        page_cache.tag('feed', *(f"blog:{blog.id}" for blog in page.items))
+    return streaming.render_listing('index.html', blogs=page.items, page=page)
+
+
+@app.route('/trending')
+@conditional.validated(trending_version)
+@page_cache.cached_page
+def trending_feed():
+    """Posts ranked by time-decayed likes, comments and views"""
+    # Pin the plan to a range read on idx_trending_score: with trending_scores empty
+    # at ANALYZE time the planner would rather scan blogs and sort
+    page = keyset_page(
+        get_db_connection(),
+        f"""
+            SELECT {BLOG_CARD_COLUMNS}, u.name AS author_name, t.score
+            FROM trending_scores t INDEXED BY idx_trending_score
+            CROSS JOIN blogs b ON b.id = t.blog_id
+            CROSS JOIN users u ON b.author_id = u.id
+        """,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        per_page=app.config['BLOGS_PER_PAGE'],
+        sort_col='t.score', id_col='t.blog_id', sort_key='score', cast=float,
+        factory=BlogCard,
+        lazy=streaming.is_streaming(),
+    )
+    if not streaming.is_streaming():
+        page_cache.tag('trending', *(f"blog:{blog.id}" for blog in page.items))
+    return streaming.render_listing('trending.html', blogs=page.items, page=page)
 
 
 @app.route('/signup', methods=['GET', 'POST'])
@@ -206,25 +358,29 @@ def signup():
 
         if existing_user:
             flash('Email already registered!', 'error')
-            conn.close()
             return render_template('signup.html')
 
 
-        # Create new user
-        hashed_password = generate_password_hash(password)
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO users (name, email, password) VALUES (?, ?, ?)',
-                    (name, email, hashed_password))
-        conn.commit()
+        # Create new user; don't hold a pooled connection while hashing
+        release_db_connection()
+        try:
+            hashed_password = passwords.get_hasher(app).hash(password)
+        except passwords.HashingBusy:
+            return hashing_busy('signup.html')
+        try:
+            writer.run(app, lambda conn: conn.execute(
+                'INSERT INTO users (name, email, password) VALUES (?, ?, ?)',
+                (name, email, hashed_password)))
+        except sqlite3.IntegrityError:
+            # Another signup for the same address committed while we hashed
+            flash('Email already registered!', 'error')
+            return render_template('signup.html')
 
 
         # Get user id if needed
         # user_id = cursor.lastrowid  # Uncomment if needed
 
 
-        conn.close()
-
-
         flash('Account created successfully! Please log in.', 'success')
         return redirect(url_for('login'))
 
@@ -247,10 +403,27 @@ def login():
 
         conn = get_db_connection()
         user = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
-        conn.close()
 
 
-        if user and check_password_hash(user['password'], password):
+        release_db_connection()
+        hasher = passwords.get_hasher(app)
+        try:
+            valid = user is not None and hasher.check(user['password'], password)
+        except passwords.HashingBusy:
+            return hashing_busy('login.html')
+
+
+        if valid and hasher.needs_rehash(user['password']):
+            # Upgrade hashes made with older parameters while we know the password
+            try:
+                new_hash = hasher.hash(password)
+                writer.run(app, lambda conn: conn.execute(
+                    'UPDATE users SET password = ? WHERE id = ?', (new_hash, user['id'])))
+            except passwords.HashingBusy:
+                pass  # try again on a later login
+
+
+        if valid:
             session['user_id'] = user['id']
             session['user_name'] = user['name']
             flash(f'Welcome back, {user["name"]}!', 'success')
@@ -284,33 +457,30 @@ def write_blog():
             return render_template('write_blog.html')
 
 
-        # Handle image upload
-        image_path = None
-        if 'image' in request.files:
-            file = request.files['image']
-            if file and file.filename != '' and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                # Add timestamp to avoid filename conflicts
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_')
-                filename = timestamp + filename
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(file_path)
-                image_path = f'uploads/{filename}'
+        # Save blog to database, storing any image by content hash
+        upload = save_image_upload(request.files.get('image'))
+        image_path = upload[0] if upload else None
+        fields = derived_fields.derive(content)
+        author_id = session['user_id']
 
 
-        # Save blog to database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO blogs (title, content, image_path, author_id) 
-            VALUES (?, ?, ?, ?)
-        """, (title, content, image_path, session['user_id']))
-        conn.commit()
+        def insert_blog(conn):
+            if upload:
+                uploads.record(conn, *upload)
+            return conn.execute("""
+                INSERT INTO blogs (title, content, image_path, author_id,
+                                   excerpt, word_count, reading_minutes, content_length)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (title, content, image_path, author_id,
+                  fields['excerpt'], fields['word_count'], fields['reading_minutes'],
+                  fields['content_length'])).lastrowid
 
 
         # Get the newly created blog ID
-        blog_id = cursor.lastrowid
-        conn.close()
+        blog_id = writer.run(app, insert_blog)
+        page_cache.invalidate('feed')
+        images.schedule(app, blog_id, image_path)
+        related.schedule(app, blog_id)
 
 
         flash('Blog published successfully!', 'success')
@@ -321,6 +491,9 @@ def write_blog():
 
 
 @app.route('/blog/<int:id>')
+@trending.counts_views
+@conditional.validated(post_version)
+@page_cache.cached_page
 def view_blog(id):
     """View individual blog post"""
     conn = get_db_connection()
@@ -334,36 +507,85 @@ def view_blog(id):
 
     if not blog:
         flash('Blog not found!', 'error')
-        conn.close()
         return redirect(url_for('index'))
+    blog = BlogPost(blog)
 
 
-    # Get comments for this blog
-    comments = conn.execute("""
-        SELECT c.*, u.name as commenter_name 
-        FROM comments c 
-        JOIN users u ON c.user_id = u.id 
-        WHERE c.blog_id = ? 
-        ORDER BY c.created_at DESC
-    """, (id,)).fetchall()
+    # First page of comments; the rest are fetched as the reader scrolls
+    page = comments.comment_page(conn, id, per_page=app.config['COMMENTS_PER_PAGE'])
+    related_posts = [BlogCard(row) for row in related.related_to(conn, id)]
 
 
-    conn.close()
-    return render_template('view_blog.html', blog=blog, comments=comments)
+    page_cache.tag(f'blog:{id}', *(f'blog:{post.id}' for post in related_posts))
+    return render_template('view_blog.html', blog=blog, comments=page.items, comments_page=page,
+                           related_posts=related_posts)
+
+
+@app.route('/blog/<int:id>/comments')
+def list_comments(id):
+    """One page of a post's comments as JSON with a rendered HTML fragment"""
+    page = comments.comment_page(get_db_connection(), id, after=request.args.get('after'),
+                                 per_page=app.config['COMMENTS_PER_PAGE'])
+    return jsonify({
+        'html': render_template('_comments.html', comments=page.items),
+        'count': len(page.items),
+        'next_url': url_for('list_comments', id=id, after=page.next_cursor) if page.has_next else None,
+    })
+
+
+@app.route('/blog/<int:id>/comments', methods=['POST'])
+@login_required
+def add_comment(id):
+    """Post a comment; answers JSON to fetch() and redirects plain form posts"""
+    content = request.form.get('content', '').strip()
+    wants_json = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    error, status = None, 400
+    if not content:
+        error = 'Comment cannot be empty!'
+    elif len(content) > comments.MAX_COMMENT_LENGTH:
+        error = f'Comments are limited to {comments.MAX_COMMENT_LENGTH} characters.'
+
+
+    if error is None:
+        comment = writer.run(app, comments.add_comment, id, session['user_id'], content)
+        if comment is None:
+            error, status = 'Blog not found!', 404
+        else:
+            page_cache.invalidate(f'blog:{id}')
+
+
+    if wants_json:
+        if error:
+            return jsonify({'error': error}), status
+        return jsonify({'html': render_template('_comments.html', comments=[comment])}), 201
+    flash(error or 'Comment posted!', 'error' if error else 'success')
+    return redirect(url_for('view_blog', id=id) + '#comments')
 
 
 @app.route('/my_blogs')
 @login_required
+@conditional.validated(feed_version)
 def my_blogs():
     """Display user's own blogs"""
-    conn = get_db_connection()
-    blogs = conn.execute("""
-        SELECT * FROM blogs 
-        WHERE author_id = ? 
-        ORDER BY created_at DESC
-    """, (session['user_id'],)).fetchall()
-    conn.close()
-    return render_template('my_blogs.html', blogs=blogs)
+    page = blog_page('b.author_id = ?', (session['user_id'],))
+    return streaming.render_listing('my_blogs.html', blogs=page.items, page=page)
+
+
+@app.route('/author/<int:id>')
+@conditional.validated(feed_version)
+@page_cache.cached_page
+def author_blogs(id):
+    """Public listing of one author's posts"""
+    author = get_db_connection().execute('SELECT id, name FROM users WHERE id = ?', (id,)).fetchone()
+    if not author:
+        flash('Author not found!', 'error')
+        return redirect(url_for('index'))
+
+
+    page = blog_page('b.author_id = ?', (id,))
+    if not streaming.is_streaming():
+        page_cache.tag('feed', *(f"blog:{blog.id}" for blog in page.items))
+    return streaming.render_listing('author.html', author=author, blogs=page.items, page=page)
 
 
 @app.route('/edit_blog/<int:id>', methods=['GET', 'POST'])
@@ -377,7 +599,6 @@ def edit_blog(id):
 
     if not blog:
         flash('Blog not found or you do not have permission to edit it!', 'error')
-        conn.close()
         return redirect(url_for('my_blogs'))
 
 
@@ -388,38 +609,52 @@ def edit_blog(id):
 
         if not title or not content:
             flash('Title and content are required!', 'error')
-            conn.close()
             return render_template('edit_blog.html', blog=blog)
 
 
-        # Handle image upload
-        image_path = blog['image_path']  # Keep existing image by default
-        if 'image' in request.files:
-            file = request.files['image']
-            if file and file.filename != '' and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_')
-                filename = timestamp + filename
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(file_path)
-                image_path = f'uploads/{filename}'
+        # Handle image upload; the replaced file is reclaimed by `python uploads.py`
+        upload = save_image_upload(request.files.get('image'))
+        image_path = upload[0] if upload else blog['image_path']
+        release_db_connection()
 
 
         # Update blog in database
-        conn.execute("""
-            UPDATE blogs 
-            SET title = ?, content = ?, image_path = ?, updated_at = CURRENT_TIMESTAMP 
-            WHERE id = ? AND author_id = ?
-        """, (title, content, image_path, id, session['user_id']))
-        conn.commit()
-        conn.close()
+        fields = derived_fields.derive(content)
+        author_id = session['user_id']
+
+
+        def update_blog(conn):
+            if upload:
+                uploads.record(conn, *upload)
+            conn.execute("""
+                UPDATE blogs 
+                SET title = ?, content = ?, image_path = ?, updated_at = CURRENT_TIMESTAMP,
+                    excerpt = ?, word_count = ?, reading_minutes = ?, content_length = ?
+                WHERE id = ? AND author_id = ?
+            """, (title, content, image_path,
+                  fields['excerpt'], fields['word_count'], fields['reading_minutes'], fields['content_length'],
+                  id, author_id))
+            if image_path != blog['image_path']:
+                # Old variants belong to the replaced image; regenerate in the background
+                conn.execute("""
+                    UPDATE blogs
+                    SET image_card = NULL, image_full = NULL, image_webp_card = NULL,
+                        image_webp_full = NULL, image_placeholder = NULL
+                    WHERE id = ?
+                """, (id,))
+
+
+        writer.run(app, update_blog)
+        page_cache.invalidate(f'blog:{id}')
+        if image_path != blog['image_path']:
+            images.schedule(app, id, image_path)
+        related.schedule(app, id)
 
 
         flash('Blog updated successfully!', 'success')
         return redirect(url_for('view_blog', id=id))
 
 
-    conn.close()
     return render_template('edit_blog.html', blog=blog)
 
 
@@ -435,53 +670,93 @@ def delete_blog(id):
     if not blog:
         flash('Blog not found or you do not have permission to delete it!', 'error')
     else:
-        conn.execute('DELETE FROM blogs WHERE id = ? AND author_id = ?', 
-                    (id, session['user_id']))
-        conn.commit()
+        release_db_connection()
+        author_id = session['user_id']
+
+
+        def remove_blog(conn):
+            conn.execute('DELETE FROM blogs WHERE id = ? AND author_id = ?', 
+                        (id, author_id))
+            conn.execute('DELETE FROM blog_likes WHERE blog_id = ?', (id,))
+            conn.execute('DELETE FROM comments WHERE blog_id = ?', (id,))
+            conn.execute('DELETE FROM trending_scores WHERE blog_id = ?', (id,))
+
+
+        writer.run(app, remove_blog)
+        page_cache.invalidate('feed', f'blog:{id}')
+        related.schedule(app, id)
         flash('Blog deleted successfully!', 'success')
 
 
-    conn.close()
     return redirect(url_for('my_blogs'))
 
 
 @app.route('/like_blog/<int:id>')
 @login_required
 def like_blog(id):
-    """Like a blog post"""
-    conn = get_db_connection()
-    conn.execute('UPDATE blogs SET likes = likes + 1 WHERE id = ?', (id,))
-    conn.commit()
-
-
-    # Get updated like count
-    blog = conn.execute('SELECT likes FROM blogs WHERE id = ?', (id,)).fetchone()
-    conn.close()
+    """Like a blog post (once per user; written to the database in batches)"""
+    count, liked = likes.get_buffer(app).like(get_db_connection(), session['user_id'], id)
 
 
-    return jsonify({'likes': blog['likes'] if blog else 0})
+    return jsonify({'likes': count, 'liked': liked})
 
 
 @app.route('/search')
+@conditional.validated(feed_version)
 def search():
-    """Search blogs by title or author"""
+    """Full-text search over title, content and author, best matches first"""
     query = request.args.get('q', '').strip()
     if not query:
         return redirect(url_for('index'))
 
 
-    conn = get_db_connection()
-    blogs = conn.execute("""
-        SELECT b.*, u.name as author_name 
-        FROM blogs b 
-        JOIN users u ON b.author_id = u.id 
-        WHERE b.title LIKE ? OR u.name LIKE ?
-        ORDER BY b.created_at DESC
-    """, (f'%{query}%', f'%{query}%')).fetchall()
-    conn.close()
+    page = search_index.search(
+        get_db_connection(), query,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        per_page=app.config['BLOGS_PER_PAGE'],
+        lazy=streaming.is_streaming(),
+    )
+    if page is None:
+        return redirect(url_for('index'))
+
 
+    return streaming.render_listing('search_results.html', blogs=page.items, page=page, query=query)
 
-    return render_template('search_results.html', blogs=blogs, query=query)
+
+@app.route('/api/suggest')
+def api_suggest():
+    """Post titles and author names starting with the typed prefix"""
+    query = request.args.get('q', '').strip()[:100]
+    limit = min(request.args.get('limit', app.config['SUGGEST_LIMIT'], type=int), 20)
+    suggestions = []
+    if query:
+        for kind, item_id, label in suggest.get_suggester(app).lookup(query, limit):
+            url = url_for('view_blog', id=item_id) if kind == 'post' else url_for('author_blogs', id=item_id)
+            suggestions.append({'type': kind, 'label': label, 'url': url})
+
+
+    response = jsonify({'query': query, 'suggestions': suggestions})
+    response.headers['Cache-Control'] = 'public, max-age=30'
+    return response
+
+
+@app.route('/healthz')
+def healthz():
+    """Liveness/readiness probe: the database answers and the schema is current"""
+    try:
+        version = get_db_connection().execute('PRAGMA user_version').fetchone()[0]
+    except (sqlite3.Error, db.PoolTimeout) as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 503
+    expected = len(migrations.MIGRATIONS)
+    status = 'ok' if version == expected else 'migrating'
+    return jsonify({'status': status, 'schema_version': version, 'pid': os.getpid()}), (200 if status == 'ok' else 503)
+
+
+@app.route('/cache_stats')
+def cache_stats():
+    """Page cache hit/miss/eviction counters"""
+    return jsonify(page_cache.cache.stats())
 
 
 if __name__ == '__main__':
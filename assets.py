@@ -0,0 +1,239 @@
+"""
+Fingerprinted, minified and precompressed static assets.
+
+``python assets.py`` copies every stylesheet and script under static/css
+and static/js to ``static/dist/`` under a content-hashed name
+(``css/style.3f9c1e0a.css``), minified, with ``.gz`` and, when the
+brotli package is installed, ``.br`` siblings next to it.  It then
+records the mapping in ``static/dist/manifest.json``.
+
+With the manifest loaded, ``url_for('static', filename='css/style.css')``
+resolves to the fingerprinted file, so templates keep their plain paths.
+Fingerprinted files never change, so they are served with a year-long
+``immutable`` Cache-Control, choosing the precompressed sibling that the
+client's Accept-Encoding allows.  A source edited after the last build
+is served as-is until the next build, rather than stale.
+
+Usage: python assets.py [static folder] [--prune]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip siblings are always written
+    brotli = None
+
+from flask import current_app, request, send_from_directory
+
+
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+SOURCES = {'css': '.css', 'js': '.js'}
+# Precompressed siblings, best first
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+CSS_TOKEN = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/|\s+|[^"\'/\s]+|/', re.S)
+CSS_TIGHT = re.compile(r'\s*([{};,])\s*')
+
+
+def _tighten(css):
+    css = CSS_TIGHT.sub(r'\1', css)
+    return re.sub(r':\s+', ':', css).replace(';}', '}')
+
+
+def minify_css(text):
+    """Drop comments and redundant whitespace, leaving strings untouched"""
+    out = []
+    plain = []
+    for token in CSS_TOKEN.findall(text):
+        if token.startswith('/*'):
+            continue
+        if token[0] in '"\'':
+            out.extend((_tighten(''.join(plain)), token))
+            plain = []
+        else:
+            plain.append(' ' if token.isspace() else token)
+    out.append(_tighten(''.join(plain)))
+    return ''.join(out).strip()
+
+
+def minify_js(text):
+    """Line-level minification that cannot change what the script does
+
+    Indentation, blank lines and whole-line comments go; line breaks stay,
+    so automatic semicolon insertion is unaffected, and lines inside a
+    multi-line template literal are kept exactly.
+    """
+    out = []
+    in_template = in_comment = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if in_template:
+            out.append(line)
+        elif in_comment:
+            in_comment = '*/' not in stripped
+            continue
+        elif stripped.startswith('/*'):
+            in_comment = '*/' not in stripped
+            continue
+        elif stripped and not stripped.startswith('//'):
+            out.append(stripped)
+        if len(re.findall(r'(?<!\\)`', line)) % 2:
+            in_template = not in_template
+    return '\n'.join(out) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def _write_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.asset-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            out.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def build(static_folder='static', verbose=False):
+    """Fingerprint, minify and precompress every asset; returns the manifest"""
+    dist = os.path.join(static_folder, DIST)
+    manifest = {}
+    for folder, ext in SOURCES.items():
+        source_dir = os.path.join(static_folder, folder)
+        if not os.path.isdir(source_dir):
+            continue
+        os.makedirs(os.path.join(dist, folder), exist_ok=True)
+        for name in sorted(os.listdir(source_dir)):
+            if not name.endswith(ext):
+                continue
+            source = os.path.join(source_dir, name)
+            with open(source, 'rb') as f:
+                original = f.read()
+            data = MINIFIERS[ext](original.decode('utf-8')).encode('utf-8')
+            digest = hashlib.sha256(data).hexdigest()[:10]
+            target = f'{folder}/{name[:-len(ext)]}.{digest}{ext}'
+            path = os.path.join(dist, target)
+            if not os.path.exists(path):
+                _write_atomic(path, data)
+                _write_atomic(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    _write_atomic(path + '.br', brotli.compress(data, quality=11))
+            manifest[f'{folder}/{name}'] = {'path': f'{DIST}/{target}',
+                                            'source': hashlib.sha256(original).hexdigest()}
+            if verbose:
+                sizes = [f'{len(original)} B', f'minified {len(data)} B',
+                         f'gzip {os.path.getsize(path + ".gz")} B']
+                if os.path.exists(path + '.br'):
+                    sizes.append(f'brotli {os.path.getsize(path + ".br")} B')
+                print(f"✅ {folder}/{name} -> {target} ({', '.join(sizes)})")
+    os.makedirs(dist, exist_ok=True)
+    _write_atomic(os.path.join(dist, MANIFEST), json.dumps(manifest, indent=2).encode())
+    return manifest
+
+
+def prune(static_folder='static', manifest=None):
+    """Delete fingerprinted files the current manifest no longer names; returns how many"""
+    dist = os.path.join(static_folder, DIST)
+    if manifest is None:
+        manifest = load_manifest(static_folder, check=False)
+    keep = {entry['path'][len(DIST) + 1:] for entry in manifest.values()}
+    removed = 0
+    for folder in SOURCES:
+        folder_path = os.path.join(dist, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        for name in os.listdir(folder_path):
+            base = name
+            for _, suffix in ENCODINGS:
+                base = base[:-len(suffix)] if base.endswith(suffix) else base
+            if f'{folder}/{base}' not in keep:
+                os.remove(os.path.join(folder_path, name))
+                removed += 1
+    return removed
+
+
+def load_manifest(static_folder, check=True):
+    """The built manifest, minus entries whose source changed since the build"""
+    try:
+        with open(os.path.join(static_folder, DIST, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not check:
+        return manifest
+    current = {}
+    for filename, entry in manifest.items():
+        try:
+            with open(os.path.join(static_folder, filename), 'rb') as f:
+                source = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            continue
+        if source == entry['source']:
+            current[filename] = entry
+    return current
+
+
+def static_url(endpoint, values):
+    """url_defaults hook: point url_for('static', filename=...) at the fingerprinted file"""
+    if endpoint != 'static':
+        return
+    entry = current_app.extensions['assets'].get(values.get('filename'))
+    if entry is not None:
+        values['filename'] = entry['path']
+
+
+def _mimetype(filename):
+    return {'.css': 'text/css', '.js': 'text/javascript'}.get(os.path.splitext(filename)[1])
+
+
+def send_static(filename):
+    """Static view: fingerprinted files precompressed and cached for good, the rest as usual"""
+    if not filename.startswith(DIST + '/') or filename.endswith('.json'):
+        return current_app.send_static_file(filename)
+
+    accepted = request.accept_encodings
+    for encoding, suffix in ENCODINGS:
+        if accepted[encoding] and os.path.isfile(os.path.join(current_app.static_folder, filename + suffix)):
+            response = send_from_directory(current_app.static_folder, filename + suffix,
+                                           mimetype=_mimetype(filename), conditional=True)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(current_app.static_folder, filename, conditional=True)
+    response.headers['Cache-Control'] = IMMUTABLE
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_app(app):
+    app.config.setdefault('ASSETS_FINGERPRINT', True)
+    manifest = load_manifest(app.static_folder) if app.config['ASSETS_FINGERPRINT'] else {}
+    app.extensions['assets'] = manifest
+    if manifest:
+        app.url_defaults(static_url)
+        app.view_functions['static'] = send_static
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build fingerprinted, precompressed static assets')
+    parser.add_argument('static', nargs='?', default='static')
+    parser.add_argument('--prune', action='store_true', help='delete files from earlier builds')
+    args = parser.parse_args()
+    if brotli is None:
+        print("⚠️  brotli is not installed; writing gzip siblings only")
+    manifest = build(args.static, verbose=True)
+    if args.prune:
+        print(f"🧹 Removed {prune(args.static, manifest)} files from earlier builds")
+    print(f"📦 {len(manifest)} assets in {os.path.join(args.static, DIST, MANIFEST)}")
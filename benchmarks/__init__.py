@@ -0,0 +1 @@
+"""Synthetic corpus generation and latency benchmarks for the blog app"""
@@ -0,0 +1,223 @@
+"""
+Build a large, realistic blog database for benchmarking.
+
+Usage:
+    python -m benchmarks.corpus instance/bench.db --scale large
+    python -m benchmarks.corpus /tmp/x.db --users 2000 --posts 20000 --comments 200000
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+import derived_fields
+import migrations
+import related
+import search_index
+import trending
+from comments import ensure_schema as ensure_comment_schema
+
+
+SCALES = {
+    'small': {'users': 200, 'posts': 1000, 'comments': 10000},
+    'medium': {'users': 2000, 'posts': 10000, 'comments': 100000},
+    'large': {'users': 10000, 'posts': 100000, 'comments': 1000000},
+}
+
+CHUNK = 10000
+
+FIRST_NAMES = ['Aarav', 'Ananya', 'Rohan', 'Priya', 'Vikram', 'Sneha', 'Arjun', 'Kavya', 'Rahul',
+               'Isha', 'Amit', 'Neha', 'Karan', 'Divya', 'Sanjay', 'Meera', 'Rajesh', 'Pooja',
+               'Alex', 'Maria', 'Chen', 'Fatima', 'Lucas', 'Sofia', 'Omar', 'Yuki']
+LAST_NAMES = ['Sharma', 'Patel', 'Kumar', 'Singh', 'Gupta', 'Iyer', 'Reddy', 'Nair', 'Mehta',
+              'Joshi', 'Das', 'Rao', 'Smith', 'Garcia', 'Wang', 'Khan', 'Silva', 'Tanaka']
+
+TOPICS = ['Flask', 'Python', 'JavaScript', 'CSS', 'SQLite', 'Docker', 'React', 'Databases',
+          'Testing', 'Security', 'Performance', 'Design', 'Career', 'Travel', 'Cooking',
+          'Photography', 'Machine Learning', 'Linux', 'Networking', 'Productivity']
+
+TITLE_PATTERNS = ['Getting Started with {t}', 'Mastering {t}', '{n} Things I Learned About {t}',
+                  'Why {t} Matters', 'A Practical Guide to {t}', '{t} Tips for Beginners',
+                  'Deep Dive: {t}', 'Building Better Apps with {t}', '{t} in Production',
+                  'My Journey with {t}']
+
+VOCABULARY = """
+the a of and to in is it that for on with as this was be are by at from or an not have but
+can we you they will your all more one about which their so if when what there would make
+like time just how some out other into could then than its only two also use new way first
+because any these most people work well should data code application server request page
+user build design performance query database index cache memory thread process function
+class module template route response browser layout style image upload search feature test
+deploy production container network security password session token api endpoint client
+simple fast small large better easy hard modern clean quick real useful common different
+learn write read start think find show help need want try keep run move change improve
+""".split()
+
+COMMENT_TEMPLATES = ['Great post!', 'Thanks for sharing this.', 'Very helpful, bookmarked.',
+                     'I had the same problem last week.', 'Could you write a follow-up?',
+                     'This cleared things up for me.', 'Interesting take on {t}.',
+                     'Not sure I agree about {t}, but well argued.']
+
+
+def _words(rng, weights, count):
+    return rng.choices(VOCABULARY, weights=weights, k=count)
+
+
+def _paragraphs(rng, weights, words):
+    body = _words(rng, weights, words)
+    paragraphs = []
+    for start in range(0, len(body), 80):
+        sentence = ' '.join(body[start:start + 80])
+        paragraphs.append(sentence[0].upper() + sentence[1:] + '.')
+    return '\n\n'.join(paragraphs)
+
+
+def _timestamp(dt):
+    return dt.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def generate_users(rng, count, password_hash, start):
+    for i in range(count):
+        name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+        joined = start + timedelta(minutes=i)
+        yield (name, f'user{i + 1}@example.com', password_hash, _timestamp(joined))
+
+
+def generate_posts(rng, weights, count, users, start, span_seconds):
+    step = span_seconds / max(count, 1)
+    for i in range(count):
+        topic = rng.choice(TOPICS)
+        title = rng.choice(TITLE_PATTERNS).format(t=topic, n=rng.randint(3, 15))
+        words = int(rng.lognormvariate(5.8, 0.6))  # median ~330 words, long tail
+        content = f'{topic}. ' + _paragraphs(rng, weights, max(40, min(words, 4000)))
+        created = start + timedelta(seconds=i * step + rng.random() * step)
+        likes = int(rng.paretovariate(1.5)) - 1
+        yield (title, content, rng.randint(1, users), _timestamp(created), _timestamp(created), likes)
+
+
+def generate_comments(rng, weights, count, posts, users, start, span_seconds):
+    # Popular posts attract most of the discussion
+    for _ in range(count):
+        blog_id = min(posts, int(rng.paretovariate(0.8))) if rng.random() < 0.3 else rng.randint(1, posts)
+        post_time = start + timedelta(seconds=span_seconds * blog_id / posts)
+        created = post_time + timedelta(seconds=rng.randint(60, 30 * 86400))
+        if rng.random() < 0.5:
+            text = rng.choice(COMMENT_TEMPLATES).format(t=rng.choice(TOPICS))
+        else:
+            text = ' '.join(_words(rng, weights, rng.randint(5, 60))).capitalize() + '.'
+        yield (blog_id, rng.randint(1, users), text, _timestamp(created))
+
+
+def insert_chunked(conn, sql, rows):
+    """executemany in fixed-size chunks inside the caller's single transaction"""
+    total = 0
+    while True:
+        chunk = list(itertools.islice(rows, CHUNK))
+        if not chunk:
+            return total
+        conn.executemany(sql, chunk)
+        total += len(chunk)
+
+
+def build(path, users, posts, comments, seed=42, years=2):
+    """Create a fresh database at ``path``; returns per-table timings"""
+    if os.path.exists(path):
+        os.remove(path)
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(VOCABULARY))]  # Zipf-like
+    start = datetime.now() - timedelta(days=365 * years)
+    span = 365 * years * 86400
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute('PRAGMA journal_mode = WAL')
+    migrations.migrate(conn)
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA cache_size = -200000')
+
+    # Index and count the whole corpus in one pass afterwards instead of row by row
+    conn.execute('DROP TRIGGER IF EXISTS blogs_fts_insert')
+    conn.execute('DROP TRIGGER IF EXISTS comments_count_insert')
+    conn.execute('DROP TRIGGER IF EXISTS trending_comment_event')
+
+    timings = {}
+    password_hash = generate_password_hash('password123')
+    for table, sql, rows in [
+        ('users', 'INSERT INTO users (name, email, password, created_at) VALUES (?, ?, ?, ?)',
+         generate_users(rng, users, password_hash, start - timedelta(days=30))),
+        ('blogs', 'INSERT INTO blogs (title, content, author_id, created_at, updated_at, likes) VALUES (?, ?, ?, ?, ?, ?)',
+         generate_posts(rng, weights, posts, users, start, span)),
+        ('comments', 'INSERT INTO comments (blog_id, user_id, content, created_at) VALUES (?, ?, ?, ?)',
+         generate_comments(rng, weights, comments, posts, users, start, span)),
+    ]:
+        started = time.perf_counter()
+        conn.execute('BEGIN')
+        count = insert_chunked(conn, sql, rows)
+        conn.execute('COMMIT')
+        timings[table] = (count, time.perf_counter() - started)
+        print(f"✅ {table}: {count} rows in {timings[table][1]:.1f}s")
+
+    started = time.perf_counter()
+    conn.execute('BEGIN')
+    for statement in search_index.FTS_SCHEMA:
+        conn.execute(statement)
+    search_index.rebuild(conn)
+    ensure_comment_schema(conn)
+    trending.ensure_schema(conn)
+    trending.rebuild(conn)
+    conn.execute('COMMIT')
+    timings['blogs_fts'] = (posts, time.perf_counter() - started)
+    print(f"✅ search index: {timings['blogs_fts'][1]:.1f}s")
+
+    started = time.perf_counter()
+    derived_fields.backfill(conn, batch_size=CHUNK)
+    timings['derived_fields'] = (posts, time.perf_counter() - started)
+    print(f"✅ derived fields: {timings['derived_fields'][1]:.1f}s")
+
+    if related.available():
+        started = time.perf_counter()
+        conn.execute('BEGIN')
+        related.rebuild(conn)
+        conn.execute('COMMIT')
+        timings['related_posts'] = (posts, time.perf_counter() - started)
+        print(f"✅ related posts: {timings['related_posts'][1]:.1f}s")
+
+    conn.execute('ANALYZE')
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.close()
+    return timings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic blog database')
+    parser.add_argument('database', help='output path (overwritten)')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--users', type=int)
+    parser.add_argument('--posts', type=int)
+    parser.add_argument('--comments', type=int)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    sizes = dict(SCALES[args.scale])
+    for key in sizes:
+        if getattr(args, key) is not None:
+            sizes[key] = getattr(args, key)
+    if sizes['users'] < 1 or sizes['posts'] < 1:
+        print("❌ Need at least one user and one post")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    build(args.database, sizes['users'], sizes['posts'], sizes['comments'], seed=args.seed)
+    size_mb = os.path.getsize(args.database) / 1024 / 1024
+    print(f"\n📊 {args.database}: {size_mb:.1f} MB in {time.perf_counter() - started:.1f}s")
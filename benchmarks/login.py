@@ -0,0 +1,165 @@
+"""
+Password hashing cost and its effect on page views.
+
+First times generate/check for the configured hash method, then measures
+homepage latency on its own and while a burst of logins runs alongside it,
+once with hashing inline and once on the process pool.
+
+Usage:
+    python -m benchmarks.login instance/bench.db
+    python -m benchmarks.login instance/bench.db --hash-workers 0,4 --login-threads 8
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from benchmarks.routes import git_revision, summarize
+
+
+def hash_cost(method, rounds):
+    """Mean milliseconds for one generate and one check with ``method``"""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        pwhash = generate_password_hash('password123', method)
+    generate_ms = (time.perf_counter() - started) / rounds * 1000
+    started = time.perf_counter()
+    for _ in range(rounds):
+        check_password_hash(pwhash, 'password123')
+    check_ms = (time.perf_counter() - started) / rounds * 1000
+    return {'method': method, 'generate_ms': round(generate_ms, 2), 'check_ms': round(check_ms, 2)}
+
+
+def login_emails(database, count):
+    conn = sqlite3.connect(database)
+    emails = [row[0] for row in conn.execute('SELECT email FROM users ORDER BY id LIMIT ?', (count,))]
+    conn.close()
+    return emails
+
+
+def page_views(app, requests):
+    client = app.test_client()
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        response = client.get('/')
+        response.get_data()
+        latencies.append(time.perf_counter() - t0)
+        errors += response.status_code >= 400
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def login_burst(app, emails, threads, stop):
+    """Log in repeatedly from ``threads`` clients until ``stop`` is set"""
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def worker(offset):
+        client = app.test_client()
+        i = offset
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            response = client.post('/login', data={'email': emails[i % len(emails)], 'password': 'password123'})
+            elapsed = time.perf_counter() - t0
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            i += threads
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    return workers, latencies, statuses
+
+
+def run_scenario(app, emails, workers, login_threads, requests):
+    import passwords
+    passwords.shutdown()
+    app.config['PASSWORD_HASH_WORKERS'] = workers
+    passwords.get_hasher(app).check(generate_password_hash('warmup'), 'warmup')  # start the pool
+
+    page_views(app, 20)
+    baseline = page_views(app, requests)
+
+    stop = threading.Event()
+    threads, latencies, statuses = login_burst(app, emails, login_threads, stop)
+    time.sleep(0.2)
+    started = time.perf_counter()
+    loaded = page_views(app, requests)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    logins = summarize(latencies, time.perf_counter() - started, sum(n for code, n in statuses.items() if code >= 500))
+    return {'hash_workers': workers, 'page_views': baseline, 'page_views_under_login_burst': loaded,
+            'logins': logins, 'login_statuses': {str(code): n for code, n in sorted(statuses.items())}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark password hashing and its effect on page views')
+    parser.add_argument('database', help='database to serve in-process (users must have password123)')
+    parser.add_argument('--method', default='pbkdf2:sha256:600000', help='hash method to time')
+    parser.add_argument('--rounds', type=int, default=5, help='generate/check repetitions for the cost figures')
+    parser.add_argument('--hash-workers', default=f'0,{min(4, os.cpu_count() or 1)}',
+                        help='comma-separated pool sizes to compare (0 = inline)')
+    parser.add_argument('--login-threads', type=int, default=8, help='concurrent login clients')
+    parser.add_argument('--requests', type=int, default=200, help='page views per measurement')
+    parser.add_argument('--output', help='JSON results path (default benchmarks/results/login_<timestamp>.json)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        print(f"❌ {args.database} not found - generate one with python -m benchmarks.corpus")
+        sys.exit(1)
+
+    cost = hash_cost(args.method, args.rounds)
+    print(f"🔑 {cost['method']}: generate {cost['generate_ms']} ms, check {cost['check_ms']} ms")
+
+    os.environ['DATABASE'] = args.database
+    from app import app
+    app.config['DATABASE'] = args.database
+    app.config['PAGE_CACHE_ENABLED'] = False  # measure rendering, not cache hits
+    app.config['PASSWORD_HASH_METHOD'] = args.method
+    emails = login_emails(args.database, 100)
+
+    scenarios = []
+    print(f"\n{'workers':>7} {'idle p50':>9} {'idle p95':>9} {'burst p50':>10} {'burst p95':>10} "
+          f"{'logins/s':>9} {'login p95':>10} {'503s':>6}")
+    for workers in (int(n) for n in args.hash_workers.split(',')):
+        result = run_scenario(app, emails, workers, args.login_threads, args.requests)
+        scenarios.append(result)
+        idle, busy, logins = result['page_views'], result['page_views_under_login_burst'], result['logins']
+        print(f"{workers:>7} {idle['p50_ms']:>9} {idle['p95_ms']:>9} {busy['p50_ms']:>10} {busy['p95_ms']:>10} "
+              f"{logins['throughput_rps']:>9} {logins['p95_ms']:>10} {result['login_statuses'].get('503', 0):>6}")
+
+    import passwords
+    passwords.shutdown()
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'login_threads': args.login_threads,
+        'hash_cost': cost,
+        'scenarios': scenarios,
+    }
+    output = args.output or os.path.join(
+        'benchmarks', 'results', 'login_' + datetime.now().strftime('%Y%m%d_%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
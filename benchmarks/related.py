@@ -0,0 +1,118 @@
+"""
+Related-posts rebuild time per phase, page lookup latency and the cost of
+an incremental refresh.
+
+The rebuild runs inside a transaction that is rolled back, so the
+database is left as it was; generate the 100k-post corpus with
+``python -m benchmarks.corpus instance/bench.db --scale large``.  The
+page lookup (an indexed read of related_posts) is compared with scoring
+the post on the fly from its stored vector, and the refresh timing is
+the read side of :func:`related.refresh` (vectorize, plan the lists).
+
+Usage:
+    python -m benchmarks.related instance/bench.db
+    python -m benchmarks.related instance/bench.db --max-postings 1000 --lookups 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+import related
+from benchmarks.routes import git_revision, percentile
+
+
+def latency(fn, blog_ids):
+    timings = []
+    for blog_id in blog_ids:
+        started = time.perf_counter()
+        fn(blog_id)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {'p50_ms': round(percentile(timings, 50) * 1000, 3),
+            'p99_ms': round(percentile(timings, 99) * 1000, 3),
+            'max_ms': round(timings[-1] * 1000, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark TF-IDF related posts')
+    parser.add_argument('database')
+    for name, default in related.DEFAULTS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    parser.add_argument('--lookups', type=int, default=1000)
+    parser.add_argument('--output', help='JSON results path (default benchmarks/results/related_<timestamp>.json)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        print(f"❌ {args.database} not found - generate one with python -m benchmarks.corpus")
+        sys.exit(1)
+    if not related.available():
+        print("❌ NumPy is not installed: pip install -r requirements.txt")
+        sys.exit(1)
+
+    settings = {name: getattr(args, name) for name in related.DEFAULTS}
+    conn = sqlite3.connect(args.database, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    posts = conn.execute('SELECT COUNT(*) FROM blogs').fetchone()[0]
+
+    print(f"🔗 Rebuilding related posts for {posts} posts")
+    conn.execute('BEGIN')
+    related.ensure_schema(conn)
+    started = time.perf_counter()
+    timings = related.rebuild(conn, **settings, verbose=True)
+    rebuild_seconds = time.perf_counter() - started
+    counts = {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+              for table in ('related_terms', 'related_postings', 'related_posts')}
+
+    rng = random.Random(1)
+    blog_ids = [row[0] for row in conn.execute('SELECT id FROM blogs')]
+    sample = [rng.choice(blog_ids) for _ in range(args.lookups)]
+
+    def on_the_fly(blog_id):
+        scores = related.candidate_scores(conn, related.stored_vector(conn, blog_id), blog_id,
+                                          settings['max_postings'])
+        return related.top_k(scores, settings['k'], settings['min_score'])
+
+    def refresh_plan(blog_id):
+        post = conn.execute('SELECT title, content FROM blogs WHERE id = ?', (blog_id,)).fetchone()
+        counts = related.term_counts(post['title'], post['content'], settings['title_weight'])
+        vector = related.vectorize(counts, related.load_vocabulary(conn, counts), settings['terms_per_post'])
+        return related.plan_lists(conn, blog_id, vector, settings)
+
+    results = {
+        'page_lookup': latency(lambda blog_id: related.related_to(conn, blog_id), sample),
+        'on_the_fly': latency(on_the_fly, sample[:max(1, args.lookups // 10)]),
+        'refresh_plan': latency(refresh_plan, sample[:max(1, args.lookups // 10)]),
+    }
+    conn.execute('ROLLBACK')
+    conn.close()
+
+    print(f"\n{'method':<13} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for method, r in results.items():
+        print(f"{method:<13} {r['p50_ms']:>9} {r['p99_ms']:>9} {r['max_ms']:>9}")
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'posts': posts,
+        'settings': settings,
+        'rebuild': {'seconds': round(rebuild_seconds, 2),
+                    'phases': {phase: round(seconds, 2) for phase, seconds in timings.items()},
+                    **counts},
+        'latency': results,
+    }
+    output = args.output or os.path.join(
+        'benchmarks', 'results', 'related_' + datetime.now().strftime('%Y%m%d_%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
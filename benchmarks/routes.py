@@ -0,0 +1,266 @@
+"""
+Per-route latency benchmark.
+
+Runs the read routes either in-process through the Flask test client or
+against a running server, and reports throughput and p50/p95/p99 latency.
+Results are written as JSON so runs can be compared.
+
+Usage:
+    python -m benchmarks.routes instance/bench.db
+    python -m benchmarks.routes instance/bench.db --url http://127.0.0.1:5000 --concurrency 8
+    python -m benchmarks.routes instance/bench.db --compare benchmarks/results/old.json
+"""
+
+import argparse
+import http.cookiejar
+import json
+import os
+import platform
+import random
+import re
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+
+SEARCH_TERMS = ['flask', 'python guide', 'database', 'performance tips', 'docker', 'css grid',
+                'security', 'travel', 'react', 'testing']
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies, elapsed, errors):
+    values = sorted(latencies)
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'throughput_rps': round(len(values) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p95_ms': round(percentile(values, 95) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+def sample_targets(database, rng, count):
+    """Pick realistic URLs for every route from the database itself"""
+    conn = sqlite3.connect(database)
+    max_blog = conn.execute('SELECT MAX(id) FROM blogs').fetchone()[0] or 1
+    author = conn.execute("""
+        SELECT author_id, COUNT(*) AS n FROM blogs GROUP BY author_id ORDER BY n DESC LIMIT 1
+    """).fetchone()
+    user = conn.execute('SELECT id, name, email FROM users WHERE id = ?', (author[0],)).fetchone()
+    conn.close()
+    return {
+        'index': ['/'] * count,
+        'index_deep': None,  # filled in once the first page has been fetched
+        'search': [f'/search?q={urllib.parse.quote(rng.choice(SEARCH_TERMS))}' for _ in range(count)],
+        'view_blog': [f'/blog/{rng.randint(1, max_blog)}' for _ in range(count)],
+        'my_blogs': ['/my_blogs'] * count,
+    }, user
+
+
+def follow_pages(fetch, url, pages):
+    """Walk ``pages`` older-links from ``url``; returns the last URL reached"""
+    for _ in range(pages):
+        html = fetch(url)
+        match = re.search(r'href="([^"]+)"[^>]*rel="next"', html)
+        if not match:
+            break
+        url = match.group(1).replace('&amp;', '&')
+    return url
+
+
+class TestClientRunner:
+    """In-process requests through Flask's test client (no network)"""
+
+    def __init__(self, database, user, page_cache):
+        os.environ['DATABASE'] = database
+        from app import app
+        app.config['DATABASE'] = database
+        app.config['PAGE_CACHE_ENABLED'] = page_cache
+        self.app = app
+        self.anon = app.test_client()
+        self.user = app.test_client()
+        with self.user.session_transaction() as sess:
+            sess['user_id'] = user[0]
+            sess['user_name'] = user[1]
+
+    def fetch(self, url):
+        return self.anon.get(url).get_data(as_text=True)
+
+    def run(self, route, urls, concurrency):
+        client = self.user if route == 'my_blogs' else self.anon
+        latencies = []
+        errors = 0
+        started = time.perf_counter()
+        for url in urls:
+            t0 = time.perf_counter()
+            response = client.get(url)
+            response.get_data()
+            latencies.append(time.perf_counter() - t0)
+            if response.status_code >= 400:
+                errors += 1
+        return latencies, errors, time.perf_counter() - started
+
+
+class HttpRunner:
+    """Concurrent requests against a live server"""
+
+    def __init__(self, base_url, user):
+        self.base_url = base_url.rstrip('/')
+        self.user = user
+        self.jar = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.jar))
+        data = urllib.parse.urlencode({'email': user[2], 'password': 'password123'}).encode()
+        self.opener.open(self.base_url + '/login', data=data).read()
+
+    def fetch(self, url):
+        with urllib.request.urlopen(self.base_url + url) as response:
+            return response.read().decode('utf-8')
+
+    def run(self, route, urls, concurrency):
+        opener = self.opener if route == 'my_blogs' else urllib.request.build_opener()
+        latencies = []
+        errors = [0]
+        lock = threading.Lock()
+        queue = list(urls)
+
+        def worker():
+            while True:
+                with lock:
+                    if not queue:
+                        return
+                    url = queue.pop()
+                t0 = time.perf_counter()
+                try:
+                    with opener.open(self.base_url + url) as response:
+                        response.read()
+                    failed = False
+                except Exception:
+                    failed = True
+                elapsed = time.perf_counter() - t0
+                with lock:
+                    latencies.append(elapsed)
+                    errors[0] += failed
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, errors[0], time.perf_counter() - started
+
+
+def database_stats(database):
+    conn = sqlite3.connect(database)
+    stats = {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+             for table in ('users', 'blogs', 'comments')}
+    conn.close()
+    stats['size_mb'] = round(os.path.getsize(database) / 1024 / 1024, 1)
+    return stats
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\n📈 Compared with {baseline_path} ({baseline.get('git_revision')})")
+    print(f"{'route':<12} {'p50 ms':>16} {'p95 ms':>16} {'rps':>16}")
+    for route, result in current['routes'].items():
+        old = baseline['routes'].get(route)
+        if not old:
+            continue
+
+        def delta(key):
+            before, after = old[key], result[key]
+            change = (after - before) / before * 100 if before else 0.0
+            return f'{after:>8} ({change:+.0f}%)'
+        print(f"{route:<12} {delta('p50_ms'):>16} {delta('p95_ms'):>16} {delta('throughput_rps'):>16}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark blog routes')
+    parser.add_argument('database', help='database to read sample ids from (and to serve in-process)')
+    parser.add_argument('--url', help='benchmark a running server instead of the test client')
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--warmup', type=int, default=20, help='unmeasured requests per route')
+    parser.add_argument('--concurrency', type=int, default=4, help='client threads (--url only)')
+    parser.add_argument('--deep-page', type=int, default=20, help='how many pages deep index_deep starts')
+    parser.add_argument('--routes', help='comma-separated subset of routes')
+    parser.add_argument('--no-page-cache', action='store_true', help='disable the page cache (test client only)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='JSON results path (default benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='earlier results JSON to diff against')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        print(f"❌ {args.database} not found - generate one with python -m benchmarks.corpus")
+        sys.exit(1)
+
+    rng = random.Random(args.seed)
+    targets, user = sample_targets(args.database, rng, args.requests + args.warmup)
+    if args.url:
+        runner = HttpRunner(args.url, user)
+    else:
+        runner = TestClientRunner(args.database, user, page_cache=not args.no_page_cache)
+
+    deep = follow_pages(runner.fetch, '/', args.deep_page)
+    targets['index_deep'] = [deep] * (args.requests + args.warmup)
+    selected = args.routes.split(',') if args.routes else list(targets)
+
+    results = {}
+    print(f"{'route':<12} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for route in selected:
+        urls = targets[route]
+        runner.run(route, urls[:args.warmup], args.concurrency)
+        latencies, errors, elapsed = runner.run(route, urls[args.warmup:], args.concurrency)
+        result = results[route] = summarize(latencies, elapsed, errors)
+        print(f"{route:<12} {result['throughput_rps']:>9} {result['p50_ms']:>9} "
+              f"{result['p95_ms']:>9} {result['p99_ms']:>9} {result['errors']:>7}")
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'mode': 'http' if args.url else 'test_client',
+        'url': args.url,
+        'concurrency': args.concurrency if args.url else 1,
+        'page_cache': not args.no_page_cache if not args.url else None,
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'database': database_stats(args.database),
+        'routes': results,
+    }
+    output = args.output or os.path.join(
+        'benchmarks', 'results', datetime.now().strftime('%Y%m%d_%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
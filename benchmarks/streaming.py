@@ -0,0 +1,145 @@
+"""
+Time to first byte and peak memory for buffered vs. streamed listing pages.
+
+Each route is requested with streaming off and on (STREAM_ROUTES), through
+the test client by default or against a running server started twice with
+different STREAM_ROUTES.
+
+Usage:
+    python -m benchmarks.streaming instance/bench.db --per-page 200
+    python -m benchmarks.streaming instance/bench.db --url http://127.0.0.1:5000 --label streamed
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import urllib.parse
+from datetime import datetime
+
+from benchmarks.routes import git_revision, percentile, sample_targets
+
+
+ROUTES = ('index', 'search', 'my_blogs')
+
+
+def summarize_ttfb(ttfb, total, peaks):
+    ttfb, total = sorted(ttfb), sorted(total)
+    result = {
+        'requests': len(ttfb),
+        'ttfb_p50_ms': round(percentile(ttfb, 50) * 1000, 3),
+        'ttfb_p95_ms': round(percentile(ttfb, 95) * 1000, 3),
+        'total_p50_ms': round(percentile(total, 50) * 1000, 3),
+        'total_p95_ms': round(percentile(total, 95) * 1000, 3),
+    }
+    if peaks:
+        result['peak_kib_p50'] = round(percentile(sorted(peaks), 50) / 1024, 1)
+    return result
+
+
+def run_test_client(app, client, urls, stream, measure_memory):
+    app.config['STREAM_ROUTES'] = set(ROUTES) if stream else set()
+    ttfb, total, peaks = [], [], []
+    for url in urls:
+        if measure_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        response = client.get(url, buffered=False)
+        chunks = iter(response.response)
+        next(chunks, None)
+        first = time.perf_counter()
+        for _ in chunks:
+            pass
+        response.close()
+        finished = time.perf_counter()
+        if measure_memory:
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        ttfb.append(first - started)
+        total.append(finished - started)
+    return summarize_ttfb(ttfb, total, peaks)
+
+
+def run_http(base_url, urls, cookie):
+    parsed = urllib.parse.urlsplit(base_url)
+    ttfb, total = [], []
+    for url in urls:
+        conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80)
+        started = time.perf_counter()
+        conn.request('GET', url, headers={'Cookie': cookie} if cookie else {})
+        response = conn.getresponse()
+        response.read(1)
+        first = time.perf_counter()
+        response.read()
+        total.append(time.perf_counter() - started)
+        ttfb.append(first - started)
+        conn.close()
+    return summarize_ttfb(ttfb, total, [])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare TTFB of buffered and streamed listing pages')
+    parser.add_argument('database')
+    parser.add_argument('--url', help='measure a running server (start it with and without STREAM_ROUTES)')
+    parser.add_argument('--label', default='server', help='name for the --url run in the report')
+    parser.add_argument('--cookie', help='session cookie for my_blogs over --url')
+    parser.add_argument('--per-page', type=int, default=100, help='BLOGS_PER_PAGE for the test client')
+    parser.add_argument('--requests', type=int, default=50, help='requests per route and mode')
+    parser.add_argument('--memory', action='store_true', help='also record peak Python memory (slower)')
+    parser.add_argument('--output', help='JSON results path (default benchmarks/results/streaming_<timestamp>.json)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        print(f"❌ {args.database} not found - generate one with python -m benchmarks.corpus")
+        sys.exit(1)
+
+    targets, user = sample_targets(args.database, random.Random(1), args.requests)
+    results = {}
+    if args.url:
+        print(f"{'route':<10} {'ttfb p50':>9} {'ttfb p95':>9} {'total p50':>10}")
+        for route in ROUTES:
+            result = results[route] = {args.label: run_http(args.url, targets[route], args.cookie)}
+            r = result[args.label]
+            print(f"{route:<10} {r['ttfb_p50_ms']:>9} {r['ttfb_p95_ms']:>9} {r['total_p50_ms']:>10}")
+    else:
+        os.environ['DATABASE'] = args.database
+        from app import app
+        app.config['DATABASE'] = args.database
+        app.config['PAGE_CACHE_ENABLED'] = False
+        app.config['BLOGS_PER_PAGE'] = args.per_page
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = user[0]
+            sess['user_name'] = user[1]
+
+        print(f"{'route':<10} {'mode':<9} {'ttfb p50':>9} {'ttfb p95':>9} {'total p50':>10} {'peak KiB':>9}")
+        for route in ROUTES:
+            results[route] = {}
+            for mode in ('buffered', 'streamed'):
+                urls = targets[route]
+                run_test_client(app, client, urls[:5], mode == 'streamed', False)  # warm up
+                r = results[route][mode] = run_test_client(app, client, urls, mode == 'streamed', args.memory)
+                print(f"{route:<10} {mode:<9} {r['ttfb_p50_ms']:>9} {r['ttfb_p95_ms']:>9} "
+                      f"{r['total_p50_ms']:>10} {r.get('peak_kib_p50', '-'):>9}")
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'mode': 'http' if args.url else 'test_client',
+        'per_page': None if args.url else args.per_page,
+        'routes': results,
+    }
+    output = args.output or os.path.join(
+        'benchmarks', 'results', 'streaming_' + datetime.now().strftime('%Y%m%d_%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
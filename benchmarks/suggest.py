@@ -0,0 +1,106 @@
+"""
+Suggestion index build time, memory and lookup latency.
+
+Lookups are timed for random title and author-name prefixes (1-8
+characters) against the in-memory index and, for comparison, against a
+LIKE query over the same columns.
+
+Usage:
+    python -m benchmarks.suggest instance/bench.db
+    python -m benchmarks.suggest instance/bench.db --max-entries 50000 --lookups 20000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import suggest
+from benchmarks.routes import git_revision, percentile
+
+
+LIKE_SQL = """
+    SELECT 'post', id, title FROM blogs WHERE title LIKE ? || '%'
+    UNION ALL
+    SELECT 'author', id, name FROM users WHERE name LIKE ? || '%'
+    LIMIT ?
+"""
+
+
+def latency(fn, prefixes):
+    timings = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        fn(prefix)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {'p50_us': round(percentile(timings, 50) * 1e6, 1),
+            'p99_us': round(percentile(timings, 99) * 1e6, 1),
+            'max_us': round(timings[-1] * 1e6, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the /api/suggest prefix index')
+    parser.add_argument('database')
+    parser.add_argument('--max-entries', type=int, default=200000)
+    parser.add_argument('--words', type=int, default=6)
+    parser.add_argument('--lookups', type=int, default=5000)
+    parser.add_argument('--limit', type=int, default=8)
+    parser.add_argument('--output', help='JSON results path (default benchmarks/results/suggest_<timestamp>.json)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        print(f"❌ {args.database} not found - generate one with python -m benchmarks.corpus")
+        sys.exit(1)
+
+    conn = sqlite3.connect(args.database)
+    index = suggest.PrefixIndex(max_entries=args.max_entries, max_words=args.words)
+    tracemalloc.start()
+    started = time.perf_counter()
+    suggest.build(conn, index)
+    build_seconds = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    stats = index.stats()
+    print(f"🔤 {stats['entries']} entries ({stats['posts']} posts, {stats['authors']} authors) "
+          f"built in {build_seconds * 1000:.0f} ms, {memory / 1024 / 1024:.1f} MiB")
+
+    rng = random.Random(1)
+    labels = [row[0] for row in conn.execute('SELECT title FROM blogs UNION ALL SELECT name FROM users')]
+    prefixes = []
+    for _ in range(args.lookups):
+        words = rng.choice(labels).split()
+        start = rng.randrange(min(len(words), args.words))
+        prefixes.append(' '.join(words[start:])[:rng.randint(1, 8)])
+
+    results = {
+        'index': latency(lambda p: index.lookup(p, args.limit), prefixes),
+        'like_query': latency(lambda p: conn.execute(LIKE_SQL, (p, p, args.limit)).fetchall(),
+                              prefixes[:max(1, args.lookups // 10)]),
+    }
+    print(f"{'method':<12} {'p50 µs':>9} {'p99 µs':>9} {'max µs':>9}")
+    for method, r in results.items():
+        print(f"{method:<12} {r['p50_us']:>9} {r['p99_us']:>9} {r['max_us']:>9}")
+    conn.close()
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'index': dict(stats, build_seconds=round(build_seconds, 3), traced_bytes=memory),
+        'lookups': results,
+    }
+    output = args.output or os.path.join(
+        'benchmarks', 'results', 'suggest_' + datetime.now().strftime('%Y%m%d_%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
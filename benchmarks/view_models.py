@@ -0,0 +1,130 @@
+"""
+Card rendering: sqlite3.Row plus per-row date filters vs. view models.
+
+Fetches a page of blog cards and renders the card markup both ways: the old
+path hands Row objects to the template, which parses created_at and slices
+the excerpt on every render; the new path maps rows into BlogCard once.
+
+Usage:
+    python -m benchmarks.view_models instance/bench.db --cards 50
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+from jinja2 import Environment
+
+from benchmarks.routes import git_revision, summarize
+from view_models import BlogCard, format_day, timestamp
+
+
+ROW_TEMPLATE = """{% for blog in blogs %}<article><h3>{{ blog.title }}</h3>
+<span>{{ blog.author_name }}</span><span>{{ blog.created_at|format_date_short }}</span>
+<p>{{ blog.excerpt[:150] }}{% if blog.excerpt|length > 150 %}...{% endif %}</p>
+<span>{{ blog.likes }}</span></article>{% endfor %}"""
+
+VIEW_MODEL_TEMPLATE = """{% for blog in blogs %}<article><h3>{{ blog.title }}</h3>
+<span>{{ blog.author_name }}</span><span>{{ blog.created.short }}</span>
+<p>{{ blog.summary }}</p>
+<span>{{ blog.likes }}</span></article>{% endfor %}"""
+
+
+def legacy_format_date_short(date_str):
+    """The filter as it was before view models"""
+    try:
+        if isinstance(date_str, str):
+            dt = datetime.fromisoformat(date_str.replace('Z', ''))
+        else:
+            dt = date_str
+        return dt.strftime('%b %d, %Y')
+    except Exception:
+        return str(date_str)
+
+
+def fetch_rows(database, cards):
+    conn = sqlite3.connect(database)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute("""
+        SELECT b.id, b.title, b.image_path, b.author_id, b.created_at, b.likes,
+               b.image_card, b.image_full, b.image_webp_card, b.image_webp_full, b.image_placeholder,
+               substr(b.content, 1, 151) AS excerpt, u.name AS author_name
+        FROM blogs b JOIN users u ON b.author_id = u.id
+        ORDER BY b.created_at DESC, b.id DESC LIMIT ?
+    """, (cards,)).fetchall()
+    conn.close()
+    return rows
+
+
+def measure(fn, iterations):
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - started, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark card rendering with and without view models')
+    parser.add_argument('database')
+    parser.add_argument('--cards', type=int, default=50, help='cards per rendered page')
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--output', help='JSON results path (default benchmarks/results/view_models_<timestamp>.json)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        print(f"❌ {args.database} not found - generate one with python -m benchmarks.corpus")
+        sys.exit(1)
+
+    rows = fetch_rows(args.database, args.cards)
+    env = Environment(autoescape=True)
+    env.filters['format_date_short'] = legacy_format_date_short
+    row_template = env.from_string(ROW_TEMPLATE)
+    view_template = env.from_string(VIEW_MODEL_TEMPLATE)
+
+    def cold_caches():
+        timestamp.cache_clear()
+        format_day.cache_clear()
+
+    cases = {
+        'row_render': lambda: row_template.render(blogs=rows),
+        'view_model_map': lambda: (cold_caches(), [BlogCard(row) for row in rows]),
+        'view_model_map_render': lambda: view_template.render(blogs=[BlogCard(row) for row in rows]),
+    }
+    cards = [BlogCard(row) for row in rows]
+    cases['view_model_render_only'] = lambda: view_template.render(blogs=cards)
+
+    if row_template.render(blogs=rows) != view_template.render(blogs=cards):
+        print("❌ The two templates render different markup")
+        sys.exit(1)
+
+    results = {}
+    print(f"{'case':<24} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, fn in cases.items():
+        measure(fn, min(100, args.iterations))  # warm up
+        result = results[name] = measure(fn, args.iterations)
+        print(f"{name:<24} {result['mean_ms']:>9} {result['p50_ms']:>9} {result['p95_ms']:>9}")
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'cards': len(rows),
+        'iterations': args.iterations,
+        'cases': results,
+    }
+    output = args.output or os.path.join(
+        'benchmarks', 'results', 'view_models_' + datetime.now().strftime('%Y%m%d_%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Concurrent write throughput with and without the group-commit writer.
+
+Threads post comments through the test client, once committing on each
+request's own connection (WRITE_QUEUE_ENABLED=0) and once through the
+writer queue, and report latency, throughput, errors and batch sizes.
+Run it on a copy: every run adds comments.
+
+Usage:
+    python -m benchmarks.writes /tmp/bench-copy.db
+    python -m benchmarks.writes /tmp/bench-copy.db --threads 32 --writes 50 --synchronous FULL
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+from benchmarks.routes import git_revision, summarize
+
+
+def comment_burst(app, users, blog_ids, threads, writes):
+    """Post ``writes`` comments from each of ``threads`` clients"""
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def worker(n):
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'], sess['user_name'] = users[n % len(users)]
+        for i in range(writes):
+            blog_id = blog_ids[(n * writes + i) % len(blog_ids)]
+            t0 = time.perf_counter()
+            response = client.post(f'/blog/{blog_id}/comments', data={'content': f'benchmark {n}-{i}'},
+                                   headers={'X-Requested-With': 'XMLHttpRequest'})
+            elapsed = time.perf_counter() - t0
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    result = summarize(latencies, elapsed, sum(n for code, n in statuses.items() if code >= 500))
+    result['statuses'] = {str(code): n for code, n in sorted(statuses.items())}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark concurrent writes, inline vs. group commit')
+    parser.add_argument('database', help='database to write to (use a copy)')
+    parser.add_argument('--threads', type=int, default=16, help='concurrent writing clients')
+    parser.add_argument('--writes', type=int, default=25, help='comments per client')
+    parser.add_argument('--synchronous', default='NORMAL', help='SQLITE_SYNCHRONOUS for both runs')
+    parser.add_argument('--window-ms', type=float, default=2, help='WRITE_QUEUE_WINDOW_MS')
+    parser.add_argument('--output', help='JSON results path (default benchmarks/results/writes_<timestamp>.json)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        print(f"❌ {args.database} not found - generate one with python -m benchmarks.corpus")
+        sys.exit(1)
+
+    conn = sqlite3.connect(args.database)
+    users = conn.execute('SELECT id, name FROM users ORDER BY id LIMIT 100').fetchall()
+    blog_ids = [row[0] for row in conn.execute('SELECT id FROM blogs ORDER BY id DESC LIMIT 50')]
+    conn.close()
+
+    os.environ['DATABASE'] = args.database
+    os.environ['SQLITE_SYNCHRONOUS'] = args.synchronous
+    from app import app
+    import writer
+    app.config['PAGE_CACHE_ENABLED'] = False
+    app.config['SQLITE_POOL_SIZE'] = args.threads  # no pool waits in the inline run
+    app.config['WRITE_QUEUE_WINDOW_MS'] = args.window_ms
+
+    scenarios = []
+    print(f"{'mode':<12} {'writes/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'batch avg':>10}")
+    for mode in ('inline', 'group'):
+        app.config['WRITE_QUEUE_ENABLED'] = mode == 'group'
+        before = writer.get_writer(app).stats()
+        result = comment_burst(app, users, blog_ids, args.threads, args.writes)
+        after = writer.get_writer(app).stats()
+        batches = after['batches'] - before['batches']
+        result['mode'] = mode
+        result['batches'] = batches
+        result['mean_batch'] = round((after['jobs'] - before['jobs']) / batches, 2) if batches else None
+        scenarios.append(result)
+        print(f"{mode:<12} {result['throughput_rps']:>9} {result['p50_ms']:>8} {result['p95_ms']:>8} "
+              f"{result['p99_ms']:>8} {result['errors']:>7} {result['mean_batch'] or '-':>10}")
+    writer.shutdown()
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'threads': args.threads,
+        'synchronous': args.synchronous,
+        'window_ms': args.window_ms,
+        'scenarios': scenarios,
+    }
+    output = args.output or os.path.join(
+        'benchmarks', 'results', 'writes_' + datetime.now().strftime('%Y%m%d_%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Run every read route through the Flask test client, capture the SQL each one
+issues and fail if EXPLAIN QUERY PLAN shows a full table scan.
+
+Usage: python check_query_plans.py [database]
+"""
+
+import re
+import sqlite3
+import sys
+
+
+# Full scans are fine on tables that only ever hold a handful of rows
+SMALL_TABLES = {'sqlite_master', 'sqlite_schema'}
+
+FULL_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+
+
+def capture_route_queries(app, database):
+    """Map each route URL to the SELECT statements it executed"""
+    import db
+
+    app.config['DATABASE'] = database
+    app.config['TESTING'] = True
+    captured = []
+
+    @app.before_request
+    def trace_queries():
+        db.get_db().set_trace_callback(captured.append)
+
+    conn = sqlite3.connect(database)
+    conn.row_factory = sqlite3.Row
+    blog = conn.execute('SELECT id, author_id FROM blogs ORDER BY id LIMIT 1').fetchone()
+    user = conn.execute('SELECT id, name FROM users ORDER BY id LIMIT 1').fetchone()
+    conn.close()
+
+    client = app.test_client()
+    routes = {}
+
+    def run(label, method, url, **kwargs):
+        del captured[:]
+        getattr(client, method)(url, **kwargs)
+        routes[label] = [sql for sql in captured if sql.lstrip().upper().startswith('SELECT')]
+
+    run('index', 'get', '/')
+    first_page = client.get('/').data.decode('utf-8')
+    older = re.search(r'href="([^"]+)"[^>]*rel="next"', first_page)
+    if older:
+        run('index (older page)', 'get', older.group(1).replace('&amp;', '&'))
+    run('search', 'get', '/search?q=web')
+    run('trending', 'get', '/trending')
+    run('login', 'post', '/login', data={'email': 'nobody@example.com', 'password': 'x'})
+    if blog:
+        run('view_blog', 'get', f"/blog/{blog['id']}")
+        run('list_comments', 'get', f"/blog/{blog['id']}/comments")
+        run('author_blogs', 'get', f"/author/{blog['author_id']}")
+    if user:
+        with client.session_transaction() as sess:
+            sess['user_id'] = user['id']
+            sess['user_name'] = user['name']
+        run('my_blogs', 'get', '/my_blogs')
+        if blog and blog['author_id'] == user['id']:
+            run('edit_blog', 'get', f"/edit_blog/{blog['id']}")
+    return routes
+
+
+def full_scans(conn, sql):
+    """Tables that the plan for ``sql`` reads without any index"""
+    scans = []
+    for row in conn.execute('EXPLAIN QUERY PLAN ' + sql):
+        match = FULL_SCAN.match(row[3])
+        if match and match.group(1) not in SMALL_TABLES:
+            scans.append(row[3])
+    return scans
+
+
+def check(database):
+    from app import app
+
+    routes = capture_route_queries(app, database)
+    conn = sqlite3.connect(database)
+    failures = 0
+    for route, statements in routes.items():
+        route_failures = 0
+        for sql in statements:
+            scans = full_scans(conn, sql)
+            if scans:
+                route_failures += 1
+                print(f"❌ {route}: {', '.join(scans)}")
+                print('   ' + ' '.join(sql.split()))
+        if statements and not route_failures:
+            print(f"✅ {route}: {len(statements)} queries checked")
+        failures += route_failures
+    conn.close()
+    return failures
+
+
+if __name__ == '__main__':
+    database = sys.argv[1] if len(sys.argv) > 1 else 'instance/blog_database.db'
+    failures = check(database)
+    if failures:
+        print(f"\n❌ {failures} queries regressed to a full table scan")
+        sys.exit(1)
+    print("\n✅ No route query does a full table scan")
@@ -0,0 +1,73 @@
+from pagination import keyset_page
+from view_models import CommentView
+
+
+MAX_COMMENT_LENGTH = 2000
+
+# blogs.comment_count is kept in step by triggers so the post page never
+# counts rows; bulk loaders may drop comments_count_insert and recount.
+COMMENTS_SCHEMA = [
+    """
+    CREATE TRIGGER IF NOT EXISTS comments_count_insert
+    AFTER INSERT ON comments BEGIN
+        UPDATE blogs SET comment_count = comment_count + 1 WHERE id = new.blog_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comments_count_delete
+    AFTER DELETE ON comments BEGIN
+        UPDATE blogs SET comment_count = comment_count - 1 WHERE id = old.blog_id;
+    END
+    """,
+]
+
+
+def ensure_schema(conn):
+    for statement in COMMENTS_SCHEMA:
+        conn.execute(statement)
+    recount(conn)
+
+
+def recount(conn):
+    """Recompute every post's comment_count from the comments table"""
+    conn.execute("""
+        UPDATE blogs SET comment_count = (
+            SELECT COUNT(*) FROM comments WHERE comments.blog_id = blogs.id
+        )
+    """)
+
+
+def comment_page(conn, blog_id, after=None, per_page=20):
+    """Keyset page of a post's comments, newest first"""
+    return keyset_page(
+        conn,
+        """
+            SELECT c.id, c.blog_id, c.user_id, c.content, c.created_at, u.name AS commenter_name
+            FROM comments c
+            JOIN users u ON c.user_id = u.id
+        """,
+        'c.blog_id = ?', (blog_id,),
+        after=after, per_page=per_page,
+        sort_col='c.created_at', id_col='c.id',
+        factory=CommentView,
+    )
+
+
+def add_comment(conn, blog_id, user_id, content):
+    """Insert a comment and return it as a CommentView, or None if the post is gone
+
+    The caller commits.
+    """
+    cursor = conn.execute("""
+        INSERT INTO comments (blog_id, user_id, content)
+        SELECT id, ?, ? FROM blogs WHERE id = ?
+    """, (user_id, content, blog_id))
+    if cursor.rowcount == 0:
+        return None
+    row = conn.execute("""
+        SELECT c.id, c.blog_id, c.user_id, c.content, c.created_at, u.name AS commenter_name
+        FROM comments c
+        JOIN users u ON c.user_id = u.id
+        WHERE c.id = ?
+    """, (cursor.lastrowid,)).fetchone()
+    return CommentView(row)
@@ -0,0 +1,156 @@
+"""
+gzip/brotli compression of dynamic responses.
+
+An after_request hook compresses HTML, JSON and other text responses for
+clients that accept it, choosing brotli over gzip.  Bodies under
+COMPRESS_MIN_BYTES go out as they are, since the headers would eat the
+saving.  Streamed responses are compressed chunk by chunk with a sync
+flush after each one, so the page still reaches the browser in the
+same pieces.
+
+Cached pages do not come through here compressed on every hit: the
+page cache asks :func:`encode` once per entry and encoding, at a higher
+level than live responses can afford, and keeps those bytes (see
+PageCache.variant).
+"""
+
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+from flask import current_app, request
+
+import metrics
+
+
+COMPRESSIBLE = {'text/html', 'text/plain', 'text/css', 'text/javascript', 'application/javascript',
+                'application/json', 'application/xml', 'image/svg+xml'}
+
+# Cached variants are compressed once and served many times, so spend more
+CACHED_LEVELS = {'br': 9, 'gzip': 9}
+
+metrics.registry.describe('http_compression_input_bytes_total', 'Response bytes before compression by encoding')
+metrics.registry.describe('http_compression_output_bytes_total', 'Response bytes after compression by encoding')
+
+
+def available_encodings():
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def negotiate(size=None):
+    """Best encoding the client accepts for a body of ``size`` bytes, or None"""
+    config = current_app.config
+    if not config.get('COMPRESS_ENABLED', True):
+        return None
+    if size is not None and size < config.get('COMPRESS_MIN_BYTES', 1024):
+        return None
+    accepted = request.accept_encodings
+    for encoding in available_encodings():
+        if accepted[encoding]:
+            return encoding
+    return None
+
+
+def _level(encoding, cached):
+    if cached:
+        return CACHED_LEVELS[encoding]
+    if encoding == 'br':
+        return current_app.config.get('COMPRESS_BROTLI_QUALITY', 4)
+    return current_app.config.get('COMPRESS_GZIP_LEVEL', 6)
+
+
+def encode(data, encoding, cached=False):
+    """``data`` compressed with ``encoding``; mtime-free, so equal input gives equal bytes"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=_level(encoding, cached))
+    return gzip.compress(data, compresslevel=_level(encoding, cached), mtime=0)
+
+
+class _StreamCompressor:
+    """Incremental compressor whose every chunk can be decoded on arrival"""
+
+    def __init__(self, encoding, level):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._brotli = brotli.Compressor(quality=level)
+        else:
+            self._zlib = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        if self.encoding == 'br':
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def count(encoding, before, after):
+    metrics.registry.inc('http_compression_input_bytes_total', {'encoding': encoding}, before)
+    metrics.registry.inc('http_compression_output_bytes_total', {'encoding': encoding}, after)
+
+
+def _compress_stream(chunks, encoding, level):
+    compressor = _StreamCompressor(encoding, level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if not chunk:
+                continue
+            data = compressor.compress(chunk)
+            count(encoding, len(chunk), len(data))
+            yield data
+        data = compressor.finish()
+        count(encoding, 0, len(data))
+        yield data
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def mark(response, encoding):
+    """Headers for a body that is now ``encoding``-compressed"""
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+
+
+def compress_response(response):
+    """after_request hook compressing text responses the client can decode"""
+    if (response.status_code not in (200, 201) or response.direct_passthrough
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE):
+        return response
+    response.vary.add('Accept-Encoding')
+
+    if response.is_streamed:
+        encoding = negotiate()
+        if encoding is None:
+            return response
+        response.response = _compress_stream(response.response, encoding, _level(encoding, False))
+        response.headers.pop('Content-Length', None)
+        mark(response, encoding)
+        return response
+
+    data = response.get_data()
+    encoding = negotiate(len(data))
+    if encoding is None:
+        return response
+    compressed = encode(data, encoding)
+    count(encoding, len(data), len(compressed))
+    response.set_data(compressed)
+    mark(response, encoding)
+    return response
+
+
+def init_app(app):
+    app.config.setdefault('COMPRESS_ENABLED', True)
+    app.config.setdefault('COMPRESS_MIN_BYTES', 1024)
+    app.config.setdefault('COMPRESS_GZIP_LEVEL', 6)
+    app.config.setdefault('COMPRESS_BROTLI_QUALITY', 4)
+    app.after_request(compress_response)
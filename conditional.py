@@ -0,0 +1,223 @@
+"""
+Conditional GET: ETag and Last-Modified validators checked before rendering.
+
+A route decorated with :func:`validated` first asks a cheap, indexed
+query for the version of what it is about to render, hashes that into an
+ETag, and answers ``304 Not Modified`` when the client (or the reverse
+proxy in front of us) already holds that version.  Only on a mismatch
+does the page cache or the route itself run.
+
+Post pages are versioned from their own row (updated_at, likes, comment
+count, image variants), their newest comment and their related list.
+Listing pages share feed-level versions kept in ``page_versions`` by
+triggers: ``feed`` moves whenever anything a card shows changes, and
+``trending`` whenever the trending scores do.
+
+Listing pages also send Last-Modified, from the time their version last
+moved or the code was deployed, whichever is later.  Post pages send the
+ETag only: likes and related-list refreshes leave no timestamp to build
+a date from.
+
+ETags are weak: the same version renders to equivalent, not necessarily
+byte-identical, pages, and they stay valid for compressed responses.
+"""
+
+import hashlib
+import os
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, g, has_app_context, make_response, request, session
+
+# page_versions.updated_at is Unix seconds
+UNIX_NOW = "((julianday('now') - 2440587.5) * 86400.0)"
+
+BUMP = f"""
+    UPDATE page_versions SET version = version + 1, updated_at = {UNIX_NOW} WHERE name = '{{}}';
+"""
+
+# Columns of blogs that show up on a listing card
+CARD_COLUMNS = ('title', 'excerpt', 'image_path', 'image_card', 'image_webp_card', 'image_placeholder',
+                'likes', 'reading_minutes', 'author_id')
+
+VERSION_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS page_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0,
+        updated_at REAL NOT NULL
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS feed_blog_insert AFTER INSERT ON blogs BEGIN
+        {BUMP.format('feed')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS feed_blog_update AFTER UPDATE OF {', '.join(CARD_COLUMNS)} ON blogs BEGIN
+        {BUMP.format('feed')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS feed_blog_delete AFTER DELETE ON blogs BEGIN
+        {BUMP.format('feed')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS feed_user_update AFTER UPDATE OF name ON users BEGIN
+        {BUMP.format('feed')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trending_score_insert AFTER INSERT ON trending_scores BEGIN
+        {BUMP.format('trending')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trending_score_update AFTER UPDATE OF score ON trending_scores BEGIN
+        {BUMP.format('trending')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trending_score_delete AFTER DELETE ON trending_scores BEGIN
+        {BUMP.format('trending')}
+    END
+    """,
+]
+
+
+def ensure_schema(conn):
+    for statement in VERSION_SCHEMA:
+        conn.execute(statement)
+    for name in ('feed', 'trending'):
+        conn.execute(f'INSERT OR IGNORE INTO page_versions (name, updated_at) VALUES (?, {UNIX_NOW})', (name,))
+
+
+def page_versions(conn, *names):
+    """(token, last_modified) for the named feed versions, by primary key"""
+    placeholders = ', '.join('?' * len(names))
+    rows = conn.execute(f"""
+        SELECT name, version, updated_at FROM page_versions WHERE name IN ({placeholders}) ORDER BY name
+    """, names).fetchall()
+    if not rows:
+        return None
+    token = ','.join(f'{name}:{version}' for name, version, _ in rows)
+    deployed = current_app.config.get('CONDITIONAL_GET_DEPLOYED', 0) if has_app_context() else 0
+    return token, max(deployed, *(updated_at for _, _, updated_at in rows))
+
+
+def post_version(conn, blog_id):
+    """(token, None) for a post page, or None if there is no such post
+
+    No Last-Modified is given: likes, related-list refreshes and deploys
+    change the page without any timestamp moving, so a date alone would
+    validate stale copies.  Clients revalidate with the ETag instead.
+    """
+    row = conn.execute("""
+        SELECT COALESCE(b.updated_at, b.created_at) AS updated_at, b.likes, b.comment_count,
+               b.image_full, b.image_placeholder,
+               (SELECT MAX(c.created_at) FROM comments c WHERE c.blog_id = b.id) AS last_comment,
+               (SELECT group_concat(r.related_id || '@' || rb.updated_at)
+                FROM related_posts r JOIN blogs rb ON rb.id = r.related_id
+                WHERE r.blog_id = b.id) AS related
+        FROM blogs b
+        WHERE b.id = ?
+    """, (blog_id,)).fetchone()
+    if row is None:
+        return None
+    return '|'.join(str(value) for value in row), None
+
+
+def make_etag(token):
+    """Weak ETag for ``token`` as rendered for this URL, user and deploy"""
+    digest = hashlib.blake2b(digest_size=12)
+    for part in (current_app.config['CONDITIONAL_GET_VERSION'], request.full_path,
+                 str(session.get('user_id', '')), token):
+        digest.update(part.encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _http_date(seconds):
+    return datetime.fromtimestamp(int(seconds), timezone.utc)
+
+
+def is_fresh(etag, last_modified):
+    """True if the request's validators match; If-None-Match wins over a date"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since is not None and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def _set_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:  # werkzeug would turn None into the current time
+        response.last_modified = last_modified
+    # Stored by browsers and proxies, but always revalidated; per-user pages stay private
+    response.headers['Cache-Control'] = 'private, no-cache' if 'user_id' in session else 'no-cache'
+    response.vary.add('Cookie')
+
+
+def validated(version):
+    """Answer 304 when ``version(**kwargs)`` matches the client's validators
+
+    ``version`` returns (token, last_modified Unix seconds) from a cheap
+    query, or None to let the route handle the request unvalidated (a
+    missing post, say).  Pages with a flash message waiting are never
+    validated, like the page cache skips them.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if (not current_app.config.get('CONDITIONAL_GET_ENABLED', True)
+                    or request.method not in ('GET', 'HEAD') or '_flashes' in session):
+                return f(*args, **kwargs)
+
+            current = version(**kwargs)
+            if current is None:
+                return f(*args, **kwargs)
+            token, modified = current
+            g.page_version = token
+            etag = make_etag(token)
+            last_modified = _http_date(modified) if modified is not None else None
+            if is_fresh(etag, last_modified):
+                response = current_app.response_class(status=304)
+                _set_validators(response, etag, last_modified)
+                return response
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and '_flashes' not in session:
+                _set_validators(response, etag, last_modified)
+            return response
+        return decorated_function
+    return decorator
+
+
+def _build_paths(app):
+    """The code, templates and assets every page is rendered from"""
+    roots = [app.template_folder, os.path.join(app.static_folder, 'css'), os.path.join(app.static_folder, 'js')]
+    paths = sorted(os.path.join(app.root_path, name) for name in os.listdir(app.root_path) if name.endswith('.py'))
+    for root in roots:
+        root = os.path.join(app.root_path, root)
+        for folder, _, files in sorted(os.walk(root)):
+            paths.extend(os.path.join(folder, name) for name in sorted(files))
+    return paths
+
+
+def build_version(app):
+    """Digest of the templates and code that shape every page, so a deploy changes every ETag"""
+    digest = hashlib.blake2b(digest_size=8)
+    for path in _build_paths(app):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def init_app(app):
+    app.config.setdefault('CONDITIONAL_GET_ENABLED', True)
+    if not app.config.get('CONDITIONAL_GET_VERSION'):
+        app.config['CONDITIONAL_GET_VERSION'] = build_version(app)
+    # Floor for listing Last-Modified dates, so a deploy invalidates date-only validation too
+    app.config['CONDITIONAL_GET_DEPLOYED'] = max(os.path.getmtime(path) for path in _build_paths(app))
@@ -0,0 +1,189 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from flask import current_app, g
+
+
+DEFAULT_DATABASE = 'instance/blog_database.db'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection became free within the wait timeout"""
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections for one worker process"""
+
+    def __init__(self, database, size=8, timeout=10.0, synchronous='NORMAL',
+                 cache_size=-16000, mmap_size=134217728, busy_timeout=5000):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.synchronous = synchronous
+        self.cache_size = cache_size
+        self.mmap_size = mmap_size
+        self.busy_timeout = busy_timeout
+        self.pid = os.getpid()
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._high_water = 0
+
+    def _connect(self):
+        """Open a new connection and apply the tuning pragmas"""
+        conn = sqlite3.connect(self.database, timeout=self.busy_timeout / 1000,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute(f'PRAGMA synchronous = {self.synchronous}')
+        conn.execute(f'PRAGMA cache_size = {int(self.cache_size)}')
+        conn.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout)}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        return conn
+
+    def acquire(self):
+        """Check out a connection, opening one if the pool is not yet full"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                started = time.perf_counter()
+                with self._lock:
+                    self._waits += 1
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise PoolTimeout(f'No database connection free after {self.timeout}s')
+                finally:
+                    with self._lock:
+                        self._wait_time += time.perf_counter() - started
+
+        with self._lock:
+            self._checkouts += 1
+            self._in_use += 1
+            self._high_water = max(self._high_water, self._in_use)
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, discarding any open transaction"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+                self._in_use -= 1
+            return
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(conn)
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def stats(self):
+        """Snapshot of pool counters"""
+        with self._lock:
+            return {
+                'size': self.size,
+                'open': self._created,
+                'in_use': self._in_use,
+                'idle': self._idle.qsize(),
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_seconds': round(self._wait_time, 6),
+                'high_water': self._high_water,
+            }
+
+
+def get_pool(app=None):
+    """Return this process's pool, creating it on first use or after a fork"""
+    global _pool
+    app = app or current_app
+    pool = _pool
+    if pool is None or pool.pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                config = app.config
+                _pool = ConnectionPool(
+                    config.get('DATABASE', DEFAULT_DATABASE),
+                    size=config.get('SQLITE_POOL_SIZE', 8),
+                    timeout=config.get('SQLITE_POOL_TIMEOUT', 10.0),
+                    synchronous=config.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+                    cache_size=config.get('SQLITE_CACHE_SIZE', -16000),
+                    mmap_size=config.get('SQLITE_MMAP_SIZE', 134217728),
+                    busy_timeout=config.get('SQLITE_BUSY_TIMEOUT', 5000),
+                )
+            pool = _pool
+    return pool
+
+
+def connect(app=None):
+    """A standalone connection with the pool's pragmas, not counted in the pool"""
+    return get_pool(app)._connect()
+
+
+def get_db():
+    """Connection bound to the current request, checked out on first use"""
+    if 'db' not in g:
+        g.db = get_pool().acquire()
+    return g.db
+
+
+def release_db(exception=None):
+    """Teardown handler that hands the request's connection back to the pool"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        get_pool().release(conn)
+
+
+def pool_stats():
+    """Counters for the current process's pool"""
+    return get_pool().stats()
+
+
+def init_app(app):
+    """Register the pool defaults and teardown hook on the Flask app"""
+    app.config.setdefault('DATABASE', DEFAULT_DATABASE)
+    app.config.setdefault('SQLITE_POOL_SIZE', 8)
+    app.config.setdefault('SQLITE_POOL_TIMEOUT', 10.0)
+    app.config.setdefault('SQLITE_SYNCHRONOUS', 'NORMAL')
+    app.config.setdefault('SQLITE_CACHE_SIZE', -16000)
+    app.config.setdefault('SQLITE_MMAP_SIZE', 134217728)
+    app.config.setdefault('SQLITE_BUSY_TIMEOUT', 5000)
+    app.teardown_appcontext(release_db)
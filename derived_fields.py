@@ -0,0 +1,86 @@
+"""
+Write-time derived columns for blog posts.
+
+Listings only need a short excerpt and a few numbers, so they are computed
+when a post is written instead of reading ``content`` on every page view.
+
+Backfill rows written before these columns existed:
+    python derived_fields.py [database] [--batch 500] [--pause 0.05]
+"""
+
+import argparse
+import re
+import sqlite3
+import time
+
+from view_models import EXCERPT_LENGTH
+
+
+WORDS_PER_MINUTE = 200
+
+DERIVED_COLUMNS = ('excerpt', 'word_count', 'reading_minutes', 'content_length')
+
+_WORD = re.compile(r'\S+')
+
+
+def derive(content):
+    """Derived column values for ``content``, keyed by :data:`DERIVED_COLUMNS`"""
+    words = sum(1 for _ in _WORD.finditer(content))
+    return {
+        'excerpt': content[:EXCERPT_LENGTH],
+        'word_count': words,
+        'reading_minutes': max(1, round(words / WORDS_PER_MINUTE)),
+        'content_length': len(content),
+    }
+
+
+def backfill(conn, batch_size=500, pause=0.0, verbose=False):
+    """Fill the derived columns for rows that lack them, ``batch_size`` rows per transaction
+
+    Each batch is read outside any write transaction and written in one
+    short one keyed by id, so writers are only ever blocked for a batch.
+    Returns the number of rows updated.
+    """
+    assignments = ', '.join(f'{column} = ?' for column in DERIVED_COLUMNS)
+    last_id = 0
+    total = 0
+    while True:
+        rows = conn.execute("""
+            SELECT id, content FROM blogs
+            WHERE id > ? AND excerpt IS NULL
+            ORDER BY id LIMIT ?
+        """, (last_id, batch_size)).fetchall()
+        if not rows:
+            return total
+        updates = []
+        for blog_id, content in rows:
+            fields = derive(content)
+            updates.append([fields[c] for c in DERIVED_COLUMNS] + [blog_id])
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # excerpt IS NULL again: an edit may have filled the row since we read it
+            conn.executemany(f'UPDATE blogs SET {assignments} WHERE id = ? AND excerpt IS NULL', updates)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        last_id = rows[-1][0]
+        total += len(rows)
+        if verbose:
+            print(f"  … {total} rows (up to id {last_id})")
+        if pause:
+            time.sleep(pause)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backfill derived blog columns')
+    parser.add_argument('database', nargs='?', default='instance/blog_database.db')
+    parser.add_argument('--batch', type=int, default=500, help='rows per write transaction')
+    parser.add_argument('--pause', type=float, default=0.05, help='seconds to yield to other writers between batches')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.database, timeout=30)
+    started = time.perf_counter()
+    count = backfill(conn, args.batch, args.pause, verbose=True)
+    conn.close()
+    print(f"✅ Derived fields filled for {count} posts in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,177 @@
+import base64
+import io
+import os
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; uploads are then served as-is
+    Image = None
+
+import db
+import page_cache
+import writer
+
+
+CARD_WIDTH = 480
+FULL_WIDTH = 1280
+PLACEHOLDER_WIDTH = 24
+
+VARIANT_COLUMNS = ('image_card', 'image_full', 'image_webp_card', 'image_webp_full', 'image_placeholder')
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def available():
+    return Image is not None
+
+
+def _resized(image, width):
+    """Copy of ``image`` scaled down to ``width`` (never upscaled)"""
+    if image.width <= width:
+        return image.copy()
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def generate_variants(static_folder, image_path, quality=82):
+    """Write card/full JPEG and WebP variants plus an inline placeholder
+
+    ``image_path`` is relative to the static folder (``uploads/x.jpg``).
+    Returns a dict keyed by :data:`VARIANT_COLUMNS`, or None if the file is
+    not something worth re-encoding (missing, unreadable or animated).
+    """
+    source = os.path.join(static_folder, image_path)
+    try:
+        image = Image.open(source)
+        if getattr(image, 'n_frames', 1) > 1:
+            return None
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGB')
+    except (OSError, ValueError):
+        return None
+
+    directory, filename = os.path.split(image_path)
+    stem = os.path.splitext(filename)[0]
+    variant_dir = os.path.join(directory, 'variants')
+    os.makedirs(os.path.join(static_folder, variant_dir), exist_ok=True)
+
+    def save(img, width, fmt, ext):
+        relative = f'{variant_dir}/{stem}-{width}.{ext}'
+        target = os.path.join(static_folder, relative)
+        # Unique per thread: identical uploads can be encoded concurrently
+        tmp = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+        if fmt == 'JPEG':
+            img.save(tmp, fmt, quality=quality, optimize=True, progressive=True)
+        else:
+            img.save(tmp, fmt, quality=quality, method=4)
+        os.replace(tmp, target)
+        return relative
+
+    card = _resized(image, CARD_WIDTH)
+    full = _resized(image, FULL_WIDTH)
+    variants = {
+        'image_card': save(card, CARD_WIDTH, 'JPEG', 'jpg'),
+        'image_full': save(full, FULL_WIDTH, 'JPEG', 'jpg'),
+        'image_webp_card': save(card, CARD_WIDTH, 'WEBP', 'webp'),
+        'image_webp_full': save(full, FULL_WIDTH, 'WEBP', 'webp'),
+    }
+
+    tiny = _resized(image, PLACEHOLDER_WIDTH)
+    buffer = io.BytesIO()
+    tiny.save(buffer, 'JPEG', quality=40)
+    variants['image_placeholder'] = 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+    return variants
+
+
+def reuse_variants(conn, image_path):
+    """Variants already generated for ``image_path`` by another post, if any"""
+    columns = ', '.join(VARIANT_COLUMNS)
+    row = conn.execute(f"""
+        SELECT {columns} FROM blogs
+        WHERE image_path = ? AND image_card IS NOT NULL
+        LIMIT 1
+    """, (image_path,)).fetchone()
+    return dict(zip(VARIANT_COLUMNS, row)) if row else None
+
+
+def record_variants(conn, blog_id, image_path, variants):
+    """Write job: record variants, unless the post's image changed while we encoded"""
+    assignments = ', '.join(f'{column} = ?' for column in VARIANT_COLUMNS)
+    conn.execute(f'UPDATE blogs SET {assignments} WHERE id = ? AND image_path = ?',
+                 [variants[c] for c in VARIANT_COLUMNS] + [blog_id, image_path])
+
+
+def store_variants(conn, blog_id, image_path, variants):
+    """:func:`record_variants` in a transaction of its own"""
+    with conn:
+        record_variants(conn, blog_id, image_path, variants)
+
+
+def process_upload(app, blog_id, image_path):
+    """Worker task: encode the variants for one post and record them"""
+    try:
+        pool = db.get_pool(app)
+        conn = pool.acquire()
+        try:
+            # Uploads are content-addressed, so another post may already
+            # have variants for the very same file
+            variants = reuse_variants(conn, image_path)
+        finally:
+            pool.release(conn)
+        if variants is None:
+            variants = generate_variants(app.static_folder, image_path, app.config['IMAGE_QUALITY'])
+        if variants is None:
+            return
+        writer.run(app, record_variants, blog_id, image_path, variants)
+        page_cache.invalidate(f'blog:{blog_id}')
+    except Exception:
+        app.logger.exception('Generating image variants for blog %s failed', blog_id)
+
+
+def get_executor(app):
+    """This process's encoder pool, recreated after a fork"""
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=app.config.get('IMAGE_WORKERS', 2),
+                                               thread_name_prefix='image-worker')
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def schedule(app, blog_id, image_path):
+    """Queue variant generation without blocking the request"""
+    if image_path and available():
+        get_executor(app).submit(process_upload, app, blog_id, image_path)
+
+
+def init_app(app):
+    app.config.setdefault('IMAGE_WORKERS', 2)
+    app.config.setdefault('IMAGE_QUALITY', 82)
+
+
+if __name__ == '__main__':
+    # Backfill variants for posts uploaded before the pipeline existed
+    if not available():
+        print("❌ Pillow is not installed: pip install -r requirements.txt")
+        sys.exit(1)
+    database = sys.argv[1] if len(sys.argv) > 1 else 'instance/blog_database.db'
+    conn = sqlite3.connect(database)
+    rows = conn.execute(
+        'SELECT id, image_path FROM blogs WHERE image_path IS NOT NULL AND image_card IS NULL'
+    ).fetchall()
+    done = 0
+    for blog_id, image_path in rows:
+        variants = generate_variants('static', image_path)
+        if variants:
+            store_variants(conn, blog_id, image_path, variants)
+            done += 1
+    conn.close()
+    print(f"✅ Generated image variants for {done} of {len(rows)} posts")
@@ -3,50 +3,17 @@ import os
 from werkzeug.security import generate_password_hash
 from datetime import datetime
 
+import derived_fields
+import migrations
+
 def create_database():
     """Create and initialize the database with sample data"""
     os.makedirs('instance', exist_ok=True)
     conn = sqlite3.connect('instance/blog_database.db')
     cursor = conn.cursor()
 
-    # Create users table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-
-    # Create blogs table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS blogs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            content TEXT NOT NULL,
-            image_path TEXT,
-            author_id INTEGER NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            likes INTEGER DEFAULT 0,
-            FOREIGN KEY (author_id) REFERENCES users (id)
-        )
-    ''')
-
-    # Create comments table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS comments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,  
-            blog_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            content TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (blog_id) REFERENCES blogs (id),
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
+    # Create tables, indexes and the search index
+    migrations.migrate(conn)
 
     # Insert sample users (password: password123 for all)
     sample_users = [
@@ -89,6 +56,7 @@ def create_database():
         ''', blog)
 
     conn.commit()
+    derived_fields.backfill(conn)
     conn.close()
     print("✅ Database created and populated with sample data!")
     print("\n📋 Sample Login Credentials:")
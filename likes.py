@@ -0,0 +1,149 @@
+import atexit
+import os
+import threading
+
+import page_cache
+import writer
+
+
+def write_likes(conn, pending):
+    """Write job storing {blog_id: {user_id, ...}}; returns new likes per post"""
+    increments = {}
+    for blog_id, users in pending.items():
+        for user_id in users:
+            cursor = conn.execute("""
+                INSERT OR IGNORE INTO blog_likes (user_id, blog_id)
+                SELECT ?, id FROM blogs WHERE id = ?
+            """, (user_id, blog_id))
+            if cursor.rowcount > 0:
+                increments[blog_id] = increments.get(blog_id, 0) + 1
+    conn.executemany('UPDATE blogs SET likes = likes + ? WHERE id = ?',
+                     [(n, blog_id) for blog_id, n in increments.items()])
+    return increments
+
+
+class LikeBuffer:
+    """Collects (user, blog) likes in memory and writes them in batches
+
+    A like is accepted once per user and post: pairs already buffered or
+    already stored in ``blog_likes`` are rejected.  Accepted likes become
+    visible in the counts returned by :meth:`like` straight away and reach
+    the database when the buffer is flushed, either every ``interval``
+    seconds or as soon as ``max_pending`` likes are waiting.
+    """
+
+    def __init__(self, app, interval=1.0, max_pending=500):
+        self.app = app
+        self.interval = interval
+        self.max_pending = max_pending
+        self.pid = os.getpid()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self.flushes = 0
+        self.flushed = 0
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='like-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception('Flushing buffered likes failed')
+
+    def like(self, conn, user_id, blog_id):
+        """Record a like; returns (current count, whether this like was new)"""
+        row = conn.execute('SELECT likes FROM blogs WHERE id = ?', (blog_id,)).fetchone()
+        if row is None:
+            return 0, False
+        stored = row['likes'] or 0
+
+        already = conn.execute(
+            'SELECT 1 FROM blog_likes WHERE user_id = ? AND blog_id = ?', (user_id, blog_id)
+        ).fetchone()
+        with self._lock:
+            users = self._pending.setdefault(blog_id, set())
+            accepted = not already and user_id not in users
+            if accepted:
+                users.add(user_id)
+            count = stored + len(users)
+            if not users:
+                del self._pending[blog_id]
+            waiting = sum(len(u) for u in self._pending.values())
+
+        self._ensure_thread()
+        if waiting >= self.max_pending:
+            self._wake.set()
+        return count, accepted
+
+    def flush(self):
+        """Write every buffered like in one transaction; returns likes stored"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            try:
+                increments = writer.run(self.app, write_likes, pending)
+            except Exception:
+                # Put the batch back so the next flush retries it
+                with self._lock:
+                    for blog_id, users in pending.items():
+                        self._pending.setdefault(blog_id, set()).update(users)
+                raise
+
+            self.flushes += 1
+            self.flushed += sum(increments.values())
+            page_cache.invalidate(*(f'blog:{blog_id}' for blog_id in pending))
+            return sum(increments.values())
+
+    def shutdown(self):
+        """Stop the flusher thread and write out anything still buffered"""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        if self.pid == os.getpid():
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            pending = sum(len(u) for u in self._pending.values())
+        return {'pending': pending, 'flushes': self.flushes, 'flushed': self.flushed}
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer(app):
+    """This process's like buffer, recreated after a fork"""
+    global _buffer
+    if _buffer is None or _buffer.pid != os.getpid():
+        with _buffer_lock:
+            if _buffer is None or _buffer.pid != os.getpid():
+                _buffer = LikeBuffer(app,
+                                     interval=app.config.get('LIKES_FLUSH_INTERVAL', 1.0),
+                                     max_pending=app.config.get('LIKES_FLUSH_SIZE', 500))
+    return _buffer
+
+
+def shutdown():
+    if _buffer is not None:
+        _buffer.shutdown()
+
+
+def init_app(app):
+    app.config.setdefault('LIKES_FLUSH_INTERVAL', 1.0)
+    app.config.setdefault('LIKES_FLUSH_SIZE', 500)
+    atexit.register(shutdown)
@@ -0,0 +1,289 @@
+import bisect
+import cProfile
+import os
+import threading
+import time
+
+from flask import Response, current_app, g, request, template_rendered, before_render_template
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Labelled histograms and counters for this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._help = {}
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def render(self, gauges=()):
+        """Prometheus text exposition format"""
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f'# HELP {name} {self._help[name]}')
+                lines.append(f'# TYPE {name} {kind}')
+
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ''
+            return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+            snapshots = [(key, list(h.counts), h.sum, h.count, h.buckets) for key, h in histograms]
+
+        for (name, labels), counts, total, count, buckets in snapshots:
+            header(name, 'histogram')
+            cumulative = 0
+            for bound, n in zip(buckets, counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{fmt(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_bucket{fmt(labels, [("le", "+Inf")])} {count}')
+            lines.append(f'{name}_sum{fmt(labels)} {total:.6f}')
+            lines.append(f'{name}_count{fmt(labels)} {count}')
+        for (name, labels), value in counters:
+            header(name, 'counter')
+            lines.append(f'{name}{fmt(labels)} {value}')
+        for name, labels, value in gauges:
+            header(name, 'gauge')
+            lines.append(f'{name}{fmt(sorted(labels.items()))} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+registry.describe('http_request_duration_seconds', 'Wall time per request by endpoint')
+registry.describe('http_requests_total', 'Requests by endpoint and status')
+registry.describe('sql_duration_seconds', 'Time spent in SQLite per request by endpoint')
+registry.describe('sql_queries_per_request', 'Statements executed per request by endpoint')
+registry.describe('template_render_seconds', 'Jinja render time per request by endpoint')
+registry.describe('sql_slow_queries_total', 'Statements slower than SLOW_QUERY_MS')
+
+_gauge_sources = []
+
+
+def add_gauges(source):
+    """Register a callable returning [(name, labels, value), ...] for /metrics"""
+    _gauge_sources.append(source)
+
+
+def _record_query(sql, elapsed, counted=True):
+    if 'metrics_start' not in g:
+        return
+    g.sql_time += elapsed
+    if counted:
+        g.sql_count += 1
+
+
+def _check_slow(sql, elapsed):
+    threshold = current_app.config.get('SLOW_QUERY_MS', 100) / 1000
+    if elapsed >= threshold:
+        registry.inc('sql_slow_queries_total', {'endpoint': request.endpoint or 'none'})
+        current_app.logger.warning('Slow query (%.1f ms) on %s: %s', elapsed * 1000,
+                                   request.endpoint, ' '.join(sql.split()))
+
+
+class InstrumentedCursor:
+    """Cursor proxy that adds execute and fetch time to the request's SQL totals"""
+
+    def __init__(self, cursor, sql=None):
+        self._cursor = cursor
+        self._sql = sql
+        self._elapsed = 0.0
+        self._logged = False
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def _timed(self, method, *args, counted=False):
+        started = time.perf_counter()
+        result = method(*args)
+        elapsed = time.perf_counter() - started
+        self._elapsed += elapsed
+        _record_query(self._sql, elapsed, counted)
+        if not self._logged and self._sql and self._elapsed >= current_app.config.get('SLOW_QUERY_MS', 100) / 1000:
+            self._logged = True
+            _check_slow(self._sql, self._elapsed)
+        return result
+
+    def execute(self, sql, parameters=()):
+        self._sql, self._elapsed, self._logged = sql, 0.0, False
+        self._timed(self._cursor.execute, sql, parameters, counted=True)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._sql, self._elapsed, self._logged = sql, 0.0, False
+        self._timed(self._cursor.executemany, sql, seq_of_parameters, counted=True)
+        return self
+
+    def fetchone(self):
+        return self._timed(self._cursor.fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed(self._cursor.fetchmany, size or self._cursor.arraysize)
+
+    def fetchall(self):
+        return self._timed(self._cursor.fetchall)
+
+
+class InstrumentedConnection:
+    """Connection proxy whose statements are timed per request"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        started = time.perf_counter()
+        try:
+            return self._conn.__exit__(*exc)
+        finally:
+            _record_query('COMMIT', time.perf_counter() - started, counted=False)
+
+    def cursor(self):
+        return InstrumentedCursor(self._conn.cursor())
+
+    def execute(self, sql, parameters=()):
+        return InstrumentedCursor(self._conn.cursor()).execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return InstrumentedCursor(self._conn.cursor()).executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        started = time.perf_counter()
+        self._conn.commit()
+        _record_query('COMMIT', time.perf_counter() - started, counted=False)
+
+
+def instrument(conn):
+    """Wrap ``conn`` so its queries count towards this request's metrics"""
+    if not current_app.config.get('METRICS_ENABLED', True):
+        return conn
+    return InstrumentedConnection(conn)
+
+
+def _before_render(sender, template, context, **extra):
+    if 'metrics_start' in g:
+        g.render_started = time.perf_counter()
+
+
+def _after_render(sender, template, context, **extra):
+    started = g.pop('render_started', None) if 'metrics_start' in g else None
+    if started is not None:
+        g.template_time += time.perf_counter() - started
+
+
+def _start_request():
+    g.metrics_start = time.perf_counter()
+    g.sql_time = 0.0
+    g.sql_count = 0
+    g.template_time = 0.0
+    if (current_app.config.get('PROFILING_ENABLED')
+            and request.headers.get('X-Profile') and request.endpoint != 'metrics'):
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+def _finish_request(response):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        directory = current_app.config['PROFILE_DIR']
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{request.endpoint}-{time.strftime('%Y%m%d_%H%M%S')}-{os.getpid()}.prof")
+        profiler.dump_stats(path)
+        response.headers['X-Profile-Output'] = path
+
+    started = g.pop('metrics_start', None)
+    if started is None or request.endpoint == 'metrics':
+        return response
+    endpoint = request.endpoint or 'none'
+    labels = {'endpoint': endpoint}
+    registry.observe('http_request_duration_seconds', labels, time.perf_counter() - started)
+    registry.observe('sql_duration_seconds', labels, g.sql_time)
+    registry.observe('sql_queries_per_request', labels, g.sql_count, COUNT_BUCKETS)
+    registry.observe('template_render_seconds', labels, g.template_time)
+    registry.inc('http_requests_total', {'endpoint': endpoint, 'status': response.status_code})
+    response.headers['Server-Timing'] = (
+        f'app;dur={(time.perf_counter() - started) * 1000:.2f}, '
+        f'sql;dur={g.sql_time * 1000:.2f};desc="{g.sql_count} queries", '
+        f'tpl;dur={g.template_time * 1000:.2f}'
+    )
+    return response
+
+
+def metrics_view():
+    gauges = []
+    for source in _gauge_sources:
+        gauges.extend(source())
+    return Response(registry.render(gauges), mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app):
+    app.config.setdefault('METRICS_ENABLED', True)
+    app.config.setdefault('SLOW_QUERY_MS', 100)
+    app.config.setdefault('PROFILING_ENABLED', False)
+    app.config.setdefault('PROFILE_DIR', 'instance/profiles')
+    if not app.config['METRICS_ENABLED']:
+        return
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -0,0 +1,444 @@
+import sqlite3
+import sys
+
+import related
+import trending
+
+
+def create_base_tables(conn):
+    """Users, blogs and comments"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS blogs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            content TEXT NOT NULL,
+            image_path TEXT,
+            author_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            likes INTEGER DEFAULT 0,
+            FOREIGN KEY (author_id) REFERENCES users (id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS comments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            blog_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (blog_id) REFERENCES blogs (id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """)
+
+
+def create_search_index(conn):
+    """FTS5 index over blogs plus its sync triggers"""
+    existed = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'blogs_fts'"
+    ).fetchone()
+    for statement in (
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS blogs_fts USING fts5(
+            title, content, author_name,
+            tokenize = 'porter unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS blogs_fts_insert AFTER INSERT ON blogs BEGIN
+            INSERT INTO blogs_fts (rowid, title, content, author_name)
+            VALUES (new.id, new.title, new.content,
+                    (SELECT name FROM users WHERE id = new.author_id));
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS blogs_fts_update
+        AFTER UPDATE OF title, content, author_id ON blogs BEGIN
+            DELETE FROM blogs_fts WHERE rowid = old.id;
+            INSERT INTO blogs_fts (rowid, title, content, author_name)
+            VALUES (new.id, new.title, new.content,
+                    (SELECT name FROM users WHERE id = new.author_id));
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS blogs_fts_delete AFTER DELETE ON blogs BEGIN
+            DELETE FROM blogs_fts WHERE rowid = old.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS blogs_fts_author_rename
+        AFTER UPDATE OF name ON users BEGIN
+            UPDATE blogs_fts SET author_name = new.name
+            WHERE rowid IN (SELECT id FROM blogs WHERE author_id = new.id);
+        END
+        """,
+    ):
+        conn.execute(statement)
+    if not existed:
+        conn.execute("""
+            INSERT INTO blogs_fts (rowid, title, content, author_name)
+            SELECT b.id, b.title, b.content, u.name
+            FROM blogs b
+            JOIN users u ON b.author_id = u.id
+        """)
+        conn.execute("INSERT INTO blogs_fts (blogs_fts) VALUES ('optimize')")
+
+
+def create_listing_indexes(conn):
+    """Indexes behind the homepage, my_blogs and comment listings"""
+    # Homepage and search feed order: (created_at, id) newest first
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_blogs_created ON blogs (created_at, id)')
+    # my_blogs: one author's posts in feed order
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_blogs_author_created ON blogs (author_id, created_at, id)')
+    # view_blog: a post's comments in date order
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_comments_blog_created ON comments (blog_id, created_at, id)')
+
+
+def create_blog_likes(conn):
+    """One row per (user, blog) like so each user can like a post once"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS blog_likes (
+            user_id INTEGER NOT NULL,
+            blog_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, blog_id),
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (blog_id) REFERENCES blogs (id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_blog_likes_blog ON blog_likes (blog_id)')
+
+
+def add_image_variant_columns(conn):
+    """Paths of the resized/WebP variants and placeholder for a post image"""
+    for column in ('image_card', 'image_full', 'image_webp_card', 'image_webp_full', 'image_placeholder'):
+        conn.execute(f'ALTER TABLE blogs ADD COLUMN {column} TEXT')
+
+
+def create_uploads_table(conn):
+    """Content-addressed upload registry with trigger-maintained refcounts"""
+    for statement in (
+        """
+        CREATE TABLE IF NOT EXISTS uploads (
+            path TEXT PRIMARY KEY,
+            sha256 TEXT,
+            size INTEGER,
+            refcount INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        'CREATE INDEX IF NOT EXISTS idx_uploads_refcount ON uploads (refcount)',
+        'CREATE INDEX IF NOT EXISTS idx_blogs_image_path ON blogs (image_path)',
+        """
+        CREATE TRIGGER IF NOT EXISTS uploads_ref_insert
+        AFTER INSERT ON blogs WHEN new.image_path IS NOT NULL BEGIN
+            INSERT INTO uploads (path, refcount) VALUES (new.image_path, 1)
+            ON CONFLICT (path) DO UPDATE SET refcount = refcount + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS uploads_ref_update
+        AFTER UPDATE OF image_path ON blogs
+        WHEN old.image_path IS NOT new.image_path BEGIN
+            UPDATE uploads SET refcount = refcount - 1 WHERE path = old.image_path;
+            INSERT INTO uploads (path, refcount)
+            SELECT new.image_path, 1 WHERE new.image_path IS NOT NULL
+            ON CONFLICT (path) DO UPDATE SET refcount = refcount + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS uploads_ref_delete
+        AFTER DELETE ON blogs WHEN old.image_path IS NOT NULL BEGIN
+            UPDATE uploads SET refcount = refcount - 1 WHERE path = old.image_path;
+        END
+        """,
+    ):
+        conn.execute(statement)
+    conn.execute("""
+        INSERT INTO uploads (path, refcount)
+        SELECT image_path, COUNT(*) FROM blogs
+        WHERE image_path IS NOT NULL
+        GROUP BY image_path
+        ON CONFLICT (path) DO UPDATE SET refcount = excluded.refcount
+    """)
+
+
+def add_derived_columns(conn):
+    """Excerpt, word count, reading time and length computed when a post is written"""
+    conn.execute('ALTER TABLE blogs ADD COLUMN excerpt TEXT')
+    conn.execute('ALTER TABLE blogs ADD COLUMN word_count INTEGER')
+    conn.execute('ALTER TABLE blogs ADD COLUMN reading_minutes INTEGER')
+    conn.execute('ALTER TABLE blogs ADD COLUMN content_length INTEGER')
+
+
+def add_comment_counts(conn):
+    """Trigger-maintained comment count per post"""
+    conn.execute('ALTER TABLE blogs ADD COLUMN comment_count INTEGER NOT NULL DEFAULT 0')
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS comments_count_insert
+        AFTER INSERT ON comments BEGIN
+            UPDATE blogs SET comment_count = comment_count + 1 WHERE id = new.blog_id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS comments_count_delete
+        AFTER DELETE ON comments BEGIN
+            UPDATE blogs SET comment_count = comment_count - 1 WHERE id = old.blog_id;
+        END
+    """)
+    conn.execute("""
+        UPDATE blogs SET comment_count = (
+            SELECT COUNT(*) FROM comments WHERE comments.blog_id = blogs.id
+        )
+    """)
+
+
+def create_trending_tables(conn):
+    """Event log and decayed popularity scores behind /trending"""
+    for statement in (
+        """
+        CREATE TABLE IF NOT EXISTS trending_events (
+            id INTEGER PRIMARY KEY,
+            blog_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 1,
+            created_at REAL NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS trending_scores (
+            blog_id INTEGER PRIMARY KEY,
+            score REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+        """,
+        'CREATE INDEX IF NOT EXISTS idx_trending_score ON trending_scores (score, blog_id)',
+        """
+        CREATE TABLE IF NOT EXISTS trending_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            epoch REAL NOT NULL
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trending_like_event
+        AFTER INSERT ON blog_likes BEGIN
+            INSERT INTO trending_events (blog_id, kind, created_at)
+            VALUES (new.blog_id, 'like', (julianday(COALESCE(new.created_at, 'now')) - 2440587.5) * 86400.0);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trending_comment_event
+        AFTER INSERT ON comments BEGIN
+            INSERT INTO trending_events (blog_id, kind, created_at)
+            VALUES (new.blog_id, 'comment', (julianday(COALESCE(new.created_at, 'now')) - 2440587.5) * 86400.0);
+        END
+        """,
+        """
+        INSERT OR IGNORE INTO trending_state (id, epoch)
+        VALUES (1, (julianday('now') - 2440587.5) * 86400.0)
+        """,
+    ):
+        conn.execute(statement)
+
+
+def create_suggest_changes(conn):
+    """Change log that keeps each worker's suggestion index in sync"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS suggest_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,  -- ids are never reused after a prune
+            kind TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            created_at REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+        )
+    """)
+    for name, event, table, kind, row in (
+        ('suggest_blog_insert', 'INSERT', 'blogs', 'post', 'new'),
+        ('suggest_blog_update', 'UPDATE OF title', 'blogs', 'post', 'new'),
+        ('suggest_blog_delete', 'DELETE', 'blogs', 'post', 'old'),
+        ('suggest_user_insert', 'INSERT', 'users', 'author', 'new'),
+        ('suggest_user_update', 'UPDATE OF name', 'users', 'author', 'new'),
+        ('suggest_user_delete', 'DELETE', 'users', 'author', 'old'),
+    ):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} BEGIN
+                INSERT INTO suggest_changes (kind, item_id) VALUES ('{kind}', {row}.id);
+            END
+        """)
+
+
+def create_related_posts(conn):
+    """TF-IDF vectors and precomputed related-post lists"""
+    for statement in (
+        """
+        CREATE TABLE IF NOT EXISTS related_terms (
+            id INTEGER PRIMARY KEY,
+            term TEXT UNIQUE NOT NULL,
+            idf REAL NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS related_postings (
+            blog_id INTEGER NOT NULL,
+            term_id INTEGER NOT NULL,
+            weight REAL NOT NULL,
+            PRIMARY KEY (blog_id, term_id)
+        ) WITHOUT ROWID
+        """,
+        'CREATE INDEX IF NOT EXISTS idx_related_postings_term ON related_postings (term_id, weight)',
+        """
+        CREATE TABLE IF NOT EXISTS related_posts (
+            blog_id INTEGER NOT NULL,
+            rank INTEGER NOT NULL,
+            related_id INTEGER NOT NULL,
+            score REAL NOT NULL,
+            PRIMARY KEY (blog_id, rank)
+        ) WITHOUT ROWID
+        """,
+        'CREATE INDEX IF NOT EXISTS idx_related_posts_related ON related_posts (related_id)',
+    ):
+        conn.execute(statement)
+
+
+def create_page_versions(conn):
+    """Feed-level versions behind the listing pages' ETags"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS page_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL NOT NULL
+        )
+    """)
+    card_columns = ('title, excerpt, image_path, image_card, image_webp_card, image_placeholder, '
+                    'likes, reading_minutes, author_id')
+    for name, event, table, page in (
+        ('feed_blog_insert', 'INSERT', 'blogs', 'feed'),
+        ('feed_blog_update', f'UPDATE OF {card_columns}', 'blogs', 'feed'),
+        ('feed_blog_delete', 'DELETE', 'blogs', 'feed'),
+        ('feed_user_update', 'UPDATE OF name', 'users', 'feed'),
+        ('trending_score_insert', 'INSERT', 'trending_scores', 'trending'),
+        ('trending_score_update', 'UPDATE OF score', 'trending_scores', 'trending'),
+        ('trending_score_delete', 'DELETE', 'trending_scores', 'trending'),
+    ):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} BEGIN
+                UPDATE page_versions SET version = version + 1,
+                    updated_at = ((julianday('now') - 2440587.5) * 86400.0)
+                WHERE name = '{page}';
+            END
+        """)
+    for page in ('feed', 'trending'):
+        conn.execute("""
+            INSERT OR IGNORE INTO page_versions (name, updated_at)
+            VALUES (?, ((julianday('now') - 2440587.5) * 86400.0))
+        """, (page,))
+
+
+# Applied in order; a database at user_version N has run the first N entries.
+# Never edit or reorder a shipped migration - append a new one instead.  Each
+# one spells out its own SQL rather than calling into the feature modules, so
+# later changes there cannot alter what an old migration does.
+MIGRATIONS = [
+    create_base_tables,
+    create_search_index,
+    create_listing_indexes,
+    create_blog_likes,
+    add_image_variant_columns,
+    create_uploads_table,
+    add_derived_columns,
+    add_comment_counts,
+    create_trending_tables,
+    create_suggest_changes,
+    create_related_posts,
+    create_page_versions,
+]
+
+
+def rebuild_trending(conn):
+    """Trending scores from the likes and comments already stored"""
+    trending.rebuild(conn)
+
+
+def rebuild_related(conn):
+    """Related-post lists for every post"""
+    if related.available():
+        related.rebuild(conn)
+
+
+# Derived data a migration leaves empty, by the version that created its tables.
+# Unlike migrations these run today's code, since the data can always be rebuilt,
+# and never inside a migration's transaction (a related-posts rebuild takes
+# minutes on a large site): python migrations.py <db> --backfill fills them in.
+BACKFILLS = {
+    9: rebuild_trending,
+    11: rebuild_related,
+}
+
+
+def backfills_after(version):
+    """Backfills owed by a database migrated up from ``version``"""
+    return [fill for fill_version, fill in sorted(BACKFILLS.items()) if fill_version > version]
+
+
+def backfill(conn, fills, verbose=False):
+    """Run ``fills`` one transaction each, outside any migration"""
+    for fill in fills:
+        with conn:
+            fill(conn)
+        if verbose:
+            print(f"✅ Backfilled: {fill.__doc__}")
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn, verbose=False):
+    """Bring the schema up to date, one transaction per migration
+
+    Returns the number of migrations applied.  ANALYZE runs afterwards so the
+    planner has fresh statistics for any new indexes.
+    """
+    current = schema_version(conn)
+    pending = MIGRATIONS[current:]
+    if not pending:
+        return 0
+
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        for version, migration in enumerate(pending, start=current + 1):
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                migration(conn)
+                conn.execute(f'PRAGMA user_version = {version}')
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            if verbose:
+                print(f"✅ Migration {version}: {migration.__doc__}")
+        conn.execute('ANALYZE')
+    finally:
+        conn.isolation_level = isolation_level
+    return len(pending)
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if arg != '--backfill']
+    database = args[0] if args else 'instance/blog_database.db'
+    conn = sqlite3.connect(database)
+    before = schema_version(conn)
+    applied = migrate(conn, verbose=True)
+    print(f"📊 Schema at version {schema_version(conn)} ({applied} migrations applied)")
+    backfill(conn, backfills_after(0 if '--backfill' in sys.argv else before), verbose=True)
+    conn.close()
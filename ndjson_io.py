@@ -0,0 +1,352 @@
+"""
+Streaming NDJSON import/export for users, blogs and comments.
+
+One JSON object per line, tagged with its table:
+    {"type": "user", "id": 1, "name": "...", "email": "...", "password": "pbkdf2:...", ...}
+
+Password hashes are exported and imported as-is, so accounts keep working
+without anyone knowing their passwords. Files ending in .gz are
+(de)compressed on the fly. Memory use stays flat: rows are streamed through
+generators and written in fixed-size batches.
+
+Usage:
+    python ndjson_io.py export dump.ndjson.gz [--db instance/blog_database.db] [--tables users,blogs]
+    python ndjson_io.py import dump.ndjson.gz [--db ...] [--batch 1000]
+    python ndjson_io.py import dump.ndjson.gz --resume        # continue after an interruption
+
+Resuming seeks to the checkpointed byte offset; on a .gz input that means
+decompressing (not re-importing) everything before it again.
+"""
+
+import argparse
+import gzip
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import derived_fields
+import migrations
+
+
+FETCH_SIZE = 1000
+PROGRESS_SECONDS = 2.0
+
+# Record type -> (table, exported columns). Tables are exported in this order
+# so authors exist before their posts and posts before their comments.
+TABLES = {
+    'user': ('users', ('id', 'name', 'email', 'password', 'created_at')),
+    'blog': ('blogs', ('id', 'title', 'content', 'image_path', 'author_id', 'created_at', 'updated_at', 'likes')),
+    'comment': ('comments', ('id', 'blog_id', 'user_id', 'content', 'created_at')),
+}
+
+REQUIRED = {
+    'user': ('name', 'email', 'password'),
+    'blog': ('title', 'content', 'author_id'),
+    'comment': ('blog_id', 'user_id', 'content'),
+}
+
+# Prefixes werkzeug writes; anything else is not a hash we can verify logins against
+HASH_PREFIXES = ('pbkdf2:', 'scrypt:')
+
+
+class Progress:
+    """Rows/sec reporting on stderr, at most every PROGRESS_SECONDS"""
+
+    def __init__(self, label, start=0):
+        self.label = label
+        self.count = start
+        self.started = time.perf_counter()
+        self.reported = self.started
+        self.initial = start
+
+    def add(self, n):
+        self.count += n
+        now = time.perf_counter()
+        if now - self.reported >= PROGRESS_SECONDS:
+            self.reported = now
+            print(f"  … {self.label}: {self.count} rows ({self.rate():.0f} rows/s)", file=sys.stderr)
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return (self.count - self.initial) / elapsed if elapsed else 0.0
+
+
+def open_file(path, mode):
+    """Binary file handle; '-' is stdin/stdout, *.gz is gzip"""
+    if path == '-':
+        return sys.stdout.buffer if 'w' in mode else sys.stdin.buffer
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 'b', compresslevel=6)
+    return open(path, mode + 'b')
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+# -- export -------------------------------------------------------------------
+
+def iter_table(conn, record_type):
+    """Stream one table as dicts, FETCH_SIZE rows at a time"""
+    table, columns = TABLES[record_type]
+    cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            return
+        for row in rows:
+            record = {'type': record_type}
+            record.update(zip(columns, row))
+            yield record
+
+
+def export(conn, output, record_types):
+    """Write ``record_types`` to the binary stream ``output``; returns rows written"""
+    total = 0
+    for record_type in record_types:
+        progress = Progress(f'export {record_type}s')
+        for records in batched(iter_table(conn, record_type), FETCH_SIZE):
+            output.write(b''.join(json.dumps(r, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+                                  for r in records))
+            progress.add(len(records))
+        print(f"✅ {record_type}s: {progress.count} rows ({progress.rate():.0f} rows/s)", file=sys.stderr)
+        total += progress.count
+    return total
+
+
+# -- import -------------------------------------------------------------------
+
+def read_lines(stream, offset=0):
+    """Yield (offset after line, line) pairs starting at byte ``offset``
+
+    Offsets are in the uncompressed data, so seeking a gzip stream to one
+    decompresses the whole prefix again.
+    """
+    if offset:
+        stream.seek(offset)
+    position = offset
+    for line in stream:
+        position += len(line)
+        yield position, line
+
+
+def parse_records(lines, errors):
+    """Decode NDJSON lines, counting malformed ones into ``errors``"""
+    for position, line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            errors['malformed'] = errors.get('malformed', 0) + 1
+            continue
+        yield position, record
+
+
+def validate(records, errors):
+    """Drop records that cannot be inserted; passwords must already be hashes"""
+    for position, record in records:
+        record_type = record.get('type') if isinstance(record, dict) else None
+        if record_type not in TABLES:
+            errors['unknown_type'] = errors.get('unknown_type', 0) + 1
+            continue
+        if any(record.get(field) in (None, '') for field in REQUIRED[record_type]):
+            errors['missing_fields'] = errors.get('missing_fields', 0) + 1
+            continue
+        if record_type == 'user' and not str(record['password']).startswith(HASH_PREFIXES):
+            errors['unhashed_password'] = errors.get('unhashed_password', 0) + 1
+            continue
+        yield position, record
+
+
+# Columns whose table default should apply when a record leaves them out
+DEFAULTS = {'created_at': 'CURRENT_TIMESTAMP', 'updated_at': 'CURRENT_TIMESTAMP', 'likes': '0'}
+
+
+def insert_statement(record_type):
+    table, columns = TABLES[record_type]
+    if record_type == 'blog':
+        columns = columns + derived_fields.DERIVED_COLUMNS
+    placeholders = ', '.join(f'COALESCE(?, {DEFAULTS[c]})' if c in DEFAULTS else '?' for c in columns)
+    # Only an existing id means "already imported"; any other conflict is an error
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) ON CONFLICT (id) DO NOTHING",
+            columns)
+
+
+def row_values(record_type, record, columns):
+    if record_type == 'blog':
+        record = dict(record, **derived_fields.derive(record['content']))
+    return [record.get(column) for column in columns]
+
+
+def conflict_reason(error):
+    """errors key for a record a constraint rejected"""
+    message = str(error)
+    if message.startswith('UNIQUE constraint failed: '):
+        return 'duplicate_' + message.rsplit('.', 1)[1]
+    if 'FOREIGN KEY' in message:
+        return 'missing_parent'
+    return 'constraint_failed'
+
+
+def insert_group(conn, sql, rows, errors):
+    """Insert ``rows``; returns how many were new
+
+    Rows that break a constraint other than the id (a taken email, an
+    author that does not exist) are counted into ``errors`` one by one
+    instead of failing the whole batch.
+    """
+    conn.execute('SAVEPOINT import_group')
+    try:
+        inserted = conn.executemany(sql, rows).rowcount
+        conn.execute('RELEASE import_group')
+        return inserted
+    except sqlite3.IntegrityError:
+        conn.execute('ROLLBACK TO import_group')
+        conn.execute('RELEASE import_group')
+    inserted = 0
+    for row in rows:
+        try:
+            inserted += conn.execute(sql, row).rowcount
+        except sqlite3.IntegrityError as e:
+            reason = conflict_reason(e)
+            errors[reason] = errors.get(reason, 0) + 1
+    return inserted
+
+
+def load_checkpoint(path):
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {'offset': 0, 'inserted': 0, 'skipped': 0}
+
+
+def save_checkpoint(path, state):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def import_records(conn, stream, batch_size=1000, checkpoint=None, resume=False):
+    """Insert records from ``stream`` in one transaction per batch
+
+    After every committed batch the input offset is written to
+    ``checkpoint``, so an interrupted import can ``resume`` from the last
+    batch. Rows whose id already exists are skipped, which also makes
+    replaying a partially committed batch harmless; rows conflicting on
+    anything else, or pointing at a missing author, post or user, are
+    rejected and counted in the returned errors.
+    """
+    state = load_checkpoint(checkpoint) if resume else {'offset': 0, 'inserted': 0, 'skipped': 0}
+    errors = {}
+    statements = {record_type: insert_statement(record_type) for record_type in TABLES}
+    progress = Progress('import', start=state['inserted'] + state['skipped'])
+    pipeline = validate(parse_records(read_lines(stream, state['offset']), errors), errors)
+
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    foreign_keys = conn.execute('PRAGMA foreign_keys').fetchone()[0]
+    conn.execute('PRAGMA foreign_keys = ON')
+    try:
+        for batch in batched(pipeline, batch_size):
+            grouped = {}
+            for _, record in batch:
+                grouped.setdefault(record['type'], []).append(record)
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for record_type in TABLES:  # parents before children within a batch
+                    records = grouped.get(record_type)
+                    if not records:
+                        continue
+                    sql, columns = statements[record_type]
+                    # rowcount excludes trigger writes and ignored duplicates
+                    rejected = sum(errors.values())
+                    inserted = insert_group(conn, sql, [row_values(record_type, r, columns) for r in records],
+                                            errors)
+                    state['inserted'] += inserted
+                    state['skipped'] += len(records) - inserted - (sum(errors.values()) - rejected)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            state['offset'] = batch[-1][0]
+            if checkpoint:
+                save_checkpoint(checkpoint, state)
+            progress.add(len(batch))
+    finally:
+        conn.execute(f'PRAGMA foreign_keys = {foreign_keys}')
+        conn.isolation_level = isolation_level
+    return state, errors, progress.rate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stream blogs, users and comments as NDJSON')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    out = sub.add_parser('export', help='write tables to an NDJSON file')
+    out.add_argument('file', help="output path (.gz compresses, '-' for stdout)")
+    out.add_argument('--db', default='instance/blog_database.db')
+    out.add_argument('--tables', default='users,blogs,comments', help='comma-separated subset')
+
+    into = sub.add_parser('import', help='load an NDJSON file into the database')
+    into.add_argument('file', help="input path (.gz decompresses, '-' for stdin)")
+    into.add_argument('--db', default='instance/blog_database.db')
+    into.add_argument('--batch', type=int, default=1000, help='records per transaction')
+    into.add_argument('--checkpoint', help='progress file (default <file>.checkpoint)')
+    into.add_argument('--resume', action='store_true', help='continue from the checkpoint')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db, timeout=30)
+    conn.execute('PRAGMA busy_timeout = 30000')
+    started = time.perf_counter()
+
+    if args.command == 'export':
+        names = {table: record_type for record_type, (table, _) in TABLES.items()}
+        try:
+            record_types = [names[table] for table in args.tables.split(',')]
+        except KeyError as e:
+            print(f"❌ Unknown table {e}; choose from {', '.join(names)}")
+            sys.exit(1)
+        stream = open_file(args.file, 'w')
+        try:
+            total = export(conn, stream, record_types)
+        finally:
+            if stream is not sys.stdout.buffer:
+                stream.close()
+        elapsed = time.perf_counter() - started
+        print(f"📦 Exported {total} rows in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.0f} rows/s)",
+              file=sys.stderr)
+    else:
+        migrations.migrate(conn)
+        checkpoint = args.checkpoint or (None if args.file == '-' else args.file + '.checkpoint')
+        if args.resume and not (checkpoint and os.path.exists(checkpoint)):
+            print("❌ No checkpoint to resume from")
+            sys.exit(1)
+        stream = open_file(args.file, 'r')
+        try:
+            state, errors, rate = import_records(conn, stream, args.batch, checkpoint, args.resume)
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+        elapsed = time.perf_counter() - started
+        print(f"📥 Imported {state['inserted']} rows, skipped {state['skipped']} existing "
+              f"in {elapsed:.1f}s ({rate:.0f} rows/s)")
+        for reason, count in sorted(errors.items()):
+            print(f"⚠️  Rejected {count} records: {reason.replace('_', ' ')}")
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)  # finished; a rerun starts from the top
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, g, make_response, request, session
+
+import compression
+
+
+class _Entry:
+    __slots__ = ('body', 'tags', 'expires', 'variants')
+
+    def __init__(self, body, tags, expires):
+        self.body = body
+        self.tags = tags
+        self.expires = expires
+        self.variants = {}  # encoding -> compressed body
+
+    def size(self):
+        return len(self.body) + sum(len(data) for data in self.variants.values())
+
+
+class PageCache:
+    """Byte-bounded LRU of rendered pages with tag-based invalidation
+
+    Every entry carries a set of tags (``feed``, ``blog:<id>``...) so a write
+    can drop exactly the pages that rendered the data it changed.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl=300):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl and entry.expires < time.monotonic()):
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.body
+
+    def variant(self, key, encoding, encode):
+        """The entry's body as ``encode(body)``, computed on first use and kept with it
+
+        Returns None once the entry is gone.  Variants count towards
+        ``max_bytes`` and are dropped along with their entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            data = entry.variants.get(encoding)
+        if data is not None:
+            return data
+        data = encode(entry.body)
+        with self._lock:
+            if self._entries.get(key) is entry and encoding not in entry.variants:
+                entry.variants[encoding] = data
+                self._bytes += len(data)
+                self._evict()
+        return data
+
+    def set(self, key, body, tags=()):
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            expires = time.monotonic() + self.ttl if self.ttl else float('inf')
+            self._entries[key] = _Entry(body, frozenset(tags), expires)
+            self._bytes += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            self._evict()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of ``tags``; returns how many went"""
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tags.get(tag, set())
+            for key in keys:
+                self._drop(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size()
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+cache = PageCache()
+
+
+def tag(*tags):
+    """Attach invalidation tags to the page currently being rendered"""
+    if 'cache_tags' in g:
+        g.cache_tags.update(tags)
+
+
+def invalidate(*tags):
+    return cache.invalidate(*tags)
+
+
+def cached_page(f):
+    """Serve a GET route from the page cache, keyed by path, args and user
+
+    Pages are stored per logged-in user (or once for anonymous visitors) and
+    skipped entirely while a flash message is waiting to be shown.  Under
+    conditional.validated the page's version is part of the key too, so a
+    change made through another worker is never served from this one's cache.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_app.config.get('PAGE_CACHE_ENABLED', True) or '_flashes' in session:
+            return f(*args, **kwargs)
+
+        key = (request.endpoint,
+               tuple(sorted(kwargs.items())),
+               tuple(sorted(request.args.items(multi=True))),
+               session.get('user_id'),
+               g.get('page_version'))
+        body = cache.get(key)
+        if body is not None:
+            response = make_response(body)
+            response.headers['X-Cache'] = 'HIT'
+            return _use_compressed(response, key, body)
+
+        g.cache_tags = set()
+        response = make_response(f(*args, **kwargs))
+        response.headers['X-Cache'] = 'MISS'
+        if (response.status_code == 200 and not response.is_streamed
+                and '_flashes' not in session):
+            body = response.get_data()
+            cache.set(key, body, g.cache_tags)
+            _use_compressed(response, key, body)
+        return response
+    return decorated_function
+
+
+def _use_compressed(response, key, body):
+    """Swap in the entry's compressed bytes when the client accepts an encoding"""
+    encoding = compression.negotiate(len(body))
+    if encoding is not None:
+        data = cache.variant(key, encoding, lambda raw: compression.encode(raw, encoding, cached=True))
+        if data is not None:
+            response.set_data(data)
+            compression.mark(response, encoding)
+            compression.count(encoding, len(body), len(data))
+    return response
+
+
+def init_app(app):
+    app.config.setdefault('PAGE_CACHE_ENABLED', True)
+    app.config.setdefault('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+    app.config.setdefault('PAGE_CACHE_TTL', 300)
+    cache.max_bytes = app.config['PAGE_CACHE_MAX_BYTES']
+    cache.ttl = app.config['PAGE_CACHE_TTL']
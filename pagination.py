@@ -0,0 +1,195 @@
+import base64
+
+
+class Page:
+    """One slice of a keyset-paginated listing"""
+
+    __slots__ = ('items', 'next_cursor', 'prev_cursor')
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+class LazyPage:
+    """Forward keyset page whose rows are fetched while the template iterates them
+
+    Rows are read from the cursor one at a time and not kept, so the first
+    cards can be sent before the last are fetched and memory does not grow
+    with the page size.  ``items`` can be iterated once; ``next_cursor`` is
+    known when it is exhausted (templates render the pager after the list)
+    and reading it earlier drains the remaining rows.
+    """
+
+    def __init__(self, conn, sql, params, per_page, sort_key, after=None, factory=None):
+        self._conn = conn
+        self._query = (sql, params)
+        self._cursor = None
+        self._remaining = per_page
+        self._sort_key = sort_key
+        self._after = after
+        self._factory = factory
+        self._peeked = None
+        self._first = None
+        self._last = None
+        self._overflow = False
+        self._done = False
+        self.items = LazyItems(self)
+
+    def _fetch(self):
+        if self._peeked is not None:
+            row, self._peeked = self._peeked, None
+            return row
+        if self._done:
+            return None
+        if self._cursor is None:
+            # Executed on first read so the page header can be sent before the query runs
+            self._cursor = self._conn.execute(*self._query)
+        row = self._cursor.fetchone()
+        if row is not None and self._remaining == 0:
+            # The one extra row keyset_page asks for: there is an older page
+            self._overflow = True
+            row = None
+        if row is None:
+            self._done = True
+            self._cursor.close()
+            return None
+        self._remaining -= 1
+        position = (row[self._sort_key], row['id'])
+        if self._first is None:
+            self._first = position
+        self._last = position
+        return row
+
+    def _peek(self):
+        if self._peeked is None:
+            self._peeked = self._fetch()
+        return self._peeked
+
+    def _drain(self):
+        while self._fetch() is not None:
+            pass
+
+    @property
+    def next_cursor(self):
+        self._drain()
+        return encode_cursor(*self._last) if self._overflow else None
+
+    @property
+    def prev_cursor(self):
+        if self._after is None:
+            return None
+        self._peek()
+        return encode_cursor(*self._first) if self._first else None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+class LazyItems:
+    """Single-pass iterable over a LazyPage's rows; truthy if there is any"""
+
+    def __init__(self, page):
+        self._page = page
+
+    def __bool__(self):
+        return self._page._peek() is not None
+
+    def __iter__(self):
+        page = self._page
+        while True:
+            row = page._fetch()
+            if row is None:
+                return
+            yield page._factory(row) if page._factory else row
+
+
+def encode_cursor(value, row_id):
+    """Opaque URL-safe token for a (sort value, id) position"""
+    raw = f'{value}|{row_id}'.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, cast=str):
+    """Turn a token back into (sort value, id), or None if it is malformed"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        value, row_id = base64.urlsafe_b64decode(padded).decode('utf-8').rsplit('|', 1)
+        return cast(value), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(conn, select_sql, where='', params=(), after=None, before=None,
+                per_page=12, sort_col='b.created_at', id_col='b.id',
+                sort_key='created_at', descending=True, cast=str, factory=None, lazy=False):
+    """Fetch one page ordered on (sort_col, id_col), newest first by default
+
+    ``select_sql`` is everything up to (but excluding) the WHERE clause and
+    must select ``sort_key`` and ``id``.  ``after`` pages forward, ``before``
+    pages back towards the start of the listing.  ``factory``, if given,
+    maps each row to the object the page exposes (e.g. a view model).
+    With ``lazy`` a forward page is returned as a :class:`LazyPage` that
+    reads the cursor as it is rendered; backward pages are always eager
+    because their rows have to be reversed.
+    """
+    after = decode_cursor(after, cast)
+    before = decode_cursor(before, cast) if after is None else None
+
+    forward, backward = ('DESC', 'ASC') if descending else ('ASC', 'DESC')
+    conditions = [where] if where else []
+    params = list(params)
+    if after:
+        conditions.append(f'({sort_col}, {id_col}) {"<" if descending else ">"} (?, ?)')
+        params.extend(after)
+        order = forward
+    elif before:
+        conditions.append(f'({sort_col}, {id_col}) {">" if descending else "<"} (?, ?)')
+        params.extend(before)
+        order = backward
+    else:
+        order = forward
+
+    sql = select_sql
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(f'({c})' for c in conditions)
+    sql += f' ORDER BY {sort_col} {order}, {id_col} {order} LIMIT ?'
+    params.append(per_page + 1)
+
+    if lazy and not before:
+        return LazyPage(conn, sql, params, per_page, sort_key, after, factory)
+
+    rows = conn.execute(sql, params).fetchall()
+    overflow = len(rows) > per_page
+    rows = rows[:per_page]
+    if before:
+        rows.reverse()
+
+    if not rows:
+        return Page(rows)
+
+    first = encode_cursor(rows[0][sort_key], rows[0]['id'])
+    last = encode_cursor(rows[-1][sort_key], rows[-1]['id'])
+    if factory is not None:
+        rows = [factory(row) for row in rows]
+    if before:
+        return Page(rows, next_cursor=last, prev_cursor=first if overflow else None)
+    return Page(rows,
+                next_cursor=last if overflow else None,
+                prev_cursor=first if after else None)
@@ -0,0 +1,153 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool already has its maximum queue depth"""
+
+
+class PasswordHasher:
+    """Runs PBKDF2 hashing on a small process pool with a bounded backlog
+
+    Request threads only wait on a future, so CPU-heavy logins cannot starve
+    page views of worker time.  Once ``max_queue`` hash operations are in
+    flight further calls raise :class:`HashingBusy` instead of queueing.
+    With ``workers=0`` hashing runs inline (useful on one-core hosts).
+    """
+
+    def __init__(self, workers=2, max_queue=32, timeout=10.0,
+                 method='pbkdf2:sha256:600000', salt_length=16):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.method = method
+        self.salt_length = salt_length
+        self._full_method = None
+        self.pid = os.getpid()
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.rejected = 0
+        self.completed = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # forkserver children do not inherit the request threads' locks
+                    methods = multiprocessing.get_all_start_methods()
+                    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else None)
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self._executor
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            result = fn(*args)
+            self._completed()
+            return result
+        with self._lock:
+            if self._in_flight >= self.max_queue:
+                self.rejected += 1
+                raise HashingBusy(f'{self._in_flight} password hashes already queued')
+            self._in_flight += 1
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._finished(None)
+            raise
+        # A timed-out hash keeps its worker busy, so it stays in flight until it really ends
+        future.add_done_callback(self._finished)
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise HashingBusy(f'Password hashing took longer than {self.timeout}s')
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool for the next caller
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            raise HashingBusy('Password hashing pool restarted')
+        self._completed()
+        return result
+
+    def _finished(self, future):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _completed(self):
+        with self._lock:
+            self.completed += 1
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def check(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def full_method(self):
+        """``method`` as werkzeug writes it into hashes (scrypt -> scrypt:32768:8:1)"""
+        if self._full_method is None:
+            self._full_method = self._run(generate_password_hash, '', self.method, 1).split('$', 1)[0]
+        return self._full_method
+
+    def needs_rehash(self, pwhash):
+        """True if ``pwhash`` was made with other parameters than configured"""
+        method, _, rest = pwhash.partition('$')
+        salt = rest.partition('$')[0]
+        try:
+            return method != self.full_method() or len(salt) != self.salt_length
+        except HashingBusy:
+            return False  # checked again on a later login
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self):
+        with self._lock:
+            return {'workers': self.workers, 'in_flight': self._in_flight, 'max_queue': self.max_queue,
+                    'completed': self.completed, 'rejected': self.rejected}
+
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+
+def get_hasher(app):
+    """This process's hasher, recreated after a fork"""
+    global _hasher
+    if _hasher is None or _hasher.pid != os.getpid():
+        with _hasher_lock:
+            if _hasher is None or _hasher.pid != os.getpid():
+                config = app.config
+                _hasher = PasswordHasher(workers=config.get('PASSWORD_HASH_WORKERS', 2),
+                                         max_queue=config.get('PASSWORD_HASH_QUEUE', 32),
+                                         timeout=config.get('PASSWORD_HASH_TIMEOUT', 10.0),
+                                         method=config.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000'),
+                                         salt_length=config.get('PASSWORD_SALT_LENGTH', 16))
+    return _hasher
+
+
+def shutdown():
+    """Stop this process's hashing workers; the next call starts a fresh pool"""
+    global _hasher
+    if _hasher is not None and _hasher.pid == os.getpid():
+        _hasher.shutdown()
+    _hasher = None
+
+
+def init_app(app):
+    app.config.setdefault('PASSWORD_HASH_WORKERS', 2)
+    app.config.setdefault('PASSWORD_HASH_QUEUE', 32)
+    app.config.setdefault('PASSWORD_HASH_TIMEOUT', 10.0)
+    app.config.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    app.config.setdefault('PASSWORD_SALT_LENGTH', 16)
@@ -0,0 +1,426 @@
+"""
+TF-IDF "related posts", precomputed so a post page only reads an index.
+
+Every post is reduced to its ``terms_per_post`` highest-weighted TF-IDF
+terms (title words count ``title_weight`` times), L2-normalized, and
+stored in ``related_postings``.  Similarity is the dot product of two
+such vectors.  Candidates are found through each term's postings, read
+in weight order and cut at ``max_postings``, so one very common term
+cannot pull the whole corpus into every comparison.
+
+:func:`rebuild` scores the whole corpus in NumPy batches.  After that,
+:func:`refresh` keeps things current one post at a time (write_blog,
+edit_blog, delete_blog):
+- re-vectorizes the post against the stored vocabulary;
+- recomputes its list;
+- slots it into the lists of posts it now beats;
+- recomputes the lists that used to contain it.
+
+New words only enter the vocabulary on the next rebuild.
+
+Usage: python related.py [database] [--k 5] [--max-postings 500]
+"""
+
+import argparse
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; related posts then stay empty
+    np = None
+
+import db
+import page_cache
+import writer
+
+
+TOKEN = re.compile(r'[^\W_]+')
+
+DEFAULTS = {
+    'k': 5,
+    'terms_per_post': 24,
+    'title_weight': 3,
+    'max_df': 0.2,
+    'min_df': 2,
+    'max_postings': 500,
+    'min_score': 0.05,
+}
+
+# Gathered (post, candidate) pairs per NumPy batch; bounds rebuild memory
+BATCH_ENTRIES = 4_000_000
+WRITE_CHUNK = 10_000
+
+RELATED_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS related_terms (
+        id INTEGER PRIMARY KEY,
+        term TEXT UNIQUE NOT NULL,
+        idf REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS related_postings (
+        blog_id INTEGER NOT NULL,
+        term_id INTEGER NOT NULL,
+        weight REAL NOT NULL,
+        PRIMARY KEY (blog_id, term_id)
+    ) WITHOUT ROWID
+    """,
+    'CREATE INDEX IF NOT EXISTS idx_related_postings_term ON related_postings (term_id, weight)',
+    """
+    CREATE TABLE IF NOT EXISTS related_posts (
+        blog_id INTEGER NOT NULL,
+        rank INTEGER NOT NULL,
+        related_id INTEGER NOT NULL,
+        score REAL NOT NULL,
+        PRIMARY KEY (blog_id, rank)
+    ) WITHOUT ROWID
+    """,
+    'CREATE INDEX IF NOT EXISTS idx_related_posts_related ON related_posts (related_id)',
+]
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def available():
+    return np is not None
+
+
+def ensure_schema(conn):
+    for statement in RELATED_SCHEMA:
+        conn.execute(statement)
+
+
+def tokenize(text):
+    return [token for token in TOKEN.findall(text.casefold()) if len(token) > 1]
+
+
+def term_counts(title, content, title_weight):
+    counts = Counter(tokenize(content))
+    for token in tokenize(title):
+        counts[token] += title_weight
+    return counts
+
+
+def vectorize(counts, vocabulary, terms_per_post):
+    """Top TF-IDF terms of one post as {term_id: weight}, L2-normalized"""
+    weights = []
+    for term, count in counts.items():
+        entry = vocabulary.get(term)
+        if entry is not None:
+            term_id, idf = entry
+            weights.append(((1 + math.log(count)) * idf, term_id))
+    weights.sort(reverse=True)
+    weights = weights[:terms_per_post]
+    norm = math.sqrt(sum(w * w for w, _ in weights))
+    return {term_id: w / norm for w, term_id in weights} if norm else {}
+
+
+# -- batch rebuild --------------------------------------------------------------
+
+def _score_batch(first, last, doc_ptr, entry_term, entry_weight, term_ptr, post_doc, post_weight,
+                 n_docs, k, min_score):
+    """Top-k (post, rank, candidate, score) arrays for posts first..last-1"""
+    entries = np.arange(doc_ptr[first], doc_ptr[last])
+    if not len(entries):
+        return None
+    owners = np.repeat(np.arange(first, last), np.diff(doc_ptr[first:last + 1]))
+    terms = entry_term[entries]
+    starts, lengths = term_ptr[terms], term_ptr[terms + 1] - term_ptr[terms]
+    total = int(lengths.sum())
+    if not total:
+        return None
+    # Flat positions of every posting of every term in the batch
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    positions = offsets + np.arange(total)
+    sources = np.repeat(owners, lengths)
+    targets = post_doc[positions]
+    values = np.repeat(entry_weight[entries], lengths) * post_weight[positions]
+    keep = sources != targets
+    pairs = (sources[keep] - first).astype(np.int64) * n_docs + targets[keep]
+    pairs, inverse = np.unique(pairs, return_inverse=True)
+    scores = np.bincount(inverse, weights=values[keep])
+
+    sources, targets = pairs // n_docs + first, pairs % n_docs
+    order = np.lexsort((-scores, sources))
+    sources, targets, scores = sources[order], targets[order], scores[order]
+    group_starts = np.flatnonzero(np.concatenate(([True], sources[1:] != sources[:-1])))
+    ranks = np.arange(len(sources)) - np.repeat(group_starts, np.diff(np.append(group_starts, len(sources))))
+    keep = (ranks < k) & (scores >= min_score)
+    return sources[keep], ranks[keep], targets[keep], scores[keep]
+
+
+def rebuild(conn, k=DEFAULTS['k'], terms_per_post=DEFAULTS['terms_per_post'],
+            title_weight=DEFAULTS['title_weight'], max_df=DEFAULTS['max_df'], min_df=DEFAULTS['min_df'],
+            max_postings=DEFAULTS['max_postings'], min_score=DEFAULTS['min_score'], verbose=False):
+    """Recompute vocabulary, post vectors and every related list; returns timings"""
+    if not available():
+        raise RuntimeError('NumPy is required to rebuild related posts')
+    timings = {}
+
+    started = time.perf_counter()
+    df = Counter()
+    n_docs = 0
+    for title, content in conn.execute('SELECT title, content FROM blogs'):
+        df.update(set(term_counts(title, content, 1)))
+        n_docs += 1
+    max_count = max(min_df, int(max_df * n_docs))
+    terms = sorted(term for term, count in df.items() if min_df <= count <= max_count)
+    vocabulary = {term: (i + 1, math.log((1 + n_docs) / (1 + df[term])) + 1) for i, term in enumerate(terms)}
+    del df
+    timings['vocabulary'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    ids = []
+    doc_ptr = [0]
+    entry_term = []
+    entry_weight = []
+    for blog_id, title, content in conn.execute('SELECT id, title, content FROM blogs ORDER BY id'):
+        vector = vectorize(term_counts(title, content, title_weight), vocabulary, terms_per_post)
+        ids.append(blog_id)
+        entry_term.extend(vector)
+        entry_weight.extend(vector.values())
+        doc_ptr.append(len(entry_term))
+    ids = np.array(ids, dtype=np.int64)
+    doc_ptr = np.array(doc_ptr, dtype=np.int64)
+    entry_term = np.array(entry_term, dtype=np.int64)
+    entry_weight = np.array(entry_weight, dtype=np.float64)
+    entry_doc = np.repeat(np.arange(len(ids)), np.diff(doc_ptr))
+    timings['vectors'] = time.perf_counter() - started
+
+    # Postings: per term, posts in descending weight, cut at max_postings
+    started = time.perf_counter()
+    order = np.lexsort((-entry_weight, entry_term))
+    by_term = entry_term[order]
+    term_starts = np.searchsorted(by_term, np.arange(len(terms) + 2))
+    rank_in_term = np.arange(len(order)) - term_starts[by_term]
+    kept = order[rank_in_term < max_postings]
+    post_doc, post_weight = entry_doc[kept], entry_weight[kept]
+    term_ptr = np.searchsorted(entry_term[kept], np.arange(len(terms) + 2))
+
+    # Batches sized by how many (post, candidate) pairs they gather
+    posting_lengths = np.diff(term_ptr)
+    gathered = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.add.at(gathered, entry_doc + 1, posting_lengths[entry_term])
+    gathered = np.cumsum(gathered)
+    rows = []
+    first = 0
+    while first < len(ids):
+        last = int(np.searchsorted(gathered, gathered[first] + BATCH_ENTRIES, side='right')) - 1
+        last = min(max(last, first + 1), len(ids))
+        batch = _score_batch(first, last, doc_ptr, entry_term, entry_weight, term_ptr, post_doc, post_weight,
+                             len(ids), k, min_score)
+        if batch is not None:
+            sources, ranks, targets, scores = batch
+            rows.append((ids[sources], ranks, ids[targets], scores))
+        first = last
+    timings['similarity'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    conn.execute('DELETE FROM related_posts')
+    conn.execute('DELETE FROM related_postings')
+    conn.execute('DELETE FROM related_terms')
+    conn.executemany('INSERT INTO related_terms (id, term, idf) VALUES (?, ?, ?)',
+                     ((term_id, term, idf) for term, (term_id, idf) in vocabulary.items()))
+    postings = zip(ids[entry_doc].tolist(), entry_term.tolist(), entry_weight.tolist())
+    conn.executemany('INSERT INTO related_postings (blog_id, term_id, weight) VALUES (?, ?, ?)', postings)
+    related = 0
+    for sources, ranks, targets, scores in rows:
+        conn.executemany('INSERT INTO related_posts (blog_id, rank, related_id, score) VALUES (?, ?, ?, ?)',
+                         zip(sources.tolist(), ranks.tolist(), targets.tolist(), scores.tolist()))
+        related += len(sources)
+    timings['write'] = time.perf_counter() - started
+
+    if verbose:
+        print(f"✅ {len(ids)} posts, {len(terms)} terms, {len(entry_term)} postings, {related} related links")
+        for phase, seconds in timings.items():
+            print(f"   {phase:<11} {seconds:.1f}s")
+    return timings
+
+
+# -- incremental updates -------------------------------------------------------
+
+def load_vocabulary(conn, terms):
+    """{term: (term_id, idf)} for the given terms, from the stored vocabulary"""
+    terms = list(terms)
+    vocabulary = {}
+    for i in range(0, len(terms), 500):
+        chunk = terms[i:i + 500]
+        placeholders = ', '.join('?' * len(chunk))
+        for term_id, term, idf in conn.execute(
+                f'SELECT id, term, idf FROM related_terms WHERE term IN ({placeholders})', chunk):
+            vocabulary[term] = (term_id, idf)
+    return vocabulary
+
+
+def stored_vector(conn, blog_id):
+    return dict(conn.execute('SELECT term_id, weight FROM related_postings WHERE blog_id = ?', (blog_id,)))
+
+
+def candidate_scores(conn, vector, exclude, max_postings):
+    """{blog_id: similarity} for posts reachable through the vector's postings"""
+    scores = {}
+    for term_id, weight in vector.items():
+        for blog_id, other in conn.execute("""
+            SELECT blog_id, weight FROM related_postings
+            WHERE term_id = ? ORDER BY weight DESC LIMIT ?
+        """, (term_id, max_postings)):
+            if blog_id != exclude:
+                scores[blog_id] = scores.get(blog_id, 0.0) + weight * other
+    return scores
+
+
+def top_k(scores, k, min_score):
+    best = sorted(((score, blog_id) for blog_id, score in scores.items() if score >= min_score), reverse=True)
+    return [(blog_id, score) for score, blog_id in best[:k]]
+
+
+def current_lists(conn, blog_ids):
+    lists = {}
+    blog_ids = list(blog_ids)
+    for i in range(0, len(blog_ids), 500):
+        chunk = blog_ids[i:i + 500]
+        placeholders = ', '.join('?' * len(chunk))
+        for blog_id, related_id, score in conn.execute(f"""
+            SELECT blog_id, related_id, score FROM related_posts
+            WHERE blog_id IN ({placeholders}) ORDER BY blog_id, rank
+        """, chunk):
+            lists.setdefault(blog_id, []).append((related_id, score))
+    return lists
+
+
+def store_vector(conn, blog_id, vector):
+    """Write job: replace a post's stored vector (an empty one removes it)"""
+    conn.execute('DELETE FROM related_postings WHERE blog_id = ?', (blog_id,))
+    conn.executemany('INSERT INTO related_postings (blog_id, term_id, weight) VALUES (?, ?, ?)',
+                     [(blog_id, term_id, weight) for term_id, weight in vector.items()])
+
+
+def store_lists(conn, lists, removed=None):
+    """Write job: replace the related lists in {blog_id: [(related_id, score)]}"""
+    if removed is not None:
+        conn.execute('DELETE FROM related_posts WHERE blog_id = ? OR related_id = ?', (removed, removed))
+    for blog_id, entries in lists.items():
+        conn.execute('DELETE FROM related_posts WHERE blog_id = ?', (blog_id,))
+        conn.executemany('INSERT INTO related_posts (blog_id, rank, related_id, score) VALUES (?, ?, ?, ?)',
+                         [(blog_id, rank, related_id, score) for rank, (related_id, score) in enumerate(entries)])
+
+
+def plan_lists(conn, blog_id, vector, settings):
+    """New related lists for ``blog_id`` and every post whose list it affects"""
+    k, max_postings, min_score = settings['k'], settings['max_postings'], settings['min_score']
+    lists = {}
+    dependents = {row[0] for row in conn.execute(
+        'SELECT blog_id FROM related_posts WHERE related_id = ?', (blog_id,))}
+
+    if vector:
+        scores = candidate_scores(conn, vector, blog_id, max_postings)
+        lists[blog_id] = top_k(scores, k, min_score)
+        # Posts this one now beats the weakest entry of
+        best = top_k(scores, 4 * k, min_score)
+        existing = current_lists(conn, [other for other, _ in best])
+        for other, score in best:
+            if other in dependents:
+                continue
+            entries = [entry for entry in existing.get(other, []) if entry[0] != blog_id]
+            if len(entries) < k or score > entries[-1][1]:
+                lists[other] = sorted(entries + [(blog_id, score)], key=lambda e: -e[1])[:k]
+
+    # Lists that held the post before it changed are scored again from scratch
+    for other in dependents:
+        lists[other] = top_k(candidate_scores(conn, stored_vector(conn, other), other, max_postings),
+                             k, min_score)
+    return lists
+
+
+def refresh(app, blog_id):
+    """Worker task: bring one post's vector and the related lists it touches up to date"""
+    try:
+        settings = settings_for(app)
+        pool = db.get_pool(app)
+        conn = pool.acquire()
+        try:
+            post = conn.execute('SELECT title, content FROM blogs WHERE id = ?', (blog_id,)).fetchone()
+            vector = {}
+            if post is not None:
+                counts = term_counts(post['title'], post['content'], settings['title_weight'])
+                vector = vectorize(counts, load_vocabulary(conn, counts), settings['terms_per_post'])
+        finally:
+            pool.release(conn)
+        writer.run(app, store_vector, blog_id, vector)
+
+        conn = pool.acquire()
+        try:
+            lists = plan_lists(conn, blog_id, vector, settings)
+        finally:
+            pool.release(conn)
+        writer.run(app, store_lists, lists, None if post is not None else blog_id)
+        page_cache.invalidate(*(f'blog:{other}' for other in set(lists) | {blog_id}))
+    except Exception:
+        app.logger.exception('Updating related posts for blog %s failed', blog_id)
+
+
+def settings_for(app):
+    return {name: app.config.get(f'RELATED_{name.upper()}', default) for name, default in DEFAULTS.items()}
+
+
+def get_executor(app):
+    """This process's related-posts worker, recreated after a fork"""
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                # One thread: refreshes for the same post must not interleave
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='related-worker')
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def schedule(app, blog_id):
+    """Queue a refresh after a post was written, edited or deleted"""
+    get_executor(app).submit(refresh, app, blog_id)
+
+
+def related_to(conn, blog_id):
+    """Rows for a post's related panel (enough for a BlogCard), best match first"""
+    return conn.execute("""
+        SELECT b.id, b.title, b.author_id, b.created_at, b.likes, b.image_path, b.reading_minutes,
+               u.name AS author_name
+        FROM related_posts r
+        JOIN blogs b ON b.id = r.related_id
+        JOIN users u ON b.author_id = u.id
+        WHERE r.blog_id = ?
+        ORDER BY r.rank
+    """, (blog_id,)).fetchall()
+
+
+def init_app(app):
+    for name, default in DEFAULTS.items():
+        app.config.setdefault(f'RELATED_{name.upper()}', default)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuild TF-IDF related posts')
+    parser.add_argument('database', nargs='?', default='instance/blog_database.db')
+    for name, default in DEFAULTS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    args = parser.parse_args()
+    if not available():
+        print("❌ NumPy is not installed: pip install -r requirements.txt")
+        sys.exit(1)
+
+    conn = sqlite3.connect(args.database)
+    with conn:
+        ensure_schema(conn)
+        rebuild(conn, **{name: getattr(args, name) for name in DEFAULTS}, verbose=True)
+    conn.close()
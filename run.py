@@ -4,6 +4,7 @@ Blog Writing Platform - Professional Run Script
 Complete MCA Mini Project - Error-Free Execution
 """
 
+import argparse
 import os
 import sys
 import subprocess
@@ -142,7 +143,100 @@ def start_application():
 
     return True
 
+def serve_production(workers, threads, bind):
+    """Serve with Gunicorn: preforked, threaded workers sharing a preloaded app"""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("❌ Gunicorn is not installed (it does not run on Windows)")
+        print("   pip install -r requirements.txt")
+        return False
+
+    def on_starting(server):
+        # Runs once in the master, after preload_app has imported the app and before workers fork
+        from app import init_db
+        init_db()
+
+    def post_worker_init(worker):
+        # Build this worker's suggestion index while it starts taking requests
+        import suggest
+        from app import app
+        suggest.warm(app)
+
+    def worker_exit(server, worker):
+        # Write out likes and views still buffered in this worker, then drain the write queue
+        import likes
+        import passwords
+        import trending
+        import writer
+        likes.shutdown()
+        trending.shutdown()
+        passwords.shutdown()
+        writer.shutdown()
+
+    class BlogApplication(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app import app
+            return app
+
+    # Fingerprint and precompress CSS/JS before the app is loaded and reads the manifest
+    import assets
+    assets.build(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'))
+
+    options = {
+        'bind': bind,
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread',
+        'preload_app': True,
+        'timeout': int(os.environ.get('WEB_TIMEOUT', 30)),
+        'graceful_timeout': int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30)),
+        'keepalive': int(os.environ.get('WEB_KEEPALIVE', 5)),
+        'max_requests': int(os.environ.get('WEB_MAX_REQUESTS', 0)),
+        'max_requests_jitter': int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 0)),
+        'accesslog': '-',
+        'on_starting': on_starting,
+        'post_worker_init': post_worker_init,
+        'worker_exit': worker_exit,
+    }
+
+    print("="*70)
+    print(f"🚀 Production server on {bind}: {workers} workers x {threads} threads")
+    print(f"🔄 Replace workers: kill -HUP {os.getpid()} (same code; the app is preloaded)")
+    print(f"🚚 Deploy new code: restart the master, or kill -USR2 {os.getpid()} then -TERM the old master")
+    print("="*70)
+    BlogApplication(options).run()
+    return True
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Blog Writing Platform run script')
+    parser.add_argument('--production', action='store_true',
+                        default=os.environ.get('BLOG_SERVE_MODE') == 'production',
+                        help='serve with Gunicorn instead of the debug server')
+    parser.add_argument('--workers', type=int,
+                        default=int(os.environ.get('WEB_WORKERS', (os.cpu_count() or 1) * 2 + 1)),
+                        help='worker processes (production)')
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WEB_THREADS', 4)),
+                        help='threads per worker (production)')
+    parser.add_argument('--bind', default=os.environ.get('WEB_BIND', '0.0.0.0:5000'),
+                        help='address to listen on (production)')
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    if args.production:
+        if not serve_production(args.workers, args.threads, args.bind):
+            sys.exit(1)
+        return
+
     print_header()
 
     # Check system requirements
@@ -0,0 +1,140 @@
+import re
+import sqlite3
+import sys
+
+from markupsafe import Markup, escape
+
+from pagination import keyset_page
+from view_models import BlogCard
+
+
+# Private-use markers that snippet()/highlight() wrap matches in; the text is
+# HTML-escaped first and only then are these swapped for <mark> tags
+MARK_OPEN = '\ue000'
+MARK_CLOSE = '\ue001'
+
+# bm25 column weights: title, content, author_name
+BM25_WEIGHTS = (10.0, 1.0, 5.0)
+
+
+FTS_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS blogs_fts USING fts5(
+        title, content, author_name,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blogs_fts_insert AFTER INSERT ON blogs BEGIN
+        INSERT INTO blogs_fts (rowid, title, content, author_name)
+        VALUES (new.id, new.title, new.content,
+                (SELECT name FROM users WHERE id = new.author_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blogs_fts_update
+    AFTER UPDATE OF title, content, author_id ON blogs BEGIN
+        DELETE FROM blogs_fts WHERE rowid = old.id;
+        INSERT INTO blogs_fts (rowid, title, content, author_name)
+        VALUES (new.id, new.title, new.content,
+                (SELECT name FROM users WHERE id = new.author_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blogs_fts_delete AFTER DELETE ON blogs BEGIN
+        DELETE FROM blogs_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blogs_fts_author_rename
+    AFTER UPDATE OF name ON users BEGIN
+        UPDATE blogs_fts SET author_name = new.name
+        WHERE rowid IN (SELECT id FROM blogs WHERE author_id = new.id);
+    END
+    """,
+]
+
+
+def ensure_schema(conn):
+    """Create the FTS table and sync triggers, indexing existing posts if new"""
+    existed = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'blogs_fts'"
+    ).fetchone()
+    for statement in FTS_SCHEMA:
+        conn.execute(statement)
+    if not existed:
+        rebuild(conn)
+
+
+def rebuild(conn):
+    """Re-index every blog from scratch and merge the index segments"""
+    conn.execute('DELETE FROM blogs_fts')
+    conn.execute("""
+        INSERT INTO blogs_fts (rowid, title, content, author_name)
+        SELECT b.id, b.title, b.content, u.name
+        FROM blogs b
+        JOIN users u ON b.author_id = u.id
+    """)
+    conn.execute("INSERT INTO blogs_fts (blogs_fts) VALUES ('optimize')")
+    return conn.execute('SELECT COUNT(*) FROM blogs_fts').fetchone()[0]
+
+
+def build_match_query(text):
+    """Turn free text into a safe FTS5 query; the last word matches as a prefix"""
+    terms = re.findall(r'\w+', text, re.UNICODE)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search(conn, text, after=None, before=None, per_page=12, lazy=False):
+    """bm25-ranked page of blog cards matching ``text``, with snippets"""
+    match = build_match_query(text)
+    if match is None:
+        return None
+    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+    return keyset_page(
+        conn,
+        f"""
+            SELECT * FROM (
+                SELECT b.id, b.title, b.image_path, b.author_id, b.created_at, b.likes,
+                       b.image_card, b.image_full, b.image_webp_card, b.image_webp_full,
+                       b.image_placeholder, b.word_count, b.reading_minutes,
+                       COALESCE(b.excerpt, substr(b.content, 1, 150)) AS excerpt,
+                       COALESCE(b.content_length, length(b.content)) AS content_length,
+                       u.name AS author_name,
+                       highlight(blogs_fts, 0, '{MARK_OPEN}', '{MARK_CLOSE}') AS title_highlight,
+                       snippet(blogs_fts, 1, '{MARK_OPEN}', '{MARK_CLOSE}', '…', 24) AS snippet,
+                       bm25(blogs_fts, {weights}) AS score
+                FROM blogs_fts
+                JOIN blogs b ON b.id = blogs_fts.rowid
+                JOIN users u ON b.author_id = u.id
+                WHERE blogs_fts MATCH ?
+            )
+        """,
+        params=(match,),
+        after=after, before=before, per_page=per_page,
+        sort_col='score', id_col='id', sort_key='score',
+        descending=False, cast=float, factory=BlogCard, lazy=lazy,
+    )
+
+
+def highlight_filter(text):
+    """Jinja filter: escape a snippet and turn the match markers into <mark>"""
+    if not text:
+        return ''
+    escaped = str(escape(text))
+    return Markup(escaped.replace(MARK_OPEN, '<mark>').replace(MARK_CLOSE, '</mark>'))
+
+
+if __name__ == '__main__':
+    database = sys.argv[1] if len(sys.argv) > 1 else 'instance/blog_database.db'
+    conn = sqlite3.connect(database)
+    for statement in FTS_SCHEMA:
+        conn.execute(statement)
+    count = rebuild(conn)
+    conn.commit()
+    conn.close()
+    print(f"✅ Search index rebuilt: {count} blogs indexed")
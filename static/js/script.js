@@ -21,6 +21,7 @@ function initializeApplication() {
     initLazyLoading();
     initWordCount();
     initAutoSave();
+    initComments();
 
     console.log('✅ Blog application initialized successfully!');
 }
@@ -267,7 +268,11 @@ function initLikeButtons() {
                         this.style.transform = 'scale(1)';
                     }, 200);
 
-                    showNotification('Post liked!', 'success');
+                    if (data.liked) {
+                        showNotification('Post liked!', 'success');
+                    } else {
+                        showNotification('You already liked this post', 'info');
+                    }
                 } else {
                     showNotification('Please log in to like posts', 'error');
                 }
@@ -299,10 +304,8 @@ function initSearch() {
             }, 500);
         });
 
-        // Add search suggestions (basic implementation)
-        searchInput.addEventListener('focus', function() {
-            // Could implement search suggestions here
-        });
+        // Picking a suggestion cancels the pending auto-search
+        initSearchSuggestions(searchInput, () => clearTimeout(searchTimeout));
     }
 
     if (searchForm) {
@@ -322,6 +325,104 @@ function performSearch(query) {
     window.location.href = `/search?q=${encodeURIComponent(query)}`;
 }
 
+// Title and author suggestions from /api/suggest while typing
+function initSearchSuggestions(searchInput, onPick) {
+    const list = document.createElement('ul');
+    list.className = 'search-suggestions';
+    list.setAttribute('role', 'listbox');
+    list.hidden = true;
+    searchInput.setAttribute('autocomplete', 'off');
+    searchInput.parentNode.appendChild(list);
+
+    let suggestTimeout;
+    let controller = null;
+    let active = -1;
+
+    function close() {
+        list.hidden = true;
+        list.innerHTML = '';
+        active = -1;
+    }
+
+    function highlight(index) {
+        const items = list.querySelectorAll('li');
+        items.forEach((item, i) => item.classList.toggle('active', i === index));
+        active = index;
+    }
+
+    function render(suggestions) {
+        list.innerHTML = '';
+        suggestions.forEach(suggestion => {
+            const item = document.createElement('li');
+            item.setAttribute('role', 'option');
+            const link = document.createElement('a');
+            link.href = suggestion.url;
+            link.textContent = suggestion.label;
+            const kind = document.createElement('span');
+            kind.className = 'suggestion-type';
+            kind.textContent = suggestion.type === 'author' ? 'Author' : 'Post';
+            link.appendChild(kind);
+            item.appendChild(link);
+            list.appendChild(item);
+        });
+        list.hidden = suggestions.length === 0;
+        active = -1;
+    }
+
+    async function fetchSuggestions(query) {
+        if (controller) {
+            controller.abort();
+        }
+        controller = new AbortController();
+        try {
+            const response = await fetch(`/api/suggest?q=${encodeURIComponent(query)}`, { signal: controller.signal });
+            const data = await response.json();
+            if (data.query === searchInput.value.trim()) {
+                render(data.suggestions);
+            }
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                console.error('Error fetching suggestions:', error);
+            }
+        }
+    }
+
+    searchInput.addEventListener('input', function() {
+        clearTimeout(suggestTimeout);
+        const query = this.value.trim();
+        if (!query) {
+            close();
+            return;
+        }
+        suggestTimeout = setTimeout(() => fetchSuggestions(query), 120);
+    });
+
+    searchInput.addEventListener('keydown', function(e) {
+        const items = list.querySelectorAll('li');
+        if (list.hidden || !items.length) {
+            return;
+        }
+        if (e.key === 'ArrowDown' || e.key === 'ArrowUp') {
+            e.preventDefault();
+            onPick();
+            const step = e.key === 'ArrowDown' ? 1 : -1;
+            highlight((active + step + items.length) % items.length);
+        } else if (e.key === 'Enter' && active >= 0) {
+            e.preventDefault();
+            window.location.href = items[active].querySelector('a').href;
+        } else if (e.key === 'Escape') {
+            close();
+        }
+    });
+
+    list.addEventListener('pointerdown', onPick);
+
+    searchInput.addEventListener('blur', function() {
+        // Let a click on a suggestion land before the list goes away
+        setTimeout(close, 150);
+    });
+}
+
 // Image upload functionality
 function initImageUpload() {
     const imageInputs = document.querySelectorAll('input[type="file"][accept*="image"]');
@@ -654,6 +755,93 @@ function initLazyLoading() {
     }
 }
 
+// Comments: post without reloading, load older pages on scroll
+function initComments() {
+    const section = document.querySelector('.comments-section');
+    if (!section) return;
+
+    const list = section.querySelector('.comment-list');
+    const countEl = section.querySelector('.comment-count');
+    const form = section.querySelector('.comment-form');
+
+    if (form) {
+        form.addEventListener('submit', async function(e) {
+            e.preventDefault();
+            const submitBtn = form.querySelector('button[type="submit"]');
+
+            try {
+                const response = await fetch(form.action, {
+                    method: 'POST',
+                    body: new FormData(form),
+                    headers: {
+                        'X-Requested-With': 'XMLHttpRequest'
+                    }
+                });
+                const data = await response.json();
+
+                if (response.ok) {
+                    list.insertAdjacentHTML('afterbegin', data.html);
+                    if (countEl) countEl.textContent = parseInt(countEl.textContent, 10) + 1;
+                    form.reset();
+                    showNotification('Comment posted!', 'success');
+                } else {
+                    showNotification(data.error || 'Could not post comment', 'error');
+                }
+            } catch (error) {
+                console.error('Error posting comment:', error);
+                showNotification('Something went wrong. Please try again.', 'error');
+            } finally {
+                if (submitBtn) {
+                    submitBtn.innerHTML = 'Post Comment';
+                    submitBtn.disabled = false;
+                }
+            }
+        });
+    }
+
+    const more = section.querySelector('.comments-more');
+    if (!more) return;
+    const moreBtn = more.querySelector('button');
+    let loading = false;
+
+    async function loadMore() {
+        if (loading || !more.dataset.nextUrl) return;
+        loading = true;
+        moreBtn.innerHTML = '<span class="loading"></span>';
+
+        try {
+            const response = await fetch(more.dataset.nextUrl, {
+                headers: {
+                    'X-Requested-With': 'XMLHttpRequest'
+                }
+            });
+            const data = await response.json();
+            list.insertAdjacentHTML('beforeend', data.html);
+
+            if (data.next_url) {
+                more.dataset.nextUrl = data.next_url;
+            } else {
+                if (observer) observer.disconnect();
+                more.remove();
+            }
+        } catch (error) {
+            console.error('Error loading comments:', error);
+        } finally {
+            moreBtn.innerHTML = 'Load more comments';
+            loading = false;
+        }
+    }
+
+    moreBtn.addEventListener('click', loadMore);
+
+    const observer = 'IntersectionObserver' in window
+        ? new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) loadMore();
+        }, { rootMargin: '300px' })
+        : null;
+    if (observer) observer.observe(more);
+}
+
 // Smooth scrolling for anchor links
 document.addEventListener('click', function(e) {
     if (e.target.matches('a[href^="#"]')) {
@@ -0,0 +1,228 @@
+"""
+Export the site as flat files a plain static server can take over during
+traffic spikes.
+
+The homepage, every post and every author page are rendered through the
+app itself (same templates, same view code, as an anonymous visitor) to
+``index.html``, ``blog/<id>/index.html`` and ``author/<id>/index.html``.
+Each page also gets a ``.gz`` sibling for servers with gzip_static, and
+the static folder is copied alongside.
+
+Reruns are incremental: ``.export-state.json`` keeps a hash per post of
+the same version token its ETag is built from (content, comments, likes,
+related posts...), and only posts whose hash moved are rendered again.
+An author page is redone when any of the author's posts is, and
+everything is redone when the code or templates changed.  Pages render
+in parallel on a process pool, and every file is written to a temporary
+name and renamed into place, so a server reading the directory never
+sees half a page.
+
+Usage: python static_export.py <output dir> [database] [--workers 4] [--full]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import conditional
+import migrations
+
+
+STATE_FILE = '.export-state.json'
+CHUNK_SIZE = 100
+
+_client = None
+
+
+def write_atomic(path, data):
+    """Write ``data`` to ``path`` through a temporary file and a rename"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.export-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            out.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def page_path(output, url):
+    """File serving ``url`` from a static server: /blog/5 -> blog/5/index.html"""
+    return os.path.join(output, url.strip('/'), 'index.html')
+
+
+def _init_worker(database):
+    """Load the app once per worker process, configured for exporting"""
+    global _client
+    os.environ['DATABASE'] = database
+    from app import app
+    app.config.update(PAGE_CACHE_ENABLED=False, CONDITIONAL_GET_ENABLED=False, COMPRESS_ENABLED=False,
+                      STREAM_ROUTES=set(), TRENDING_COUNT_VIEWS=False)
+    _client = app.test_client()
+
+
+def render_pages(output, urls):
+    """Worker task: render and write ``urls``; returns the ones that rendered"""
+    done = []
+    for url in urls:
+        response = _client.get(url)
+        if response.status_code != 200:
+            remove_page(output, url)  # deleted since the hashes were taken
+            continue
+        body = response.get_data()
+        path = page_path(output, url)
+        write_atomic(path + '.gz', gzip.compress(body, compresslevel=9, mtime=0))
+        write_atomic(path, body)
+        done.append(url)
+    return done
+
+
+def remove_page(output, url):
+    path = page_path(output, url)
+    for name in (path, path + '.gz'):
+        if os.path.exists(name):
+            os.remove(name)
+    try:
+        os.rmdir(os.path.dirname(path))
+    except OSError:
+        pass
+
+
+def copy_static(static_folder, output):
+    """Mirror the static folder, copying only files that differ in size or mtime"""
+    copied = 0
+    target_root = os.path.join(output, 'static')
+    for folder, _, files in os.walk(static_folder):
+        target_dir = os.path.join(target_root, os.path.relpath(folder, static_folder))
+        for name in files:
+            if name.startswith('.'):
+                continue
+            source, target = os.path.join(folder, name), os.path.join(target_dir, name)
+            stat = os.stat(source)
+            try:
+                current = os.stat(target)
+                if current.st_size == stat.st_size and current.st_mtime_ns == stat.st_mtime_ns:
+                    continue
+            except FileNotFoundError:
+                pass
+            os.makedirs(target_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=target_dir, prefix='.export-')
+            os.close(fd)
+            shutil.copy2(source, tmp_path)
+            os.replace(tmp_path, target)
+            copied += 1
+    return copied
+
+
+def load_state(output):
+    try:
+        with open(os.path.join(output, STATE_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(output, state):
+    write_atomic(os.path.join(output, STATE_FILE), json.dumps(state).encode())
+
+
+def current_hashes(conn):
+    """{url: hash} for every post, author and the homepage"""
+    hashes = {}
+    by_author = {}
+    for blog_id, author_id, author_name in conn.execute("""
+        SELECT b.id, b.author_id, u.name FROM blogs b JOIN users u ON u.id = b.author_id ORDER BY b.id
+    """).fetchall():
+        token, _ = conditional.post_version(conn, blog_id)
+        digest = hashlib.sha256(f'{author_name}|{token}'.encode()).hexdigest()
+        hashes[f'/blog/{blog_id}'] = digest
+        by_author.setdefault(author_id, []).append(digest)
+    for author_id, digests in by_author.items():
+        hashes[f'/author/{author_id}'] = hashlib.sha256('|'.join(digests).encode()).hexdigest()
+    token, _ = conditional.page_versions(conn, 'feed')
+    hashes['/'] = hashlib.sha256(token.encode()).hexdigest()
+    return hashes
+
+
+def export(output, database, workers=None, full=False, verbose=True):
+    """Bring ``output`` up to date with ``database``; returns (rendered, removed, skipped)"""
+    os.environ['DATABASE'] = database
+    from app import app
+
+    os.makedirs(output, exist_ok=True)
+    state = load_state(output)
+    version = app.config['CONDITIONAL_GET_VERSION']
+    previous = state.get('pages', {}) if state.get('version') == version and not full else {}
+
+    conn = sqlite3.connect(database)
+    if migrations.schema_version(conn) < len(migrations.MIGRATIONS):
+        conn.close()
+        raise RuntimeError(f'{database} is not migrated; run python init_db.py or start the app once')
+    started = time.perf_counter()
+    hashes = current_hashes(conn)
+    conn.close()
+    stale = [url for url, digest in hashes.items() if previous.get(url) != digest]
+    gone = [url for url in previous if url not in hashes]
+    if verbose:
+        print(f"🔍 {len(hashes)} pages, {len(stale)} to render, {len(gone)} to remove "
+              f"({time.perf_counter() - started:.1f}s)")
+
+    copied = copy_static(app.static_folder, output)
+    if verbose and copied:
+        print(f"📁 Copied {copied} static files")
+
+    for url in gone:
+        remove_page(output, url)
+    pages = {url: digest for url, digest in previous.items() if url in hashes and url not in stale}
+    rendered = 0
+    started = time.perf_counter()
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else None)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(database,)) as executor:
+            futures = [executor.submit(render_pages, output, stale[i:i + CHUNK_SIZE])
+                       for i in range(0, len(stale), CHUNK_SIZE)]
+            for future in as_completed(futures):
+                for url in future.result():
+                    pages[url] = hashes[url]
+                    rendered += 1
+                if verbose:
+                    print(f"\r📝 Rendered {rendered}/{len(stale)}", end='', flush=True)
+    finally:
+        # Keep whatever finished, so an interrupted run resumes where it stopped
+        save_state(output, {'version': version, 'pages': pages})
+    if verbose and stale:
+        print(f" in {time.perf_counter() - started:.1f}s")
+    return rendered, len(gone), len(hashes) - len(stale)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export the site as static files')
+    parser.add_argument('output')
+    parser.add_argument('database', nargs='?', default='instance/blog_database.db')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--full', action='store_true', help='render every page, ignoring the last export')
+    args = parser.parse_args()
+    if not os.path.exists(args.database):
+        print(f"❌ {args.database} not found")
+        sys.exit(1)
+
+    try:
+        rendered, removed, skipped = export(args.output, args.database, args.workers, args.full)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ {rendered} pages rendered, {removed} removed, {skipped} unchanged in {args.output}")
@@ -0,0 +1,61 @@
+from flask import current_app, g, render_template, request, stream_template
+from markupsafe import Markup
+
+
+# Emitted by {{ stream_flush() }} while streaming; never reaches the client
+FLUSH_MARKER = '\ue002'
+
+
+def is_streaming():
+    """True if the current endpoint is configured to stream its template"""
+    return request.endpoint in current_app.config['STREAM_ROUTES']
+
+
+def stream_flush():
+    """Template global marking a point where buffered output is sent at once"""
+    return Markup(FLUSH_MARKER) if g.get('streaming') else Markup('')
+
+
+def coalesce(chunks, min_bytes):
+    """Join Jinja's many tiny chunks into writes of at least ``min_bytes``
+
+    A flush marker sends whatever is buffered straight away, so the page
+    header reaches the browser before the listing query has finished.
+    """
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        if FLUSH_MARKER in chunk:
+            before, _, after = chunk.partition(FLUSH_MARKER)
+            buffer.append(before)
+            yield ''.join(buffer)
+            buffer, size = [after], len(after)
+            continue
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= min_bytes:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def render_listing(template, **context):
+    """Render ``template``, as a streamed response if the endpoint streams
+
+    Streamed responses are sent as the rows are read, so they are never
+    stored by the page cache.
+    """
+    if not is_streaming():
+        return render_template(template, **context)
+    g.streaming = True
+    body = coalesce(stream_template(template, **context), current_app.config['STREAM_BUFFER_BYTES'])
+    response = current_app.response_class(body, mimetype='text/html')
+    response.headers['X-Accel-Buffering'] = 'no'  # let nginx pass chunks through
+    return response
+
+
+def init_app(app):
+    app.config.setdefault('STREAM_ROUTES', set())
+    app.config.setdefault('STREAM_BUFFER_BYTES', 8192)
+    app.add_template_global(stream_flush, 'stream_flush')
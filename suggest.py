@@ -0,0 +1,340 @@
+"""
+In-memory prefix index over post titles and author names for /api/suggest.
+
+Entries live in one sorted list searched with bisect: a prefix lookup is
+a binary search plus a short forward scan, well under a millisecond even
+with a few hundred thousand entries.  Each title is indexed from every
+word start (up to SUGGEST_WORDS of them), so "flask" finds "Deploying
+Flask apps".
+
+Every worker keeps its own index.  Triggers append post and user changes
+to ``suggest_changes``, and each worker replays the log at most every
+SUGGEST_SYNC_INTERVAL seconds, so edits made in any worker show up
+everywhere without a rebuild.
+"""
+
+import bisect
+import os
+import threading
+import time
+import unicodedata
+
+import db
+import writer
+
+
+# Separates the normalized text from the item it belongs to inside a key;
+# sorts before every printable character, so prefixes still match
+KEY_SEPARATOR = '\x00'
+
+# Change-log rows older than this are pruned; a worker that fell further
+# behind rebuilds from scratch
+CHANGE_RETENTION = 3600.0
+
+SUGGEST_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS suggest_changes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,  -- ids are never reused after a prune
+        kind TEXT NOT NULL,
+        item_id INTEGER NOT NULL,
+        created_at REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS suggest_blog_insert AFTER INSERT ON blogs BEGIN
+        INSERT INTO suggest_changes (kind, item_id) VALUES ('post', new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS suggest_blog_update AFTER UPDATE OF title ON blogs BEGIN
+        INSERT INTO suggest_changes (kind, item_id) VALUES ('post', new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS suggest_blog_delete AFTER DELETE ON blogs BEGIN
+        INSERT INTO suggest_changes (kind, item_id) VALUES ('post', old.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS suggest_user_insert AFTER INSERT ON users BEGIN
+        INSERT INTO suggest_changes (kind, item_id) VALUES ('author', new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS suggest_user_update AFTER UPDATE OF name ON users BEGIN
+        INSERT INTO suggest_changes (kind, item_id) VALUES ('author', new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS suggest_user_delete AFTER DELETE ON users BEGIN
+        INSERT INTO suggest_changes (kind, item_id) VALUES ('author', old.id);
+    END
+    """,
+]
+
+
+def ensure_schema(conn):
+    for statement in SUGGEST_SCHEMA:
+        conn.execute(statement)
+
+
+def normalize(text):
+    """Casefolded, accent-free text with single spaces and no control characters"""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    stripped = ''.join(c for c in decomposed
+                       if not unicodedata.combining(c) and unicodedata.category(c) != 'Cc')
+    return ' '.join(stripped.split())
+
+
+def word_starts(text, max_words):
+    """``text`` from each of its first ``max_words`` word starts"""
+    words = text.split(' ')
+    return [' '.join(words[i:]) for i in range(min(len(words), max_words))]
+
+
+class PrefixIndex:
+    """Sorted-array prefix index of posts and authors, bounded by entry count
+
+    Once ``max_entries`` is reached the oldest indexed posts are dropped to
+    make room, so memory stays flat however large the site grows.
+    """
+
+    def __init__(self, max_entries=200000, max_words=6):
+        self.max_entries = max_entries
+        self.max_words = max_words
+        self._keys = []
+        self._items = {}  # (kind, id) -> (label, keys); posts in indexing order
+        self._lock = threading.RLock()
+        self.last_change = 0
+        self.lookups = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _make_keys(self, kind, item_id, label):
+        suffix = f'{KEY_SEPARATOR}{kind}:{item_id}'
+        text = normalize(label)
+        if not text:
+            return []
+        starts = word_starts(text, self.max_words) if kind == 'post' else [text]
+        return [start + suffix for start in dict.fromkeys(starts)]
+
+    def add(self, kind, item_id, label):
+        """Index or re-index one post or author"""
+        with self._lock:
+            self.remove(kind, item_id)
+            keys = self._make_keys(kind, item_id, label)
+            for key in keys:
+                bisect.insort(self._keys, key)
+            self._items[(kind, item_id)] = (label, keys)
+            self._evict()
+
+    def remove(self, kind, item_id):
+        with self._lock:
+            entry = self._items.pop((kind, item_id), None)
+            if entry is None:
+                return
+            for key in entry[1]:
+                i = bisect.bisect_left(self._keys, key)
+                if i < len(self._keys) and self._keys[i] == key:
+                    del self._keys[i]
+
+    def _evict(self):
+        while len(self._keys) > self.max_entries:
+            oldest = next((item for item in self._items if item[0] == 'post'), None)
+            if oldest is None:
+                return
+            self.remove(*oldest)
+
+    def load(self, authors, posts):
+        """Replace the contents with (id, label) rows; ``posts`` newest first"""
+        items = {}
+        keys = []
+        for item_id, label in authors:
+            entry_keys = self._make_keys('author', item_id, label)
+            items[('author', item_id)] = (label, entry_keys)
+            keys.extend(entry_keys)
+        kept = []
+        for item_id, label in posts:
+            entry_keys = self._make_keys('post', item_id, label)
+            if len(keys) + len(entry_keys) > self.max_entries:
+                break
+            kept.append((item_id, label, entry_keys))
+            keys.extend(entry_keys)
+        for item_id, label, entry_keys in reversed(kept):  # oldest first, evicted first
+            items[('post', item_id)] = (label, entry_keys)
+        keys.sort()
+        with self._lock:
+            self._keys, self._items = keys, items
+
+    def lookup(self, prefix, limit=8):
+        """Up to ``limit`` (kind, id, label) matches for ``prefix``, in key order"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        with self._lock:
+            self.lookups += 1
+            keys = self._keys
+            i = bisect.bisect_left(keys, prefix)
+            while i < len(keys) and len(results) < limit:
+                key = keys[i]
+                if not key.startswith(prefix):
+                    break
+                kind, _, item_id = key.rpartition(KEY_SEPARATOR)[2].partition(':')
+                item = (kind, int(item_id))
+                if item not in seen:
+                    seen.add(item)
+                    results.append((kind, item[1], self._items[item][0]))
+                i += 1
+        return results
+
+    def stats(self):
+        with self._lock:
+            posts = sum(1 for kind, _ in self._items if kind == 'post')
+            return {'entries': len(self._keys), 'posts': posts, 'authors': len(self._items) - posts,
+                    'lookups': self.lookups, 'last_change': self.last_change}
+
+
+def build(conn, index):
+    """Fill ``index`` from the database and note where the change log stands"""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'suggest_changes'").fetchone()
+    last_change = row[0] if row else 0
+    authors = conn.execute('SELECT id, name FROM users').fetchall()
+    posts = conn.execute('SELECT id, title FROM blogs ORDER BY id DESC')
+    index.load(authors, posts)
+    index.last_change = last_change
+    return index
+
+
+def apply_changes(conn, index):
+    """Replay change-log rows newer than the index; False if some were pruned"""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'suggest_changes'").fetchone()
+    if row is None or row[0] <= index.last_change:
+        return True
+    # The next row must still be there; pruning may have emptied the log entirely
+    first = conn.execute('SELECT MIN(id) FROM suggest_changes WHERE id > ?', (index.last_change,)).fetchone()[0]
+    if first is None or first > index.last_change + 1:
+        return False
+    rows = conn.execute("""
+        SELECT c.id, c.kind, c.item_id, b.title, u.name
+        FROM suggest_changes c
+        LEFT JOIN blogs b ON c.kind = 'post' AND b.id = c.item_id
+        LEFT JOIN users u ON c.kind = 'author' AND u.id = c.item_id
+        WHERE c.id > ?
+        ORDER BY c.id
+    """, (index.last_change,)).fetchall()
+    for change_id, kind, item_id, title, name in rows:
+        label = title if kind == 'post' else name
+        if label is None:
+            index.remove(kind, item_id)
+        else:
+            index.add(kind, item_id, label)
+        index.last_change = change_id
+    return True
+
+
+def prune_changes(conn, now=None):
+    """Write job deleting change-log rows every worker has had time to see"""
+    now = now or time.time()
+    return conn.execute('DELETE FROM suggest_changes WHERE created_at < ?',
+                        (now - CHANGE_RETENTION,)).rowcount
+
+
+class Suggester:
+    """A worker's index plus the bookkeeping that keeps it in sync"""
+
+    def __init__(self, app):
+        self.app = app
+        self.pid = os.getpid()
+        self.index = PrefixIndex(max_entries=app.config.get('SUGGEST_MAX_ENTRIES', 200000),
+                                 max_words=app.config.get('SUGGEST_WORDS', 6))
+        self.sync_interval = app.config.get('SUGGEST_SYNC_INTERVAL', 1.0)
+        self._ready = threading.Event()
+        self._sync_lock = threading.Lock()
+        self._synced = 0.0
+        self._pruned = time.monotonic()
+        self.builds = 0
+        self.build_seconds = 0.0
+
+    def _with_conn(self, fn):
+        pool = db.get_pool(self.app)
+        conn = pool.acquire()
+        try:
+            return fn(conn)
+        finally:
+            pool.release(conn)
+
+    def rebuild(self):
+        started = time.perf_counter()
+        self._with_conn(lambda conn: build(conn, self.index))
+        self.build_seconds = time.perf_counter() - started
+        self.builds += 1
+        self._synced = time.monotonic()
+        self._ready.set()
+
+    def sync(self):
+        """Catch up with the change log if due; never blocks on another thread's sync"""
+        if time.monotonic() - self._synced < self.sync_interval:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self._synced = time.monotonic()
+            if not self._with_conn(lambda conn: apply_changes(conn, self.index)):
+                self.rebuild()
+            if time.monotonic() - self._pruned > CHANGE_RETENTION / 4:
+                self._pruned = time.monotonic()
+                writer.run(self.app, prune_changes)
+        finally:
+            self._sync_lock.release()
+
+    def lookup(self, prefix, limit):
+        if not self._ready.is_set():
+            with self._sync_lock:
+                if not self._ready.is_set():
+                    self.rebuild()
+        self.sync()
+        return self.index.lookup(prefix, limit)
+
+    def stats(self):
+        stats = self.index.stats()
+        stats.update(builds=self.builds, build_seconds=round(self.build_seconds, 3))
+        return stats
+
+
+_suggester = None
+_suggester_lock = threading.Lock()
+
+
+def get_suggester(app):
+    """This process's index, recreated after a fork and built on first lookup"""
+    global _suggester
+    if _suggester is None or _suggester.pid != os.getpid():
+        with _suggester_lock:
+            if _suggester is None or _suggester.pid != os.getpid():
+                _suggester = Suggester(app)
+    return _suggester
+
+
+def warm(app):
+    """Build this worker's index in the background so the first lookup is fast"""
+    suggester = get_suggester(app)
+
+    def build_index():
+        try:
+            with suggester._sync_lock:
+                if not suggester._ready.is_set():
+                    suggester.rebuild()
+        except Exception:
+            app.logger.exception('Building the suggestion index failed')
+
+    threading.Thread(target=build_index, name='suggest-build', daemon=True).start()
+
+
+def init_app(app):
+    app.config.setdefault('SUGGEST_MAX_ENTRIES', 200000)
+    app.config.setdefault('SUGGEST_WORDS', 6)
+    app.config.setdefault('SUGGEST_SYNC_INTERVAL', 1.0)
+    app.config.setdefault('SUGGEST_LIMIT', 8)
@@ -0,0 +1,339 @@
+"""
+Time-decayed popularity scores behind the /trending feed.
+
+Likes, comments and views are appended to ``trending_events`` (likes and
+comments by triggers, views in batches from each worker's ViewBuffer) and
+periodically folded into ``trending_scores``, one row per post.
+
+An event at time t adds ``weight * 2 ** ((t - epoch) / half_life)`` to its
+post's score.  Decaying every score by the same factor as time passes
+does not change their order, so scores are only ever added to and never
+decayed in place: the feed is a range read on idx_trending_score.  When
+the exponents grow large the epoch is moved forward and every score
+rescaled once.
+
+Usage: python trending.py [database]    # rebuild scores from likes and comments
+"""
+
+import atexit
+import os
+import sqlite3
+import sys
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, make_response
+
+import page_cache
+import writer
+
+
+# Rescale once the newest events weigh 2**REBASE_HALF_LIVES
+REBASE_HALF_LIVES = 64
+# Drop posts whose score has decayed below one view this many half-lives ago
+FORGET_HALF_LIVES = 16
+
+# created_at is stored as 'YYYY-MM-DD HH:MM:SS' UTC; events keep Unix seconds
+UNIX_TIME = "(julianday({}) - 2440587.5) * 86400.0"
+
+TRENDING_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS trending_events (
+        id INTEGER PRIMARY KEY,
+        blog_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 1,
+        created_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS trending_scores (
+        blog_id INTEGER PRIMARY KEY,
+        score REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS idx_trending_score ON trending_scores (score, blog_id)',
+    """
+    CREATE TABLE IF NOT EXISTS trending_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        epoch REAL NOT NULL
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trending_like_event
+    AFTER INSERT ON blog_likes BEGIN
+        INSERT INTO trending_events (blog_id, kind, created_at)
+        VALUES (new.blog_id, 'like', {UNIX_TIME.format("COALESCE(new.created_at, 'now')")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trending_comment_event
+    AFTER INSERT ON comments BEGIN
+        INSERT INTO trending_events (blog_id, kind, created_at)
+        VALUES (new.blog_id, 'comment', {UNIX_TIME.format("COALESCE(new.created_at, 'now')")});
+    END
+    """,
+]
+
+DEFAULT_WEIGHTS = {'view': 1.0, 'like': 5.0, 'comment': 10.0}
+DEFAULT_HALF_LIFE = 24 * 3600.0
+
+
+def _exp2(x):
+    try:
+        return 2.0 ** x
+    except OverflowError:
+        return float('inf')
+
+
+def _register(conn):
+    # pow() is only built into SQLite with the math extension enabled
+    conn.create_function('trending_exp2', 1, _exp2, deterministic=True)
+
+
+def ensure_schema(conn):
+    for statement in TRENDING_SCHEMA:
+        conn.execute(statement)
+    conn.execute('INSERT OR IGNORE INTO trending_state (id, epoch) VALUES (1, ?)', (time.time(),))
+
+
+def fold(conn, source_sql, params, weights, half_life, now):
+    """Add the decayed weight of (blog_id, kind, count, created_at) rows to the scores
+
+    Events stamped in the future (clock skew, imported data) count as now.
+    """
+    _register(conn)
+    epoch = conn.execute('SELECT epoch FROM trending_state WHERE id = 1').fetchone()[0]
+    cursor = conn.execute(f"""
+        INSERT INTO trending_scores (blog_id, score, updated_at)
+        SELECT e.blog_id,
+               SUM(e.count * CASE e.kind WHEN 'view' THEN ? WHEN 'like' THEN ? ELSE ? END
+                   * trending_exp2((MIN(e.created_at, ?) - ?) / ?)),
+               ?
+        FROM ({source_sql}) e
+        JOIN blogs b ON b.id = e.blog_id
+        WHERE e.created_at > ?
+        GROUP BY e.blog_id
+        ON CONFLICT (blog_id) DO UPDATE
+        SET score = score + excluded.score, updated_at = excluded.updated_at
+    """, [weights['view'], weights['like'], weights['comment'], now, epoch, half_life, now, *params,
+          now - FORGET_HALF_LIVES * half_life])
+    return cursor.rowcount
+
+
+def maintain(conn, half_life, now):
+    """Move the epoch forward when due and forget posts that have gone quiet"""
+    epoch = conn.execute('SELECT epoch FROM trending_state WHERE id = 1').fetchone()[0]
+    elapsed = (now - epoch) / half_life
+    if elapsed > REBASE_HALF_LIVES:
+        conn.execute('UPDATE trending_scores SET score = score * ?', (2.0 ** -elapsed,))
+        conn.execute('UPDATE trending_state SET epoch = ? WHERE id = 1', (now,))
+        elapsed = 0.0
+    return conn.execute('DELETE FROM trending_scores WHERE score < ?',
+                        (2.0 ** (elapsed - FORGET_HALF_LIVES),)).rowcount
+
+
+def aggregate(conn, weights=DEFAULT_WEIGHTS, half_life=DEFAULT_HALF_LIFE, now=None):
+    """Write job: fold every pending event into the scores, then drop the events
+
+    Returns the number of events folded.  Safe to run from several workers:
+    each run drains the events it saw inside its own write transaction.
+    """
+    now = now or time.time()
+    last, pending = conn.execute('SELECT MAX(id), COUNT(*) FROM trending_events').fetchone()
+    if last is None:
+        maintain(conn, half_life, now)
+        return 0
+    fold(conn, 'SELECT blog_id, kind, count, created_at FROM trending_events WHERE id <= ?', (last,),
+         weights, half_life, now)
+    conn.execute('DELETE FROM trending_events WHERE id <= ?', (last,))
+    maintain(conn, half_life, now)
+    return pending
+
+
+def record_views(conn, views, now=None):
+    """Write job appending one 'view' event per post for a buffered batch"""
+    now = now or time.time()
+    conn.executemany('INSERT INTO trending_events (blog_id, kind, count, created_at) VALUES (?, ?, ?, ?)',
+                     [(blog_id, 'view', count, now) for blog_id, count in views.items()])
+    return sum(views.values())
+
+
+def rebuild(conn, weights=DEFAULT_WEIGHTS, half_life=DEFAULT_HALF_LIFE, now=None):
+    """Recompute every score from stored likes and comments
+
+    Pending events are discarded, as likes and comments are counted from
+    their own tables; buffered views are not stored anywhere else and so
+    only survive in scores folded before the rebuild.  Likes counted in
+    ``blogs.likes`` from before blog_likes existed have no time of their
+    own and are dated at the post's creation.
+    """
+    now = now or time.time()
+    conn.execute('DELETE FROM trending_events')
+    conn.execute('DELETE FROM trending_scores')
+    conn.execute('UPDATE trending_state SET epoch = ? WHERE id = 1', (now,))
+    fold(conn, f"""
+        SELECT blog_id, 'like' AS kind, 1 AS count, {UNIX_TIME.format('created_at')} AS created_at
+        FROM blog_likes
+        UNION ALL
+        SELECT id, 'like', MAX(likes - (SELECT COUNT(*) FROM blog_likes l WHERE l.blog_id = blogs.id), 0),
+               {UNIX_TIME.format('created_at')}
+        FROM blogs
+        WHERE likes > 0
+        UNION ALL
+        SELECT blog_id, 'comment', 1, {UNIX_TIME.format('created_at')}
+        FROM comments
+    """, (), weights, half_life, now)
+    maintain(conn, half_life, now)
+    return conn.execute('SELECT COUNT(*) FROM trending_scores').fetchone()[0]
+
+
+class ViewBuffer:
+    """Counts post views in memory and appends them as events in batches
+
+    The flusher thread also folds all pending events into the scores every
+    ``refresh`` seconds, so the feed lags real activity by at most that.
+    """
+
+    def __init__(self, app, interval=5.0, refresh=60.0):
+        self.app = app
+        self.interval = interval
+        self.refresh = refresh
+        self.pid = os.getpid()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self._refreshed = time.monotonic()
+        self.flushed = 0
+        self.aggregations = 0
+        self.folded = 0
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='trending-flusher', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.interval)
+            try:
+                self.flush()
+                if time.monotonic() - self._refreshed >= self.refresh:
+                    self.aggregate()
+            except Exception:
+                self.app.logger.exception('Updating trending scores failed')
+
+    def record(self, blog_id):
+        with self._lock:
+            self._pending[blog_id] = self._pending.get(blog_id, 0) + 1
+        self._ensure_thread()
+
+    def flush(self):
+        """Append buffered views to trending_events; returns views written"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            written = writer.run(self.app, record_views, pending)
+        except Exception:
+            with self._lock:
+                for blog_id, count in pending.items():
+                    self._pending[blog_id] = self._pending.get(blog_id, 0) + count
+            raise
+        self.flushed += written
+        return written
+
+    def aggregate(self):
+        """Fold pending events into the scores; returns events folded"""
+        self._refreshed = time.monotonic()
+        folded = writer.run(self.app, aggregate, weights(self.app), half_life(self.app))
+        self.aggregations += 1
+        self.folded += folded
+        page_cache.invalidate('trending')
+        return folded
+
+    def shutdown(self):
+        """Stop the flusher thread and append the views still buffered"""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        if self.pid == os.getpid():
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            pending = sum(self._pending.values())
+        return {'pending_views': pending, 'flushed_views': self.flushed,
+                'aggregations': self.aggregations, 'folded_events': self.folded}
+
+
+def weights(app):
+    return {'view': app.config['TRENDING_VIEW_WEIGHT'],
+            'like': app.config['TRENDING_LIKE_WEIGHT'],
+            'comment': app.config['TRENDING_COMMENT_WEIGHT']}
+
+
+def half_life(app):
+    return app.config['TRENDING_HALF_LIFE_HOURS'] * 3600.0
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer(app):
+    """This process's view buffer, recreated after a fork"""
+    global _buffer
+    if _buffer is None or _buffer.pid != os.getpid():
+        with _buffer_lock:
+            if _buffer is None or _buffer.pid != os.getpid():
+                _buffer = ViewBuffer(app,
+                                     interval=app.config.get('TRENDING_FLUSH_INTERVAL', 5.0),
+                                     refresh=app.config.get('TRENDING_REFRESH_INTERVAL', 60.0))
+    return _buffer
+
+
+def counts_views(f):
+    """Record a view of the post ``id`` whenever the route answers 200 or 304, cached or not"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        if response.status_code in (200, 304) and current_app.config['TRENDING_COUNT_VIEWS']:
+            get_buffer(current_app._get_current_object()).record(kwargs['id'])
+        return response
+    return decorated_function
+
+
+def shutdown():
+    if _buffer is not None:
+        _buffer.shutdown()
+
+
+def init_app(app):
+    app.config.setdefault('TRENDING_HALF_LIFE_HOURS', 24.0)
+    app.config.setdefault('TRENDING_VIEW_WEIGHT', DEFAULT_WEIGHTS['view'])
+    app.config.setdefault('TRENDING_LIKE_WEIGHT', DEFAULT_WEIGHTS['like'])
+    app.config.setdefault('TRENDING_COMMENT_WEIGHT', DEFAULT_WEIGHTS['comment'])
+    app.config.setdefault('TRENDING_FLUSH_INTERVAL', 5.0)
+    app.config.setdefault('TRENDING_REFRESH_INTERVAL', 60.0)
+    app.config.setdefault('TRENDING_COUNT_VIEWS', True)
+    # Registered after writer.init_app, so views are flushed before the writer stops
+    atexit.register(shutdown)
+
+
+if __name__ == '__main__':
+    database = sys.argv[1] if len(sys.argv) > 1 else 'instance/blog_database.db'
+    conn = sqlite3.connect(database)
+    with conn:
+        ensure_schema(conn)
+        scored = rebuild(conn)
+    conn.close()
+    print(f"✅ Rebuilt trending scores for {scored} posts")
@@ -0,0 +1,193 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+
+
+CHUNK_SIZE = 64 * 1024
+
+# Files younger than this are never collected: an upload is written to disk
+# before the post that references it is committed
+GC_GRACE_SECONDS = 15 * 60
+
+
+UPLOADS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS uploads (
+        path TEXT PRIMARY KEY,
+        sha256 TEXT,
+        size INTEGER,
+        refcount INTEGER NOT NULL DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS idx_uploads_refcount ON uploads (refcount)',
+    'CREATE INDEX IF NOT EXISTS idx_blogs_image_path ON blogs (image_path)',
+    """
+    CREATE TRIGGER IF NOT EXISTS uploads_ref_insert
+    AFTER INSERT ON blogs WHEN new.image_path IS NOT NULL BEGIN
+        INSERT INTO uploads (path, refcount) VALUES (new.image_path, 1)
+        ON CONFLICT (path) DO UPDATE SET refcount = refcount + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS uploads_ref_update
+    AFTER UPDATE OF image_path ON blogs
+    WHEN old.image_path IS NOT new.image_path BEGIN
+        UPDATE uploads SET refcount = refcount - 1 WHERE path = old.image_path;
+        INSERT INTO uploads (path, refcount)
+        SELECT new.image_path, 1 WHERE new.image_path IS NOT NULL
+        ON CONFLICT (path) DO UPDATE SET refcount = refcount + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS uploads_ref_delete
+    AFTER DELETE ON blogs WHEN old.image_path IS NOT NULL BEGIN
+        UPDATE uploads SET refcount = refcount - 1 WHERE path = old.image_path;
+    END
+    """,
+]
+
+
+def ensure_schema(conn):
+    """Create the uploads table and refcount triggers, counting existing references"""
+    for statement in UPLOADS_SCHEMA:
+        conn.execute(statement)
+    conn.execute("""
+        INSERT INTO uploads (path, refcount)
+        SELECT image_path, COUNT(*) FROM blogs
+        WHERE image_path IS NOT NULL
+        GROUP BY image_path
+        ON CONFLICT (path) DO UPDATE SET refcount = excluded.refcount
+    """)
+
+
+def save(file, upload_folder):
+    """Stream an uploaded file to disk under its SHA-256
+
+    Returns ``(path, sha256, size)`` with the path relative to the static
+    folder, e.g. ``uploads/3f/3fa4...c2.jpg``.  Uploading identical bytes
+    twice yields the same path and keeps a single copy.
+    """
+    ext = file.filename.rsplit('.', 1)[1].lower()
+    os.makedirs(upload_folder, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=upload_folder, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = file.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+
+        sha = digest.hexdigest()
+        shard = os.path.join(upload_folder, sha[:2])
+        os.makedirs(shard, exist_ok=True)
+        target = os.path.join(shard, f'{sha}.{ext}')
+        try:
+            # Existing copy: refresh its mtime so garbage collection's grace
+            # period covers it until the post that uses it commits
+            os.utime(target)
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return f'uploads/{sha[:2]}/{sha}.{ext}', sha, size
+
+
+def record(conn, path, sha, size):
+    """Write the uploads row for a saved file, without committing
+
+    It lands in the same transaction as the post that uses it; the
+    reference count itself is maintained by triggers on ``blogs``.
+    """
+    conn.execute("""
+        INSERT INTO uploads (path, sha256, size) VALUES (?, ?, ?)
+        ON CONFLICT (path) DO UPDATE SET sha256 = excluded.sha256, size = excluded.size
+    """, (path, sha, size))
+
+
+def store(conn, file, upload_folder):
+    """:func:`save` the file and :func:`record` it on ``conn``; returns its path"""
+    path, sha, size = save(file, upload_folder)
+    record(conn, path, sha, size)
+    return path
+
+
+def _variant_stem(filename):
+    """``abc-480.webp`` -> ``abc``"""
+    return os.path.splitext(filename)[0].rsplit('-', 1)[0]
+
+
+def collect_garbage(conn, static_folder, grace_seconds=GC_GRACE_SECONDS, dry_run=False):
+    """Delete upload files (and their variants) no post references
+
+    Returns ``(files_removed, bytes_freed)``.
+    """
+    referenced = {row[0] for row in conn.execute(
+        'SELECT path FROM uploads WHERE refcount > 0'
+        ' UNION SELECT image_path FROM blogs WHERE image_path IS NOT NULL'
+    )}
+    referenced_stems = {os.path.splitext(os.path.basename(p))[0] for p in referenced}
+
+    upload_root = os.path.join(static_folder, 'uploads')
+    cutoff = time.time() - grace_seconds
+    removed = 0
+    freed = 0
+    removed_paths = []
+    for directory, _, filenames in os.walk(upload_root):
+        in_variants = os.path.basename(directory) == 'variants'
+        for filename in filenames:
+            full = os.path.join(directory, filename)
+            relative = os.path.relpath(full, static_folder).replace(os.sep, '/')
+            if in_variants:
+                keep = _variant_stem(filename) in referenced_stems
+            else:
+                keep = relative in referenced
+            if keep:
+                continue
+            stat = os.stat(full)
+            if stat.st_mtime > cutoff:
+                continue
+            if not dry_run:
+                os.remove(full)
+            if not in_variants:
+                removed_paths.append(relative)
+            removed += 1
+            freed += stat.st_size
+
+    if not dry_run:
+        # Rows go with their files: one still in its grace period keeps its row,
+        # so a later pass can reclaim it; rows whose file is already gone go too
+        missing = [path for (path,) in conn.execute('SELECT path FROM uploads WHERE refcount <= 0')
+                   if not os.path.exists(os.path.join(static_folder, path))]
+        with conn:
+            conn.executemany('DELETE FROM uploads WHERE path = ? AND refcount <= 0',
+                             [(path,) for path in set(removed_paths) | set(missing)])
+    return removed, freed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reclaim upload files no post references')
+    parser.add_argument('database', nargs='?', default='instance/blog_database.db')
+    parser.add_argument('--static', default='static', help='static folder holding uploads/')
+    parser.add_argument('--grace', type=int, default=GC_GRACE_SECONDS,
+                        help='skip files modified in the last N seconds')
+    parser.add_argument('--dry-run', action='store_true', help='report without deleting')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.database)
+    removed, freed = collect_garbage(conn, args.static, args.grace, args.dry_run)
+    conn.close()
+    verb = 'Would free' if args.dry_run else 'Freed'
+    print(f"🧹 {verb} {freed / 1024 / 1024:.2f} MB ({freed} bytes) across {removed} files")
@@ -0,0 +1,163 @@
+from datetime import datetime
+from functools import lru_cache
+
+
+LONG_DATE = '%B %d, %Y'
+SHORT_DATE = '%b %d, %Y'
+EXCERPT_LENGTH = 150
+
+
+@lru_cache(maxsize=1024)
+def format_day(day, fmt):
+    """strftime for a calendar day; a listing page only ever has a few distinct days"""
+    return day.strftime(fmt)
+
+
+class Timestamp:
+    """A SQLite timestamp parsed once, with day-memoized display strings"""
+
+    __slots__ = ('raw', 'value')
+
+    def __init__(self, raw):
+        self.raw = raw
+        try:
+            self.value = raw if isinstance(raw, datetime) else datetime.fromisoformat(raw.replace('Z', ''))
+        except (AttributeError, ValueError):
+            self.value = None
+
+    def __str__(self):
+        return str(self.raw)
+
+    def __eq__(self, other):
+        return isinstance(other, Timestamp) and self.raw == other.raw
+
+    def __hash__(self):
+        return hash(self.raw)
+
+    def format(self, fmt):
+        if self.value is None:
+            return str(self.raw)
+        return format_day(self.value.date(), fmt)
+
+    @property
+    def long(self):
+        return self.format(LONG_DATE)
+
+    @property
+    def short(self):
+        return self.format(SHORT_DATE)
+
+    def ago(self, now=None):
+        """Relative age such as "3 hours ago" (not memoized: it depends on now)"""
+        if self.value is None:
+            return str(self.raw)
+        diff = (now or datetime.now()) - self.value
+        if diff.days > 0:
+            return f"{diff.days} days ago"
+        elif diff.seconds > 3600:
+            return f"{diff.seconds // 3600} hours ago"
+        elif diff.seconds > 60:
+            return f"{diff.seconds // 60} minutes ago"
+        return "Just now"
+
+
+@lru_cache(maxsize=4096)
+def timestamp(raw):
+    """Shared, immutable Timestamp for ``raw`` so repeated values parse once"""
+    return Timestamp(raw)
+
+
+def as_timestamp(value):
+    if isinstance(value, Timestamp):
+        return value
+    if isinstance(value, str):
+        return timestamp(value)
+    return Timestamp(value)
+
+
+def _optional(row, keys, name):
+    return row[name] if name in keys else None
+
+
+class BlogCard:
+    """What a listing card renders, mapped once from a blogs/users row
+
+    ``excerpt`` holds the first :data:`EXCERPT_LENGTH` characters and
+    ``content_length`` the full length (see derived_fields), so the teaser
+    and its ellipsis are decided here, not per render.
+    """
+
+    __slots__ = ('id', 'title', 'author_id', 'author_name', 'created', 'likes',
+                 'excerpt', 'summary', 'content_length', 'word_count', 'reading_minutes',
+                 'image_path', 'image_card', 'image_full', 'image_webp_card', 'image_webp_full',
+                 'image_placeholder', 'title_highlight', 'snippet')
+
+    def __init__(self, row):
+        keys = row.keys()
+        self.id = row['id']
+        self.title = row['title']
+        self.author_id = row['author_id']
+        self.author_name = row['author_name']
+        self.created = as_timestamp(row['created_at'])
+        self.likes = row['likes']
+        self.excerpt = _optional(row, keys, 'excerpt') or ''
+        self.content_length = _optional(row, keys, 'content_length') or len(self.excerpt)
+        self.word_count = _optional(row, keys, 'word_count')
+        self.reading_minutes = _optional(row, keys, 'reading_minutes')
+        self.summary = self.teaser(EXCERPT_LENGTH)
+        self.image_path = row['image_path']
+        self.image_card = _optional(row, keys, 'image_card')
+        self.image_full = _optional(row, keys, 'image_full')
+        self.image_webp_card = _optional(row, keys, 'image_webp_card')
+        self.image_webp_full = _optional(row, keys, 'image_webp_full')
+        self.image_placeholder = _optional(row, keys, 'image_placeholder')
+        self.title_highlight = _optional(row, keys, 'title_highlight')
+        self.snippet = _optional(row, keys, 'snippet')
+
+    @property
+    def created_at(self):
+        return self.created.raw
+
+    def teaser(self, length):
+        """First ``length`` characters of the excerpt, with an ellipsis if cut"""
+        if self.content_length > length:
+            return self.excerpt[:length] + '...'
+        return self.excerpt
+
+
+class BlogPost(BlogCard):
+    """A full post for the post page"""
+
+    __slots__ = ('content', 'updated', 'comment_count')
+
+    def __init__(self, row):
+        super().__init__(row)
+        self.content = row['content']
+        self.updated = as_timestamp(row['updated_at'])
+        self.comment_count = row['comment_count']
+
+    @property
+    def updated_at(self):
+        return self.updated.raw
+
+    @property
+    def edited(self):
+        return self.updated.raw != self.created.raw
+
+
+class CommentView:
+    """A comment as rendered under a post"""
+
+    __slots__ = ('id', 'blog_id', 'user_id', 'commenter_name', 'content', 'created')
+
+    def __init__(self, row):
+        self.id = row['id']
+        self.blog_id = row['blog_id']
+        self.user_id = row['user_id']
+        self.commenter_name = row['commenter_name']
+        self.content = row['content']
+        self.created = as_timestamp(row['created_at'])
+
+    @property
+    def created_at(self):
+        return self.created.raw
@@ -0,0 +1,212 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from flask import has_request_context
+
+import db
+import metrics
+
+
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+metrics.registry.describe('sqlite_write_batch_size', 'Write jobs committed per group-commit transaction')
+metrics.registry.describe('sqlite_write_queue_seconds', 'Time a write job waited before the writer ran it')
+metrics.registry.describe('sqlite_write_commit_seconds', 'Time to COMMIT one write batch')
+metrics.registry.describe('sqlite_write_failures_total', 'Write jobs that raised or whose batch failed to commit')
+
+_STOP = object()
+
+
+class WriteQueue:
+    """Single writer thread that group-commits queued write jobs
+
+    A job is ``fn(conn, *args)``: it runs its statements on the writer's
+    connection without committing and returns a result.  Jobs arriving
+    within ``window`` seconds of each other (up to ``max_batch``) share one
+    BEGIN IMMEDIATE ... COMMIT, so one fsync covers them all and requests
+    never contend for SQLite's write lock.  Each job runs inside its own
+    SAVEPOINT, so a failing job is rolled back and reported without
+    affecting the rest of the batch.  Results are handed back only after
+    the COMMIT succeeded.
+    """
+
+    def __init__(self, app, window=0.002, max_batch=64, timeout=10.0):
+        self.app = app
+        self.window = window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.pid = os.getpid()
+        self._queue = queue.Queue()
+        self._stopped = False
+        self.batches = 0
+        self.jobs = 0
+        self.failures = 0
+        self.largest_batch = 0
+        self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self):
+        return not self._stopped and self._thread.is_alive()
+
+    def submit(self, fn, *args):
+        """Queue a job; returns a Future for its result"""
+        future = Future()
+        self._queue.put((fn, args, future, time.perf_counter()))
+        return future
+
+    def execute(self, fn, *args):
+        """Queue a job and wait for it to be committed"""
+        return self.submit(fn, *args).result(timeout=self.timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP:
+                self._queue.put(_STOP)  # finish this batch, then stop
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self):
+        conn = db.connect(self.app)
+        conn.isolation_level = None  # transactions are managed explicitly below
+        try:
+            while True:
+                batch = self._collect()
+                if batch is None:
+                    return
+                self._write(conn, batch)
+        finally:
+            conn.close()
+
+    def _write(self, conn, batch):
+        started = time.perf_counter()
+        for _, _, _, enqueued in batch:
+            metrics.registry.observe('sqlite_write_queue_seconds', {}, started - enqueued)
+
+        done = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for fn, args, future, _ in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute('SAVEPOINT job')
+                try:
+                    result = fn(conn, *args)
+                except Exception as e:
+                    conn.execute('ROLLBACK TO job')
+                    conn.execute('RELEASE job')
+                    self._fail(future, e)
+                else:
+                    conn.execute('RELEASE job')
+                    done.append((future, result))
+            committing = time.perf_counter()
+            conn.execute('COMMIT')
+            metrics.registry.observe('sqlite_write_commit_seconds', {}, time.perf_counter() - committing)
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            self.app.logger.exception('Write batch of %d jobs failed', len(batch))
+            for future, _ in done:
+                self._fail(future, e)
+            for _, _, future, _ in batch:
+                if not future.done():
+                    self._fail(future, e)
+            done = []
+
+        for future, result in done:
+            future.set_result(result)
+        self.batches += 1
+        self.jobs += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        metrics.registry.observe('sqlite_write_batch_size', {}, len(batch), BATCH_BUCKETS)
+
+    def _fail(self, future, error):
+        self.failures += 1
+        metrics.registry.inc('sqlite_write_failures_total', {})
+        if not future.done():
+            future.set_exception(error)
+
+    def shutdown(self):
+        """Commit everything already queued, then stop the writer thread"""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._queue.put(_STOP)
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=10)
+
+    def stats(self):
+        return {'queued': self._queue.qsize(), 'batches': self.batches, 'jobs': self.jobs,
+                'failures': self.failures, 'largest_batch': self.largest_batch}
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer(app):
+    """This process's writer, started on first use and again after a fork"""
+    global _writer
+    if _writer is None or _writer.pid != os.getpid():
+        with _writer_lock:
+            if _writer is None or _writer.pid != os.getpid():
+                _writer = WriteQueue(app,
+                                     window=app.config.get('WRITE_QUEUE_WINDOW_MS', 2) / 1000,
+                                     max_batch=app.config.get('WRITE_QUEUE_MAX_BATCH', 64),
+                                     timeout=app.config.get('WRITE_QUEUE_TIMEOUT', 10.0))
+    return _writer
+
+
+def _run_inline(app, fn, args):
+    """One job in its own transaction, for when the queue is off or stopped"""
+    if has_request_context():
+        conn, pooled = db.get_db(), None
+    else:
+        pooled = db.get_pool(app)
+        conn = pooled.acquire()
+    try:
+        with conn:
+            if not conn.in_transaction:
+                conn.execute('BEGIN IMMEDIATE')
+            return fn(conn, *args)
+    finally:
+        if pooled is not None:
+            pooled.release(conn)
+
+
+def run(app, fn, *args):
+    """Run write job ``fn(conn, *args)`` and return its result once committed"""
+    if app.config.get('WRITE_QUEUE_ENABLED', True):
+        writer = get_writer(app)
+        if writer.running:
+            return writer.execute(fn, *args)
+    return _run_inline(app, fn, args)
+
+
+def shutdown():
+    if _writer is not None and _writer.pid == os.getpid():
+        _writer.shutdown()
+
+
+def init_app(app):
+    app.config.setdefault('WRITE_QUEUE_ENABLED', True)
+    app.config.setdefault('WRITE_QUEUE_WINDOW_MS', 2)
+    app.config.setdefault('WRITE_QUEUE_MAX_BATCH', 64)
+    app.config.setdefault('WRITE_QUEUE_TIMEOUT', 10.0)
+    # Registered before likes.init_app, so it runs after the final like flush
+    atexit.register(shutdown)